@@ -1,12 +1,13 @@
 # Conteúdo completo para o arquivo: admin_page.py
 
 import streamlit as st
-import pandas as pd
 import db_utils
+import credit_state
 import time
 
 def render():
     """Renderiza a página completa do painel de administração com tabela melhorada."""
+    import pandas as pd
     st.title("Painel de Administração do Radar Pro")
     st.markdown("---")
 
@@ -33,6 +34,7 @@ def render():
             min_value=0, max_value=100, value=int(current_limit), step=1,
             help="Defina quantas análises um usuário pode fazer gratuitamente por dia."
         )
+        st.caption(f"Sessões abertas neste servidor passam a usar o novo limite imediatamente; outras instâncias do app, em até {credit_state.REFRESH_SECONDS // 60} minutos.")
         if st.button("Salvar Novo Limite", type="primary"):
             with st.spinner("Salvando..."):
                 if db_utils.update_platform_setting_admin('daily_analysis_limit', str(new_limit)):
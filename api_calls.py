@@ -2,19 +2,21 @@
 
 import streamlit as st
 import json
-import googlemaps
-import openai
 import time
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
 from tenacity import retry, stop_after_attempt, wait_exponential
-from pytrends.request import TrendReq
-import pandas as pd
 import db_utils
 
+# googlemaps, openai, pytrends (via trends_store) e pandas são importados dentro das funções que os usam,
+# para não pesarem na inicialização do app.
+
 # --- Funções de Inicialização Segura ---
 
 @st.cache_resource
 def get_gmaps_client():
     """Cria e retorna um cliente Google Maps de forma segura."""
+    import googlemaps
     try:
         return googlemaps.Client(key=st.secrets.google["maps_api_key"])
     except KeyError:
@@ -25,6 +27,7 @@ def get_gmaps_client():
 @st.cache_resource
 def setup_openai():
     """Configura a chave da API da OpenAI de forma segura."""
+    import openai
     try:
         openai.api_key = st.secrets.openai["api_key"]
     except KeyError:
@@ -37,6 +40,7 @@ def setup_openai():
 @retry(stop=stop_after_attempt(4), wait=wait_exponential(multiplier=2, min=4, max=30))
 def call_chatgpt_with_retry(prompt: str):
     """Chama a API da OpenAI (ChatGPT) e retorna um objeto JSON."""
+    import openai
     setup_openai()
     try:
         response = openai.chat.completions.create(model="gpt-3.5-turbo-1106", messages=[{"role": "system", "content": "Você é um consultor de negócios especialista. Responda APENAS com um objeto JSON válido, sem texto ou formatação adicional."}, {"role": "user", "content": prompt}], response_format={"type": "json_object"})
@@ -46,7 +50,14 @@ def call_chatgpt_with_retry(prompt: str):
         print(f"ERRO DETALHADO NA CHAMADA DA OPENAI: {e}"); raise e
 
 # --- Lógica de Prompts Customizados ---
-def get_prompt_for_business_type(tipo_negocio, termo, localizacao, competidores_texto, avg_rating):
+def get_prompt_for_business_type(tipo_negocio, termo, localizacao, competidores_texto, avg_rating, dossie_alvos=None):
+    # dossie_alvos: nomes dos concorrentes sem dossiê em cache (None = os 5 principais, lista vazia = nenhum)
+    if dossie_alvos is None:
+        linha_dossies = '"dossies_concorrentes": (array de objetos) para os 5 principais concorrentes, cada um com "nome", "posicionamento_mercado", "pontos_fortes", e "pontos_fracos".'
+    elif dossie_alvos:
+        linha_dossies = f'"dossies_concorrentes": (array de objetos) apenas para os concorrentes {", ".join(dossie_alvos)}, cada um com "nome" (exatamente como listado), "posicionamento_mercado", "pontos_fortes", e "pontos_fracos".'
+    else:
+        linha_dossies = ''
     prompt_base = f"""
     Analise o mercado para '{termo}' em '{localizacao}'.
     Dados coletados:
@@ -58,7 +69,7 @@ def get_prompt_for_business_type(tipo_negocio, termo, localizacao, competidores_
     "analise_sentimentos": (objeto) Um objeto com chaves "Positivo", "Negativo", e "Neutro", com valores de 0 a 100.
     "plano_de_acao": (array de 5 a 7 strings) Passos práticos e acionáveis.
     "analise_demografica": (objeto) com as chaves "resumo", "faixa_etaria", e "interesses_principais" (array).
-    "dossies_concorrentes": (array de objetos) para os 5 principais concorrentes, cada um com "nome", "posicionamento_mercado", "pontos_fortes", e "pontos_fracos".
+    {linha_dossies}
     """
     prompts_especificos = {
         "Restaurante, Bar ou Lanchonete": prompt_base + """
@@ -80,54 +91,187 @@ def get_prompt_for_business_type(tipo_negocio, termo, localizacao, competidores_
     return prompts_especificos.get(tipo_negocio, prompt_base)
 
 # --- Função de Análise de Tendências ---
-@st.cache_data(ttl=3600) # Cache de 1 hora para os dados do Trends
-def get_interest_over_time(keyword: str, location: str = 'BR') -> pd.DataFrame:
+@st.cache_data(ttl=3600) # Cache de 1 hora em memória; a série em si fica persistida no trends_store
+def get_interest_over_time(keyword: str, location: str = 'BR') -> "pd.DataFrame":
     """Busca o interesse por uma palavra-chave no Google Trends nos últimos 12 meses."""
-    try:
-        pytrends = TrendReq(hl='pt-BR', tz=360)
-        pytrends.build_payload([keyword], cat=0, timeframe='today 12-m', geo=location, gprop='')
-        df = pytrends.interest_over_time()
-        if not df.empty and keyword in df.columns:
-            return df[[keyword]]
+    import pandas as pd
+    import trends_store
+    serie = trends_store.get_interest_series(keyword, location)  # TrendsPending não é cacheado
+    if not trends_store.has_volume(serie):
+        # Só zeros = sem volume na região; vazio para que a aba caia para o Brasil
         return pd.DataFrame()
-    except Exception as e:
-        print(f"Erro ao buscar dados do Google Trends: {e}"); return pd.DataFrame()
+    # A série salva fica na escala do termo âncora; na tela volta para 0–100, como no Trends
+    pico = max(serie.values()) or 1
+    return pd.DataFrame({keyword: [round(v * 100 / pico) for v in serie.values()]}, index=pd.DatetimeIndex(list(serie), name='date'))
 
-# --- Função Principal de Orquestração ---
-def run_full_analysis(termo: str, localizacao: str, user_id: str, market_id: int, progress_bar, maps_api_key: str, tipo_negocio: str):
-    gmaps = get_gmaps_client()
-    snapshot_data = {"termo_busca": termo, "localizacao_busca": localizacao, "tipo_negocio": tipo_negocio}
+# --- Pipeline de Análise em Etapas ---
+# Cada etapa recebe o checkpoint acumulado (entradas + saídas das etapas anteriores) e devolve
+# as suas saídas, que são gravadas em analysis_runs antes da próxima etapa começar. Se algo falhar,
+# a próxima tentativa para o mesmo mercado retoma da última etapa concluída.
 
-    progress_bar.progress(10, text="Buscando concorrentes no Google Maps...")
-    query = f"{termo} em {localizacao}"
-    places_result = gmaps.places(query=query).get('results', [])
-    competidores = [{'name': p.get('name'), 'address': p.get('formatted_address'), 'rating': p.get('rating', 0), 'user_ratings_total': p.get('user_ratings_total', 0), 'latitude': p.get('geometry', {}).get('location', {}).get('lat'), 'longitude': p.get('geometry', {}).get('location', {}).get('lng')} for p in places_result[:10]]
-    snapshot_data['competidores'] = competidores
+def _stage_collect(ctx: dict) -> dict:
+    # Mesma busca feita há pouco por qualquer usuário: reaproveita o resultado bruto do Places
+    # ("Refazer IA" sempre busca de novo, para a IA não reanalisar a mesma lista)
+    shared = None if ctx.get('force_refresh') else db_utils.get_shared_places(ctx['termo_busca'], ctx['localizacao_busca'])
+    if shared and shared.get('competidores') is not None:
+        return {'competidores': shared['competidores'], 'shared_data_id': shared['id']}
+    places_result = get_gmaps_client().places(query=f"{ctx['termo_busca']} em {ctx['localizacao_busca']}").get('results', [])
+    competidores = [{'place_id': p.get('place_id'), 'name': p.get('name'), 'address': p.get('formatted_address'), 'rating': p.get('rating', 0), 'user_ratings_total': p.get('user_ratings_total', 0), 'latitude': p.get('geometry', {}).get('location', {}).get('lat'), 'longitude': p.get('geometry', {}).get('location', {}).get('lng')} for p in places_result[:10]]
+    return {'competidores': competidores, 'shared_data_id': db_utils.save_shared_market_data(ctx['termo_busca'], ctx['localizacao_busca'], competidores=competidores)}
 
-    geocode_result = gmaps.geocode(localizacao)
-    if geocode_result:
-        snapshot_data['location_geocode'] = geocode_result[0]['geometry']['location']
+def _stage_geocode(ctx: dict) -> dict:
+    shared = db_utils.get_shared_geocode(ctx['localizacao_busca'])
+    if shared:
+        return shared
+    geocode_result = get_gmaps_client().geocode(ctx['localizacao_busca'])
+    if not geocode_result:
+        return {}
+    saida = {'location_geocode': geocode_result[0]['geometry']['location']}
+    # UF (ex.: 'RJ') usada para a região do Google Trends; snapshots antigos caem na resolução por coordenadas
+    componentes = geocode_result[0].get('address_components', [])
+    if any('country' in c.get('types', []) and c.get('short_name') == 'BR' for c in componentes):
+        saida['location_state'] = next((c.get('short_name') for c in componentes if 'administrative_area_level_1' in c.get('types', [])), None)
+    db_utils.save_shared_market_data(ctx['termo_busca'], ctx['localizacao_busca'], geocode=saida)
+    return saida
 
-    progress_bar.progress(40, text=f"Consultando IA para análise de '{tipo_negocio}'...")
+def _stage_enrich(ctx: dict) -> dict:
+    competidores = ctx['competidores']
     competidores_texto = "\n".join([f"- {c.get('name')} (Nota: {c.get('rating')})" for c in competidores])
     avg_rating_list = [c['rating'] for c in competidores if c.get('rating')]
     avg_rating = sum(avg_rating_list) / len(avg_rating_list) if avg_rating_list else 0
+    # Dossiês ainda válidos não são pedidos de novo à IA; entram de volta em _merge_dossiers
+    principais = competidores[:DOSSIER_COUNT]
+    cached = db_utils.get_competitor_dossiers([c['place_id'] for c in principais if c.get('place_id')])
+    alvos = [c.get('name') for c in principais if c.get('place_id') not in cached]
+    return {'cached_dossiers': cached, 'prompt': get_prompt_for_business_type(ctx['tipo_negocio'], ctx['termo_busca'], ctx['localizacao_busca'], competidores_texto, avg_rating, alvos)}
+
+# --- Dossiês de Concorrentes ---
+DOSSIER_COUNT = 5
+
+def _normalize_name(nome) -> str:
+    return " ".join(str(nome or "").lower().split())
 
-    prompt_final = get_prompt_for_business_type(tipo_negocio, termo, localizacao, competidores_texto, avg_rating)
-    ai_analysis = call_chatgpt_with_retry(prompt_final)
-    snapshot_data.update(ai_analysis)
+def _merge_dossiers(ctx: dict, ai_analysis: dict) -> dict:
+    """Junta os dossiês em cache com os recém-gerados, na ordem dos concorrentes, e guarda os novos."""
+    gerados = {_normalize_name(d.get('nome')): d for d in ai_analysis.get('dossies_concorrentes') or [] if isinstance(d, dict)}
+    cached = ctx.get('cached_dossiers') or {}
+    dossies, novos = [], {}
+    for c in ctx['competidores'][:DOSSIER_COUNT]:
+        # O gerado sai da lista mesmo quando há cache, para não aparecer duas vezes no relatório
+        gerado = gerados.pop(_normalize_name(c.get('name')), None)
+        dossie = cached.get(c.get('place_id')) or gerado
+        if not dossie: continue
+        if c.get('place_id') and c.get('place_id') not in cached: novos[c['place_id']] = dossie
+        dossies.append({**dossie, 'nome': c.get('name') or dossie.get('nome')})
+    db_utils.save_competitor_dossiers(novos)
+    # Dossiês com nome que não casou com nenhum concorrente continuam no relatório, só não vão para o cache
+    return {**ai_analysis, 'dossies_concorrentes': dossies + list(gerados.values())}
 
+# --- Detecção de Mudança na Concorrência ---
+# Reanálises quase sempre trazem os mesmos concorrentes com notas praticamente iguais. Se a "impressão
+# digital" do resultado do Places bate com a do snapshot anterior, as seções da IA são reaproveitadas
+# e só o snapshot e os KPIs novos são gravados, sem outra chamada ao ChatGPT.
+
+RATING_TOLERANCE = 0.1
+REVIEW_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000)
+# Mesmo sem mudanças, a análise da IA é refeita depois deste prazo
+AI_REUSE_MAX_AGE_DAYS = 60
+# Chaves do snapshot que vêm da coleta, não da IA
+_COLLECTED_KEYS = {'termo_busca', 'localizacao_busca', 'tipo_negocio', 'competidores', 'location_geocode', 'location_state', 'landscape_fingerprint', 'ai_generated_at'}
+
+def landscape_fingerprint(competidores: list) -> list:
+    """[[place_id, nota arredondada, faixa de avaliações]] ordenado por place_id (nome, se faltar o id)."""
+    return sorted([c.get('place_id') or c.get('name') or '', round(float(c.get('rating') or 0), 1), bisect_right(REVIEW_BUCKETS, c.get('user_ratings_total') or 0)] for c in competidores)
+
+def landscape_unchanged(atual: list, anterior: list | None) -> bool:
+    """Mesmos concorrentes, notas dentro da tolerância e mesma faixa de avaliações."""
+    if not anterior or len(atual) != len(anterior):
+        return False
+    return all(a[0] == b[0] and abs(a[1] - b[1]) <= RATING_TOLERANCE + 1e-9 and a[2] == b[2] for a, b in zip(atual, anterior))
+
+def _reusable_ai_analysis(ctx: dict, fingerprint: list) -> dict | None:
+    """Seções da IA do snapshot anterior, se a concorrência não mudou e a análise ainda está no prazo."""
+    snapshot = db_utils.get_latest_snapshot(ctx['market_id'], ctx['user_id']) if ctx.get('market_id') and ctx.get('user_id') else None
+    anterior = (snapshot or {}).get('dados_json') or {}
+    if isinstance(anterior, str): anterior = json.loads(anterior)
+    if anterior.get('tipo_negocio') != ctx['tipo_negocio'] or not landscape_unchanged(fingerprint, anterior.get('landscape_fingerprint')):
+        return None
+    try:
+        gerada_em = datetime.fromisoformat(anterior['ai_generated_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if datetime.now(timezone.utc) - gerada_em > timedelta(days=AI_REUSE_MAX_AGE_DAYS):
+        return None
+    return {'ai_analysis': {k: v for k, v in anterior.items() if k not in _COLLECTED_KEYS}, 'ai_generated_at': anterior['ai_generated_at']}
+
+def _stage_llm(ctx: dict) -> dict:
+    fingerprint = landscape_fingerprint(ctx['competidores'])
+    reaproveitada = None if ctx.get('force_refresh') else _reusable_ai_analysis(ctx, fingerprint)
+    if reaproveitada:
+        return {'landscape_fingerprint': fingerprint, **reaproveitada}
+    ai_analysis = _merge_dossiers(ctx, call_chatgpt_with_retry(ctx['prompt']))
+    return {'landscape_fingerprint': fingerprint, 'ai_analysis': ai_analysis, 'ai_generated_at': datetime.now(timezone.utc).isoformat()}
+
+def _build_snapshot_data(ctx: dict) -> dict:
+    snapshot_data = {"termo_busca": ctx['termo_busca'], "localizacao_busca": ctx['localizacao_busca'], "tipo_negocio": ctx['tipo_negocio'], 'competidores': ctx['competidores']}
+    for chave in ('location_geocode', 'location_state', 'landscape_fingerprint', 'ai_generated_at'):
+        if ctx.get(chave): snapshot_data[chave] = ctx[chave]
+    snapshot_data.update(ctx['ai_analysis'])
+    return snapshot_data
+
+ANALYSIS_STAGES = [
+    ('collect', _stage_collect, 10, "Buscando concorrentes no Google Maps..."),
+    ('geocode', _stage_geocode, 25, "Localizando a região da busca..."),
+    ('enrich', _stage_enrich, 35, "Preparando os dados para a IA..."),
+    ('llm', _stage_llm, 40, "Consultando IA para análise de '{tipo_negocio}'..."),
+]
+
+def _persist(ctx: dict, run_id: int | None, market_id: int, user_id: str, progress_bar) -> int:
+    """Etapa final: grava o snapshot (uma única vez, mesmo se retomada) e os KPIs."""
     progress_bar.progress(90, text="Salvando análise no banco de dados...")
-    final_json_string = json.dumps(snapshot_data, default=str)
-    
-    new_snapshot_id = db_utils.add_snapshot(market_id=market_id, user_id=user_id, dados_json=final_json_string)
+    snapshot_data = _build_snapshot_data(ctx)
+    snapshot_id = ctx.get('snapshot_id')
+    if not snapshot_id:
+        snapshot_id = db_utils.add_snapshot(market_id=market_id, user_id=user_id, dados_json=json.dumps(snapshot_data, default=str), shared_data_id=ctx.get('shared_data_id'))
+        if not snapshot_id:
+            raise RuntimeError("Não foi possível salvar o snapshot da análise.")
+        ctx['snapshot_id'] = snapshot_id
+        db_utils.save_analysis_checkpoint(run_id, 'llm', ctx)
+
+    progress_bar.progress(95, text="Registrando KPIs para análise histórica...")
+    db_utils.add_kpi_entry(snapshot_id=snapshot_id, market_id=market_id, user_id=user_id, analysis_data=snapshot_data)
+    return snapshot_id
 
-    if new_snapshot_id:
-        progress_bar.progress(95, text="Registrando KPIs para análise histórica...")
-        db_utils.add_kpi_entry(snapshot_id=new_snapshot_id, market_id=market_id, user_id=user_id, analysis_data=snapshot_data)
+def run_full_analysis(termo: str, localizacao: str, user_id: str, market_id: int, progress_bar, maps_api_key: str, tipo_negocio: str, force_refresh: bool = False):
+    """Roda (ou retoma) o pipeline e retorna o id do snapshot. force_refresh ignora o reaproveitamento da IA."""
+    inputs = db_utils.analysis_inputs(termo, localizacao, tipo_negocio)
+
+    # Retoma a última execução que falhou para este mercado, se for da mesma busca
+    run = db_utils.get_resumable_run(user_id, market_id, inputs)
+    if run:
+        run_id, ctx, done_stage = run['id'], run['checkpoint'], run.get('stage')
+    else:
+        run_id, ctx, done_stage = db_utils.start_analysis_run(user_id, market_id, inputs), dict(inputs), None
+    ctx.update(market_id=market_id, user_id=user_id, force_refresh=force_refresh)
+
+    stage_names = [name for name, *_ in ANALYSIS_STAGES]
+    start_at = stage_names.index(done_stage) + 1 if done_stage in stage_names else 0
+    current = None
+    try:
+        for current, stage_fn, progress, text in ANALYSIS_STAGES[start_at:]:
+            progress_bar.progress(progress, text=text.format(tipo_negocio=tipo_negocio))
+            ctx.update(stage_fn(ctx))
+            db_utils.save_analysis_checkpoint(run_id, current, ctx)
+        current = 'persist'
+        snapshot_id = _persist(ctx, run_id, market_id, user_id, progress_bar)
+    except Exception as e:
+        db_utils.finish_analysis_run(run_id, 'failed', error=f"{current}: {e}")
+        raise
 
+    db_utils.finish_analysis_run(run_id, 'completed', snapshot_id=snapshot_id)
     progress_bar.progress(100, text="Análise concluída com sucesso!")
     time.sleep(1)
+    return snapshot_id
 
 # --- Função para SWOT ---
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
@@ -1,8 +1,45 @@
 # Conteúdo para o arquivo: auth_utils.py
 
+import base64
+import hashlib
+import hmac
+import json
+import time
+
 import streamlit as st
 from supabase_client import supabase_client
 import db_utils
+import credit_state
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+def validate_access_token(token: str, user_id: str) -> dict | None:
+    """
+    Valida o JWT do Supabase localmente, sem chamada à API, e retorna suas claims.
+    Confere expiração e "sub"; a assinatura HS256 é verificada quando
+    [supabase] jwt_secret está nos secrets.
+    """
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = json.loads(_b64url_decode(header_b64))
+        claims = json.loads(_b64url_decode(payload_b64))
+
+        jwt_secret = st.secrets["supabase"].get("jwt_secret")
+        if jwt_secret:
+            # Com o segredo configurado, só HS256 é aceito: outro "alg" (ex.: "none") não pode pular a assinatura
+            if header.get("alg") != "HS256":
+                return None
+            expected = hmac.new(jwt_secret.encode("utf-8"), f"{header_b64}.{payload_b64}".encode("ascii"), hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64url_decode(signature_b64)):
+                return None
+
+        if claims.get("sub") != user_id or claims.get("exp", 0) <= time.time():
+            return None
+        return claims
+    except Exception as e:
+        print(f"Token de acesso inválido: {e}")
+        return None
 
 def login_user(email, password):
     """
@@ -14,8 +51,17 @@ def login_user(email, password):
         response = supabase_client.auth.sign_in_with_password({"email": email, "password": password})
         user_id = response.user.id
 
-        # Etapa crucial: Busca o perfil do usuário para verificar status e carregar dados
-        profile = db_utils.get_user_profile(user_id)
+        # As claims do token são conferidas localmente, sem outra ida ao servidor de auth
+        if not validate_access_token(response.session.access_token, user_id):
+            supabase_client.auth.sign_out()
+            return None, "Sessão inválida. Tente entrar novamente."
+
+        # Perfil, status, admin e configurações em uma única chamada; sem a RPC, volta às consultas separadas
+        bootstrap = db_utils.get_session_bootstrap()
+        if bootstrap and bootstrap.get('user_id') == user_id:
+            profile, is_admin, settings = bootstrap.get('profile'), bootstrap.get('is_admin', False), bootstrap.get('settings') or {}
+        else:
+            profile, is_admin, settings = db_utils.get_user_profile(user_id), None, {}
 
         # Verifica se o perfil existe e se a conta está ativa
         if not profile or not profile.get('is_active', False):
@@ -25,8 +71,8 @@ def login_user(email, password):
         # Se tudo estiver OK, armazena os dados na sessão do Streamlit
         st.session_state.user = response.user.dict()
         st.session_state.user_session = response.session
-        st.session_state.is_admin = db_utils.is_user_admin(user_id)
-        # st.session_state.credits = profile.get('analysis_credits', 0) # Lógica de créditos foi removida
+        st.session_state.is_admin = db_utils.is_user_admin(user_id) if is_admin is None else is_admin
+        credit_state.init_credit_state(user_id, profile, settings.get('daily_analysis_limit') or db_utils.get_platform_setting('daily_analysis_limit'))
 
         return st.session_state.user, None
 
@@ -0,0 +1,89 @@
+# benchmarks/bench_pdf_backends.py
+#
+# Compara os backends de PDF de report_generator em snapshots representativos
+# (benchmarks/fixtures/*.json): páginas por segundo e pico de memória (RSS).
+# Cada backend roda em um processo novo, para que o pico de RSS de um não
+# contamine a medição do outro. O mapa estático não é baixado (sem chave de API).
+#
+# Uso:
+#   python benchmarks/bench_pdf_backends.py
+#   python benchmarks/bench_pdf_backends.py --backends reportlab --variant resumido --repeat 10
+
+import argparse
+import json
+import multiprocessing
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+sys.path.insert(0, str(ROOT_DIR))
+
+PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+def count_pages(pdf_bytes: bytes) -> int:
+    return len(PAGE_RE.findall(pdf_bytes))
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # bytes no macOS, KiB no Linux
+
+def run_backend(backend: str, variant: str, fixture_paths: list, repeat: int) -> dict:
+    """Executado em um processo novo: renderiza cada fixture `repeat` vezes."""
+    import report_generator
+
+    snapshots = [json.loads(Path(p).read_text(encoding="utf-8"))["dados_json"] for p in fixture_paths]
+    # Aquecimento fora da medição: imports, fontes e ambiente Jinja.
+    report_generator.render_pdf_bytes(snapshots[0], "", variant, backend)
+
+    results = {}
+    for path, data in zip(fixture_paths, snapshots):
+        pages = 0
+        size = 0
+        start = time.perf_counter()
+        for _ in range(repeat):
+            pdf_bytes = report_generator.render_pdf_bytes(data, "", variant, backend)
+            pages += count_pages(pdf_bytes)
+            size = len(pdf_bytes)
+        elapsed = time.perf_counter() - start
+        results[Path(path).stem] = {"pages_per_second": pages / elapsed, "seconds_per_report": elapsed / repeat,
+                                    "pages": pages // repeat, "size_kb": size / 1024}
+    return {"results": results, "peak_rss_mb": peak_rss_mb()}
+
+def main(argv=None):
+    import report_generator
+
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de PDF do Radar Pro.")
+    parser.add_argument("--backends", nargs="+", default=list(report_generator.PDF_BACKENDS), choices=list(report_generator.PDF_BACKENDS))
+    parser.add_argument("--variant", default="completo")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON.")
+    args = parser.parse_args(argv)
+
+    fixture_paths = [str(p) for p in sorted(FIXTURES_DIR.glob("*.json"))]
+    report = {}
+    for backend in args.backends:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            report[backend] = executor.submit(run_backend, backend, args.variant, fixture_paths, args.repeat).result()
+
+    if args.json:
+        print(json.dumps(report, indent=2)); return 0
+
+    print(f"Variante: {args.variant} | repetições: {args.repeat}\n")
+    print(f"{'backend':<10} {'fixture':<22} {'páginas':>7} {'pág/s':>8} {'s/relatório':>11} {'KB':>8}")
+    for backend, data in report.items():
+        for fixture, r in data["results"].items():
+            print(f"{backend:<10} {fixture:<22} {r['pages']:>7} {r['pages_per_second']:>8.1f} {r['seconds_per_report']:>11.3f} {r['size_kb']:>8.0f}")
+        rss = data["peak_rss_mb"]
+        print(f"{backend:<10} pico de RSS: {f'{rss:.0f} MB' if rss is not None else 'indisponível'}\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
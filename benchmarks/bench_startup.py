@@ -0,0 +1,127 @@
+# benchmarks/bench_startup.py
+#
+# Mede o tempo de import de `main` (o que roda antes da tela de login) com
+# `python -X importtime` e compara com benchmarks/startup_budget.json.
+# Termina com código 1 se o total ou algum módulo estourar o orçamento, ou
+# se um módulo pesado que deveria ser carregado sob demanda (folium, openai,
+# xhtml2pdf...) aparecer na inicialização.
+#
+# Uso:
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --runs 5 --top 15
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BUDGET_PATH = Path(__file__).resolve().parent / "startup_budget.json"
+
+# Usado apenas se não houver .streamlit/secrets.toml: supabase_client cria o
+# cliente no import e precisa de uma URL/chave sintaticamente válidas.
+DUMMY_SECRETS = """
+[supabase]
+url = "http://localhost:54321"
+key = "bench-anon-key"
+
+[google]
+maps_api_key = "bench"
+
+[openai]
+api_key = "bench"
+"""
+
+def parse_importtime(stderr: str) -> list:
+    """Converte a saída de -X importtime em [(modulo, profundidade, self_us, cumulativo_us)]."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name_field = line[len("import time:"):].split("|", 2)
+        name_field = name_field[1:]  # espaço separador; o restante é a indentação de profundidade
+        depth = (len(name_field) - len(name_field.lstrip(" "))) // 2
+        entries.append((name_field.strip(), depth, int(self_us), int(cumulative_us)))
+    return entries
+
+def run_once(env: dict) -> list:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.splitlines()[-15:])
+        raise RuntimeError(f"'import main' falhou:\n{tail}")
+    return parse_importtime(result.stderr)
+
+def main_imports(entries: list) -> tuple:
+    """Separa os imports diretos de `main` (profundidade 1) e o tempo cumulativo de `main`."""
+    children = {}
+    pending = {}
+    main_ms = 0.0
+    # -X importtime lista os filhos antes do pai; os filhos diretos de main são as
+    # entradas de profundidade 1 que aparecem antes da linha de main (profundidade 0).
+    for name, depth, _, cumulative_us in entries:
+        if depth == 1:
+            pending[name] = cumulative_us / 1000
+        elif depth == 0:
+            if name == "main":
+                children, main_ms = pending, cumulative_us / 1000
+            pending = {}
+    return children, main_ms
+
+def measure(runs: int) -> tuple:
+    """Retorna ({import_direto_de_main: melhor_ms}, melhor_total_ms, modulos_importados)."""
+    env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as home:
+        if not (ROOT_DIR / ".streamlit" / "secrets.toml").exists():
+            (Path(home) / ".streamlit").mkdir()
+            (Path(home) / ".streamlit" / "secrets.toml").write_text(DUMMY_SECRETS, encoding="utf-8")
+            env["HOME"] = env["USERPROFILE"] = home
+        best = {}
+        best_total = float("inf")
+        imported = set()
+        for _ in range(runs):
+            entries = run_once(env)
+            imported.update(name for name, *_ in entries)
+            children, main_ms = main_imports(entries)
+            best_total = min(best_total, main_ms)
+            for name, ms in children.items():
+                best[name] = min(best.get(name, float("inf")), ms)
+    return best, best_total, imported
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Orçamento de tempo de inicialização do Radar Pro.")
+    parser.add_argument("--runs", type=int, default=3, help="Execuções; vale o menor tempo de cada módulo.")
+    parser.add_argument("--top", type=int, default=10, help="Quantos módulos mais lentos exibir.")
+    parser.add_argument("--budget", type=Path, default=BUDGET_PATH)
+    args = parser.parse_args(argv)
+
+    budget = json.loads(args.budget.read_text(encoding="utf-8"))
+    per_module, total_ms, imported = measure(args.runs)
+
+    print(f"Tempo total de 'import main': {total_ms:.0f} ms (orçamento: {budget['total_ms']} ms)\n")
+    for name, ms in sorted(per_module.items(), key=lambda item: -item[1])[:args.top]:
+        limit = budget["modules_ms"].get(name)
+        print(f"  {name:<30} {ms:>8.1f} ms" + (f"  (orçamento: {limit} ms)" if limit is not None else ""))
+
+    failures = []
+    if total_ms > budget["total_ms"]:
+        failures.append(f"total {total_ms:.0f} ms > {budget['total_ms']} ms")
+    for name, limit in budget["modules_ms"].items():
+        if per_module.get(name, 0) > limit:
+            failures.append(f"{name}: {per_module[name]:.0f} ms > {limit} ms")
+    for name in budget["forbidden"]:
+        if any(module == name or module.startswith(name + ".") for module in imported):
+            failures.append(f"{name} é importado na inicialização (deveria ser sob demanda)")
+
+    if failures:
+        print("\nOrçamento de inicialização excedido:")
+        for failure in failures: print(f"  - {failure}")
+        return 1
+    print("\nDentro do orçamento.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
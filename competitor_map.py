@@ -0,0 +1,49 @@
+# competitor_map.py
+#
+# Mapa interativo da aba "Mapa". O HTML do folium é gerado uma única vez por
+# snapshot + conjunto de concorrentes e reaproveitado entre reruns; acima de
+# CLUSTER_THRESHOLD marcadores eles são agrupados com MarkerCluster para
+# manter o mapa leve.
+
+import hashlib
+import html
+
+import streamlit as st
+
+# A coleta guarda até 10 concorrentes (api_calls._stage_collect); mapas quase cheios já são agrupados
+CLUSTER_THRESHOLD = 8
+MAP_HEIGHT = 500
+DEFAULT_ZOOM = 14
+
+def competitors_with_coords(competidores) -> list:
+    return [c for c in competidores or [] if c.get('latitude') and c.get('longitude')]
+
+def numbered_competitors(competidores) -> list:
+    """[(número, concorrente)] com coordenadas; o número é a posição na lista completa, como no PDF."""
+    return [(i, c) for i, c in enumerate(competidores or [], start=1) if c.get('latitude') and c.get('longitude')]
+
+def competitors_hash(competidores) -> str:
+    """Hash estável dos dados que aparecem no mapa (número, nome e coordenadas)."""
+    raw = "\n".join(f"{i}|{c.get('name') or ''}|{c['latitude']}|{c['longitude']}" for i, c in numbered_competitors(competidores))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_map_html(snapshot_id, competitors_key: str, _competidores) -> str:
+    """HTML completo do mapa. A chave do cache é (snapshot_id, competitors_key); a lista não é hasheada."""
+    import folium
+    from folium.plugins import MarkerCluster
+
+    pontos = numbered_competitors(_competidores)
+    avg_lat = sum(c['latitude'] for _, c in pontos) / len(pontos)
+    avg_lon = sum(c['longitude'] for _, c in pontos) / len(pontos)
+    mapa = folium.Map(location=[avg_lat, avg_lon], zoom_start=DEFAULT_ZOOM)
+    destino = MarkerCluster().add_to(mapa) if len(pontos) > CLUSTER_THRESHOLD else mapa
+    for numero, comp in pontos:
+        nome = f"{numero}. {html.escape(comp.get('name') or '')}"
+        folium.Marker(location=[comp['latitude'], comp['longitude']], popup=f"<b>{nome}</b>", tooltip=nome, icon=folium.Icon(color='red', icon='info-sign')).add_to(destino)
+    return mapa.get_root().render()
+
+def render_interactive_map(snapshot_id, competidores, height: int = MAP_HEIGHT):
+    """Exibe o mapa cacheado como HTML estático, sem a ida e volta de estado do st_folium."""
+    import streamlit.components.v1 as components
+    components.html(build_map_html(snapshot_id, competitors_hash(competidores), competidores), height=height)
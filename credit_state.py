@@ -0,0 +1,64 @@
+# credit_state.py
+#
+# Estado de créditos (análises diárias) da sessão. É carregado uma vez no
+# login e guardado em st.session_state; a barra lateral e o dashboard leem
+# daqui sem ir ao Supabase. O servidor só é consultado quando um crédito é
+# consumido (a escrita devolve o valor oficial), quando o estado envelhece ou
+# quando um admin altera o limite diário (db_utils.platform_setting_version).
+
+import time
+from datetime import date
+
+import streamlit as st
+
+import db_utils
+
+SESSION_KEY = "credit_state"
+REFRESH_SECONDS = 300
+
+def init_credit_state(user_id: str, profile: dict, limit: int) -> dict:
+    """Monta o estado a partir de um perfil já carregado (ex.: o do session_bootstrap no login)."""
+    state = {
+        'user_id': user_id,
+        'limit': int(limit),
+        'count': db_utils.daily_analysis_count(profile) if profile else int(limit),
+        'day': date.today(),
+        'loaded_at': time.time(),
+        'limit_version': db_utils.platform_setting_version('daily_analysis_limit'),
+    }
+    st.session_state[SESSION_KEY] = state
+    return state
+
+def load_credit_state(user_id: str, force: bool = False) -> dict:
+    """Lê o estado no servidor e o guarda na sessão. `force` ignora o cache do perfil."""
+    if force:
+        db_utils.get_user_profile.clear(user_id)
+    return init_credit_state(user_id, db_utils.get_user_profile(user_id), db_utils.get_platform_setting('daily_analysis_limit'))
+
+def get_credit_state(user_id: str) -> dict:
+    """Estado da sessão, recarregado só se ausente, de outro usuário, com limite alterado ou mais velho que REFRESH_SECONDS."""
+    state = st.session_state.get(SESSION_KEY)
+    if (not state or state['user_id'] != user_id or time.time() - state['loaded_at'] > REFRESH_SECONDS
+            or state.get('limit_version') != db_utils.platform_setting_version('daily_analysis_limit')):
+        return load_credit_state(user_id, force=bool(state))
+    if state['day'] != date.today():
+        # Virada do dia: o contador do servidor é zerado na próxima escrita.
+        state.update(count=0, day=date.today())
+    return state
+
+def consume_credit(user_id: str) -> bool:
+    """Consome um crédito no servidor e reconcilia o estado local com o valor devolvido pela escrita."""
+    result = db_utils.consume_daily_analysis(user_id)
+    if result is None:
+        # Recusado (limite atingido ou erro): o estado local estava otimista, recarrega do servidor.
+        load_credit_state(user_id, force=True)
+        return False
+    state = get_credit_state(user_id)
+    state.update(count=result['count'], limit=result['limit'], day=date.today())
+    return True
+
+def remaining(state: dict) -> int:
+    return max(state['limit'] - state['count'], 0)
+
+def limit_reached(state: dict) -> bool:
+    return state['count'] >= state['limit']
@@ -3,9 +3,11 @@
 import streamlit as st
 from supabase import create_client, Client
 from supabase_client import supabase_client
-from datetime import datetime, date
+from datetime import datetime, date, timedelta, timezone
 import json
-import pandas as pd
+import hashlib
+import re
+import unicodedata
 
 # --- Funções de Usuário Padrão ---
 
@@ -28,6 +30,31 @@ def get_user_markets(user_id: str):
         st.error(f"Erro ao buscar mercados: {e}")
         return []
 
+MARKETS_PAGE_SIZE = 20
+MARKET_SORTS = {'ultima_analise': "Última análise", 'criacao': "Data de criação"}
+
+@st.cache_data(ttl=60)
+def list_user_markets(user_id: str, search: str = "", sort: str = 'ultima_analise', cursor: tuple | None = None, page_size: int = MARKETS_PAGE_SIZE):
+    """Retorna uma página de mercados do usuário e o cursor da próxima (None na última página).
+
+    A paginação é por cursor (keyset) no servidor: cada página continua a partir da
+    chave de ordenação da última linha da anterior, sem OFFSET.
+    """
+    try:
+        after_ts, after_id = cursor if cursor else (None, None)
+        response = supabase_client.rpc('list_user_markets', {
+            'p_user_id': user_id, 'p_search': search or None, 'p_sort': sort,
+            'p_after_ts': after_ts, 'p_after_id': after_id, 'p_limit': page_size + 1,
+        }).execute()
+        rows = response.data or []
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]['sort_ts'], rows[-1]['id']) if has_more else None
+        return rows, next_cursor
+    except Exception as e:
+        st.error(f"Erro ao buscar mercados: {e}")
+        return [], None
+
 def find_market_by_term_and_location(user_id: str, termo: str, localizacao: str):
     """Encontra um mercado específico para evitar duplicatas."""
     try:
@@ -43,38 +70,255 @@ def add_market(user_id: str, termo: str, localizacao: str, tipo_negocio: str):
         if existing_market_id:
             return existing_market_id
         response = supabase_client.table('mercados_monitorados').insert({'user_id': user_id, 'termo': termo, 'localizacao': localizacao, 'tipo_negocio': tipo_negocio}).execute()
-        st.cache_data.clear()
+        get_user_markets.clear(user_id); list_user_markets.clear()
         return response.data[0]['id']
     except Exception as e:
         raise e
 
-def add_snapshot(market_id: int, user_id: str, dados_json: str) -> int | None:
+def add_snapshot(market_id: int, user_id: str, dados_json: str, shared_data_id: int | None = None) -> int | None:
     """Adiciona um novo snapshot e retorna o ID do novo registro."""
     try:
-        response = supabase_client.table('snapshots_dados').insert({'mercado_id': market_id, 'user_id': user_id, 'dados_json': json.loads(dados_json)}).execute()
-        st.cache_data.clear()
+        registro = {'mercado_id': market_id, 'user_id': user_id, 'dados_json': json.loads(dados_json)}
+        if shared_data_id: registro['shared_data_id'] = shared_data_id
+        response = supabase_client.table('snapshots_dados').insert(registro).execute()
+        # Limpa só o que depende do novo snapshot (a data da última análise aparece na lista paginada).
+        get_latest_snapshot.clear(market_id, user_id); list_user_markets.clear()
         return response.data[0]['id']
     except Exception as e:
         st.error(f"Erro ao salvar snapshot: {e}")
         return None
 
 @st.cache_data(ttl=300)
-def get_latest_snapshot(market_id: int):
-    """Pega o snapshot mais recente de um mercado."""
+def get_latest_snapshot(market_id: int, user_id: str):
+    """Pega o snapshot mais recente de um mercado do usuário."""
     try:
-        response = supabase_client.table('snapshots_dados').select('*').eq('mercado_id', market_id).order('data_snapshot', desc=True).limit(1).single().execute()
+        # Sem RLS nesta tabela (cliente único por processo): o dono é filtrado aqui
+        response = supabase_client.table('snapshots_dados').select('*').eq('mercado_id', market_id).eq('user_id', user_id).order('data_snapshot', desc=True).limit(1).single().execute()
         return response.data
     except Exception:
         return None
 
-def get_latest_snapshot_date(market_id: int):
+def get_latest_snapshot_date(market_id: int, user_id: str):
     """Pega a data do snapshot mais recente, reutilizando a função cacheada."""
     try:
-        snapshot = get_latest_snapshot(market_id)
+        snapshot = get_latest_snapshot(market_id, user_id)
         return datetime.fromisoformat(snapshot['data_snapshot'].replace('Z', '+00:00')) if snapshot else None
     except Exception:
         return None
 
+# --- Reanálise Automática ---
+
+AUTO_REANALYSIS_OPTIONS = {None: "Desligada", 1: "Diária", 7: "Semanal", 14: "Quinzenal", 30: "Mensal"}
+
+def auto_reanalysis_label(cadence_days: int | None) -> str:
+    """Rótulo da cadência; valores fora de AUTO_REANALYSIS_OPTIONS (gravados direto no banco) aparecem como estão."""
+    return AUTO_REANALYSIS_OPTIONS.get(cadence_days) or f"A cada {cadence_days} dias"
+
+def auto_analysis_slot(market_id: int, day: datetime) -> datetime:
+    """Horário fixo do mercado dentro do dia `day` (UTC), derivado do id para espalhar a carga ao longo do dia."""
+    offset = int(hashlib.sha256(str(market_id).encode("utf-8")).hexdigest(), 16) % 86400
+    return day.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(seconds=offset)
+
+def next_auto_analysis_at(market_id: int, cadence_days: int, after: datetime | None = None, first: bool = False) -> datetime:
+    """Próxima execução: `cadence_days` depois de `after`; na primeira, o próximo horário do mercado a partir de agora."""
+    after = after or datetime.now(timezone.utc)
+    if first:
+        slot = auto_analysis_slot(market_id, after)
+        return slot if slot > after else slot + timedelta(days=1)
+    return auto_analysis_slot(market_id, after + timedelta(days=cadence_days))
+
+def set_market_auto_reanalysis(market_id: int, user_id: str, cadence_days: int | None) -> bool:
+    """Liga (cadência em dias) ou desliga (None) a reanálise automática de um mercado."""
+    try:
+        data = {'auto_reanalysis_days': cadence_days, 'next_auto_analysis_at': next_auto_analysis_at(market_id, cadence_days, first=True).isoformat() if cadence_days else None}
+        supabase_client.table('mercados_monitorados').update(data).eq('id', market_id).eq('user_id', user_id).execute()
+        get_user_markets.clear(user_id); list_user_markets.clear()
+        return True
+    except Exception as e:
+        st.error(f"Erro ao salvar a reanálise automática: {e}"); return False
+
+def list_due_markets(limit: int = 20) -> list:
+    """Mercados com reanálise vencida, de usuários ativos (RPC list_due_markets)."""
+    try:
+        return supabase_client.rpc('list_due_markets', {'p_limit': limit}).execute().data or []
+    except Exception as e:
+        print(f"Erro ao buscar mercados para reanálise automática: {e}"); return []
+
+def reschedule_auto_analysis(market: dict) -> bool:
+    """Avança o próximo horário do mercado. Feito antes de rodar, serve de reserva contra outro worker."""
+    try:
+        proximo = next_auto_analysis_at(market['id'], market['auto_reanalysis_days'])
+        response = supabase_client.table('mercados_monitorados').update({'next_auto_analysis_at': proximo.isoformat()}) \
+            .eq('id', market['id']).eq('next_auto_analysis_at', market['next_auto_analysis_at']).execute()
+        return bool(response.data)
+    except Exception as e:
+        print(f"Erro ao reagendar o mercado {market.get('id')}: {e}"); return False
+
+# --- Execuções do Pipeline de Análise (checkpoints) ---
+
+# Execuções "running" sem atualização há mais que isso são consideradas interrompidas
+STALE_RUN_MINUTES = 15
+# Checkpoints mais velhos que isso não são retomados (os dados coletados já envelheceram)
+RESUME_WINDOW_HOURS = 24
+
+def start_analysis_run(user_id: str, market_id: int, checkpoint: dict) -> int | None:
+    """Registra uma nova execução do pipeline e retorna seu ID (None se a tabela não estiver disponível)."""
+    try:
+        response = supabase_client.table('analysis_runs').insert({'user_id': user_id, 'market_id': market_id, 'checkpoint': checkpoint}).execute()
+        return response.data[0]['id']
+    except Exception as e:
+        print(f"Erro ao registrar execução da análise (seguindo sem checkpoints): {e}"); return None
+
+def analysis_inputs(termo: str, localizacao: str, tipo_negocio: str | None) -> dict:
+    """Entradas da análise, como ficam gravadas no checkpoint."""
+    return {"termo_busca": termo, "localizacao_busca": localizacao, "tipo_negocio": tipo_negocio}
+
+def get_resumable_run(user_id: str, market_id: int, inputs: dict) -> dict | None:
+    """Execução recente do mercado, com as mesmas entradas, que falhou ou foi interrompida antes de terminar.
+
+    É a mesma regra que decide se run_full_analysis retoma e se o disparo deixa de consumir crédito.
+    """
+    try:
+        now = datetime.now(timezone.utc)
+        # Sem frações de segundo: o valor vai dentro do filtro or_ do PostgREST, que usa '.' como separador
+        stale_before = (now - timedelta(minutes=STALE_RUN_MINUTES)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        response = supabase_client.table('analysis_runs').select('id, stage, checkpoint, status').eq('user_id', user_id).eq('market_id', market_id).neq('status', 'completed') \
+            .gte('created_at', (now - timedelta(hours=RESUME_WINDOW_HOURS)).isoformat()) \
+            .or_(f"status.eq.failed,updated_at.lt.{stale_before}") \
+            .order('created_at', desc=True).limit(1).execute()
+        run = response.data[0] if response.data else None
+        return run if run and all((run.get('checkpoint') or {}).get(k) == v for k, v in inputs.items()) else None
+    except Exception as e:
+        print(f"Erro ao buscar execução retomável: {e}"); return None
+
+def save_analysis_checkpoint(run_id: int | None, stage: str, checkpoint: dict, status: str = 'running'):
+    """Grava a última etapa concluída e as saídas acumuladas até ela."""
+    if run_id is None: return
+    try:
+        supabase_client.table('analysis_runs').update({'stage': stage, 'checkpoint': checkpoint, 'status': status, 'error': None, 'updated_at': datetime.now(timezone.utc).isoformat()}).eq('id', run_id).execute()
+    except Exception as e:
+        print(f"Erro ao salvar checkpoint da etapa '{stage}': {e}")
+
+def finish_analysis_run(run_id: int | None, status: str, error: str | None = None, snapshot_id: int | None = None):
+    if run_id is None: return
+    try:
+        data = {'status': status, 'error': error, 'updated_at': datetime.now(timezone.utc).isoformat()}
+        if snapshot_id: data['snapshot_id'] = snapshot_id
+        supabase_client.table('analysis_runs').update(data).eq('id', run_id).execute()
+    except Exception as e:
+        print(f"Erro ao finalizar execução da análise: {e}")
+
+# --- Idempotência dos Disparos de Análise ---
+
+# Cliques repetidos na mesma busca dentro desta janela são o mesmo envio
+SUBMISSION_WINDOW_MINUTES = 10
+
+def analysis_idempotency_key(user_id: str, termo: str, localizacao: str, tipo_negocio: str | None, now: datetime | None = None) -> str:
+    """Chave do envio: usuário + campos normalizados do formulário + janela de SUBMISSION_WINDOW_MINUTES."""
+    now = now or datetime.now(timezone.utc)
+    janela = int(now.timestamp() // (SUBMISSION_WINDOW_MINUTES * 60))
+    campos = [user_id, *(" ".join((valor or "").lower().split()) for valor in (termo, localizacao, tipo_negocio)), str(janela)]
+    return hashlib.sha256("|".join(campos).encode("utf-8")).hexdigest()
+
+def claim_analysis_submission(idempotency_key: str, user_id: str, previous_key: str | None = None) -> dict:
+    """Reserva a chave no servidor. {'claimed': True} para quem deve executar; senão o status do envio existente."""
+    try:
+        return supabase_client.rpc('claim_analysis_submission', {'p_key': idempotency_key, 'p_user_id': user_id, 'p_previous_key': previous_key, 'p_window_minutes': SUBMISSION_WINDOW_MINUTES}).execute().data
+    except Exception as e:
+        # Sem a tabela de deduplicação a análise segue normalmente, como antes
+        print(f"Erro ao reservar envio da análise (seguindo sem deduplicação): {e}"); return {'claimed': True}
+
+def finish_analysis_submission(idempotency_key: str, status: str, market_id: int | None = None, snapshot_id: int | None = None):
+    try:
+        data = {'status': status, 'updated_at': datetime.now(timezone.utc).isoformat()}
+        if market_id: data['market_id'] = market_id
+        if snapshot_id: data['snapshot_id'] = snapshot_id
+        supabase_client.table('analysis_submissions').update(data).eq('idempotency_key', idempotency_key).execute()
+    except Exception as e:
+        print(f"Erro ao finalizar envio da análise: {e}")
+
+# --- Dados de Mercado Compartilhados (entre usuários) ---
+
+SHARED_PLACES_FRESH_HOURS = 24
+SHARED_GEOCODE_FRESH_DAYS = 90
+
+def normalize_market_text(texto: str | None) -> str:
+    """Minúsculas, sem acentos, sem pontuação e com espaços simples: 'Copacabana, RJ' == 'copacabana rj'."""
+    sem_acento = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode('ascii')
+    return " ".join(re.sub(r"[^\w\s]", " ", sem_acento.lower()).split())
+
+def _fresh_since(**delta) -> str:
+    return (datetime.now(timezone.utc) - timedelta(**delta)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def get_shared_places(termo: str, localizacao: str) -> dict | None:
+    """Resultado do Places ainda válido para a mesma busca, de qualquer usuário: {'id', 'competidores'}."""
+    try:
+        response = supabase_client.table('market_data_shared').select('id, competidores') \
+            .eq('termo_norm', normalize_market_text(termo)).eq('localizacao_norm', normalize_market_text(localizacao)) \
+            .gte('places_fetched_at', _fresh_since(hours=SHARED_PLACES_FRESH_HOURS)).limit(1).execute()
+        return response.data[0] if response.data else None
+    except Exception as e:
+        print(f"Erro ao buscar dados compartilhados do mercado: {e}"); return None
+
+def get_shared_geocode(localizacao: str) -> dict | None:
+    """Geocode ainda válido da mesma localização, mesmo que de outro termo: {location_geocode, location_state}."""
+    try:
+        response = supabase_client.table('market_data_shared').select('geocode') \
+            .eq('localizacao_norm', normalize_market_text(localizacao)).gte('geocode_fetched_at', _fresh_since(days=SHARED_GEOCODE_FRESH_DAYS)) \
+            .order('geocode_fetched_at', desc=True).limit(1).execute()
+        return response.data[0]['geocode'] if response.data else None
+    except Exception as e:
+        print(f"Erro ao buscar geocode compartilhado: {e}"); return None
+
+def save_shared_market_data(termo: str, localizacao: str, competidores: list | None = None, geocode: dict | None = None) -> int | None:
+    """Grava os dados brutos informados na linha da busca (termo, localização) e retorna o id dela.
+
+    A escrita passa pela RPC save_market_data_shared (a tabela não aceita escrita
+    direta dos clientes), que só substitui dados ausentes ou vencidos. Se a linha
+    manteve os dados que já tinha, retorna None: ela não guarda o que foi enviado.
+    """
+    try:
+        response = supabase_client.rpc('save_market_data_shared', {
+            'p_termo_norm': normalize_market_text(termo), 'p_localizacao_norm': normalize_market_text(localizacao),
+            'p_competidores': competidores, 'p_geocode': geocode,
+        }).execute()
+        gravado = response.data or {}
+        if (competidores is not None and not gravado.get('places_stored')) or (geocode is not None and not gravado.get('geocode_stored')):
+            return None
+        return gravado.get('id')
+    except Exception as e:
+        print(f"Erro ao salvar dados compartilhados do mercado: {e}"); return None
+
+# --- Dossiês de Concorrentes (cache por place_id) ---
+
+DOSSIER_FRESH_DAYS = 30
+DOSSIER_FIELDS = ('nome', 'posicionamento_mercado', 'pontos_fortes', 'pontos_fracos')
+
+def get_competitor_dossiers(place_ids: list, max_age_days: int = DOSSIER_FRESH_DAYS) -> dict:
+    """Dossiês ainda dentro da validade, como {place_id: dossiê}."""
+    if not place_ids: return {}
+    try:
+        limite = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        response = supabase_client.table('competitor_dossiers').select('place_id, dossie').in_('place_id', place_ids).gte('generated_at', limite).execute()
+        return {row['place_id']: row['dossie'] for row in response.data or []}
+    except Exception as e:
+        # Sem o cache, o prompt volta a pedir todos os dossiês
+        print(f"Erro ao buscar dossiês de concorrentes: {e}"); return {}
+
+def save_competitor_dossiers(dossies: dict):
+    """Grava os dossiês recém-gerados, {place_id: dossiê}, pela RPC save_competitor_dossiers.
+
+    A tabela é compartilhada e só aceita escrita pela RPC, que recusa chaves fora de
+    DOSSIER_FIELDS e não sobrescreve dossiês ainda válidos.
+    """
+    validos = {place_id: {k: dossie[k] for k in DOSSIER_FIELDS if k in dossie}
+               for place_id, dossie in dossies.items() if place_id and isinstance(dossie.get('nome'), str)}
+    if not validos: return
+    try:
+        supabase_client.rpc('save_competitor_dossiers', {'p_dossies': validos}).execute()
+    except Exception as e:
+        print(f"Erro ao salvar dossiês de concorrentes: {e}")
+
 # --- Novas Funções para Análise Temporal (KPIs) ---
 
 def add_kpi_entry(snapshot_id: int, market_id: int, user_id: str, analysis_data: dict):
@@ -96,16 +340,18 @@ def add_kpi_entry(snapshot_id: int, market_id: int, user_id: str, analysis_data:
             'executive_summary': analysis_data.get('sumario_executivo', '')
         }
         supabase_client.table('kpi_history').insert(kpi_data).execute()
+        get_kpi_history.clear(market_id, user_id)
         return True
     except Exception as e:
         st.error(f"Erro ao salvar histórico de KPI: {e}")
         return False
 
 @st.cache_data(ttl=300)
-def get_kpi_history(market_id: int) -> pd.DataFrame:
-    """Busca o histórico de KPIs para um mercado e retorna como um DataFrame Pandas."""
+def get_kpi_history(market_id: int, user_id: str) -> "pd.DataFrame":
+    """Busca o histórico de KPIs de um mercado do usuário e retorna como um DataFrame Pandas."""
+    import pandas as pd
     try:
-        response = supabase_client.table('kpi_history').select('*').eq('market_id', market_id).order('analysis_date', desc=False).execute()
+        response = supabase_client.table('kpi_history').select('*').eq('market_id', market_id).eq('user_id', user_id).order('analysis_date', desc=False).execute()
         if response.data:
             df = pd.DataFrame(response.data)
             df['analysis_date'] = pd.to_datetime(df['analysis_date'])
@@ -118,6 +364,15 @@ def get_kpi_history(market_id: int) -> pd.DataFrame:
 
 # --- Funções de Limite Diário e Configurações ---
 
+@st.cache_resource
+def _settings_versions() -> dict:
+    """Versão de cada configuração neste processo do servidor, incrementada quando o admin a altera."""
+    return {}
+
+def platform_setting_version(setting_name: str) -> int:
+    """Estados guardados na sessão (ex.: credit_state) comparam esta versão para recarregar na hora."""
+    return _settings_versions().get(setting_name, 0)
+
 @st.cache_data(ttl=300)
 def get_platform_setting(setting_name: str) -> str:
     """Busca o valor de uma configuração global da plataforma."""
@@ -127,12 +382,12 @@ def get_platform_setting(setting_name: str) -> str:
     except Exception:
         return '10' if setting_name == 'daily_analysis_limit' else None
 
-def check_and_update_daily_limit(user_id: str) -> bool:
-    """Verifica se o usuário pode realizar uma análise e atualiza o contador usando o limite global."""
+def consume_daily_analysis(user_id: str) -> dict | None:
+    """Consome uma análise do dia no servidor. Retorna {'count', 'limit'} após a escrita, ou None se o limite foi atingido."""
     try:
         limit = int(get_platform_setting('daily_analysis_limit'))
         profile = supabase_client.table('profiles').select('daily_analysis_count, last_analysis_date').eq('id', user_id).single().execute().data
-        if not profile: return False
+        if not profile: return None
 
         today = date.today()
         count = profile.get('daily_analysis_count', 0)
@@ -140,15 +395,24 @@ def check_and_update_daily_limit(user_id: str) -> bool:
 
         if last_analysis_date_obj != today:
             supabase_client.table('profiles').update({'daily_analysis_count': 1, 'last_analysis_date': today.isoformat()}).eq('id', user_id).execute()
-            st.cache_data.clear(); return True
+            get_user_profile.clear(user_id); return {'count': 1, 'limit': limit}
         
         if count < limit:
             supabase_client.table('profiles').update({'daily_analysis_count': count + 1}).eq('id', user_id).execute()
-            st.cache_data.clear(); return True
+            get_user_profile.clear(user_id); return {'count': count + 1, 'limit': limit}
         else:
-            return False
+            return None
     except Exception as e:
-        st.error(f"Erro ao verificar limite diário: {e}"); return False
+        st.error(f"Erro ao verificar limite diário: {e}"); return None
+
+def check_and_update_daily_limit(user_id: str) -> bool:
+    """Verifica se o usuário pode realizar uma análise e atualiza o contador usando o limite global."""
+    return consume_daily_analysis(user_id) is not None
+
+def daily_analysis_count(profile: dict) -> int:
+    """Análises já feitas hoje segundo o perfil (o contador do servidor só é zerado na próxima escrita)."""
+    last_analysis_date_obj = datetime.strptime(profile.get('last_analysis_date'), '%Y-%m-%d').date() if profile.get('last_analysis_date') else None
+    return profile.get('daily_analysis_count', 0) if last_analysis_date_obj == date.today() else 0
 
 def get_user_analysis_info(user_id: str) -> dict:
     """Apenas LÊ as informações de limite do usuário."""
@@ -157,17 +421,19 @@ def get_user_analysis_info(user_id: str) -> dict:
         profile = get_user_profile(user_id)
         if not profile: return {'count': limit, 'limit_reached': True}
 
-        today = date.today()
-        count = profile.get('daily_analysis_count', 0)
-        last_analysis_date_obj = datetime.strptime(profile.get('last_analysis_date'), '%Y-%m-%d').date() if profile.get('last_analysis_date') else None
-
-        if last_analysis_date_obj != today:
-            return {'count': 0, 'limit_reached': 0 >= limit}
-        
+        count = daily_analysis_count(profile)
         return {'count': count, 'limit_reached': count >= limit}
     except Exception:
         return {'count': 10, 'limit_reached': True}
 
+def get_session_bootstrap() -> dict | None:
+    """Perfil, conta ativa, admin e configurações do usuário autenticado em uma única chamada (RPC session_bootstrap)."""
+    try:
+        return supabase_client.rpc('session_bootstrap', {}).execute().data
+    except Exception as e:
+        print(f"RPC session_bootstrap indisponível, usando consultas separadas: {e}")
+        return None
+
 # --- Funções de Administrador ---
 
 def _create_admin_client() -> Client | None:
@@ -205,7 +471,9 @@ def update_platform_setting_admin(setting_name: str, new_value: str):
     if not admin_client: st.error("Falha na autenticação de administrador."); return False
     try:
         admin_client.table('platform_settings').update({'setting_value': new_value}).eq('setting_name', setting_name).execute()
-        st.cache_data.clear(); return True
+        get_platform_setting.clear(setting_name)
+        versions = _settings_versions(); versions[setting_name] = versions.get(setting_name, 0) + 1
+        return True
     except Exception as e:
         st.error(f"Erro ao atualizar a configuração: {e}"); return False
 
@@ -223,6 +491,6 @@ def update_user_profile_admin(user_id: str, data: dict):
     if not admin_client: return False
     try:
         admin_client.table("profiles").update(data).eq("id", user_id).execute()
-        st.cache_data.clear(); return True
+        get_user_profile.clear(user_id); return True
     except Exception as e:
         st.error(f"Erro ao atualizar perfil: {e}"); return False
\ No newline at end of file
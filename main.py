@@ -1,19 +1,20 @@
 # Conteúdo completo para o arquivo: main.py
 
 import streamlit as st
-import pandas as pd
 import json
-from datetime import datetime
+import os
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
 import time
-import folium
-from streamlit_folium import st_folium
 
 # Módulos do projeto
+# api_calls, report_*, competitor_map (folium) puxam dependências pesadas (openai, pytrends,
+# xhtml2pdf, matplotlib...) e são importados sob demanda, só nas funções que os usam.
 import auth_utils
+import credit_state
 import db_utils
-import api_calls
-import report_generator
 import admin_page
+import prefetch
 
 # --- Carregamento do CSS ---
 @st.cache_data
@@ -25,18 +26,46 @@ def load_css(file_name):
         st.warning(f"Arquivo de estilo '{file_name}' não encontrado.")
 
 # --- Funções de Processamento ---
-def run_analysis_with_progress(termo: str, localizacao: str, user_id: str, market_id: int, maps_api_key: str, tipo_negocio: str):
+def run_analysis_with_progress(termo: str, localizacao: str, user_id: str, market_id: int, maps_api_key: str, tipo_negocio: str, idempotency_key: str | None = None, force_refresh: bool = False):
+    import api_calls
     progress_bar = st.progress(0, text="Iniciando análise...")
     try:
-        api_calls.run_full_analysis(termo, localizacao, user_id, market_id, progress_bar, maps_api_key, tipo_negocio)
+        snapshot_id = api_calls.run_full_analysis(termo, localizacao, user_id, market_id, progress_bar, maps_api_key, tipo_negocio, force_refresh)
+        if idempotency_key: db_utils.finish_analysis_submission(idempotency_key, 'completed', market_id, snapshot_id)
         st.toast("Análise concluída com sucesso!", icon="✅")
         time.sleep(2)
         st.rerun()
     except Exception as e:
+        if idempotency_key: db_utils.finish_analysis_submission(idempotency_key, 'failed', market_id)
         st.error(f"Ocorreu um erro crítico durante a análise: {e}")
+        st.info("As etapas já concluídas foram salvas. Tente novamente para retomar a partir delas, sem consumir outra análise diária.")
     finally:
         progress_bar.empty()
 
+def claim_analysis(user_id: str, market_id: int | None, termo: str, localizacao: str, tipo_negocio: str | None) -> str | None:
+    """
+    Libera um disparo de análise e retorna sua chave de idempotência, ou None se ele não deve rodar.
+    Repetições do mesmo formulário dentro da janela (clique duplo, rerun, outra aba) não rodam de novo;
+    retomar uma execução que falhou é gratuito; começar uma nova consome um crédito.
+    """
+    agora = datetime.now(timezone.utc)
+    key = db_utils.analysis_idempotency_key(user_id, termo, localizacao, tipo_negocio, agora)
+    previous_key = db_utils.analysis_idempotency_key(user_id, termo, localizacao, tipo_negocio, agora - timedelta(minutes=db_utils.SUBMISSION_WINDOW_MINUTES))
+    claim = db_utils.claim_analysis_submission(key, user_id, previous_key)
+    if not claim.get('claimed'):
+        if claim.get('status') == 'completed': st.info("Esta análise acabou de ser concluída. Abra os detalhes do mercado para ver o resultado.")
+        else: st.info("Esta análise já está em andamento (clique repetido ou outra aba). Aguarde a conclusão.")
+        return None
+    # Só é gratuito se run_full_analysis de fato for retomar (mesma busca); outra busca no mesmo mercado consome crédito
+    if market_id is not None and db_utils.get_resumable_run(user_id, market_id, db_utils.analysis_inputs(termo, localizacao, tipo_negocio)):
+        st.toast("Retomando a análise anterior a partir da última etapa concluída.", icon="🔁")
+        return key
+    if credit_state.consume_credit(user_id):
+        return key
+    db_utils.finish_analysis_submission(key, 'failed')
+    st.error("Você já atingiu seu limite diário de análises.")
+    return None
+
 # --- Views (Páginas) da Aplicação ---
 def login_page():
     with st.container():
@@ -55,7 +84,7 @@ def login_page():
                         if st.form_submit_button("Entrar", use_container_width=True, type="primary"):
                             with st.spinner('Verificando...'):
                                 user, error = auth_utils.login_user(email, password)
-                                if user: st.session_state.page = 'dashboard'; st.rerun()
+                                if user: prefetch.warm_dashboard_cache(user['id']); st.session_state.page = 'dashboard'; st.rerun()
                                 else: st.error(f"Erro no login: {error}")
                 with signup_tab:
                     with st.form("signup_form"):
@@ -81,46 +110,115 @@ def dashboard_page():
             if st.form_submit_button("Analisar Mercado", use_container_width=True, type="primary"):
                 if termo and localizacao:
                     user_id = st.session_state.user['id']
-                    if db_utils.check_and_update_daily_limit(user_id):
+                    idempotency_key = claim_analysis(user_id, db_utils.find_market_by_term_and_location(user_id, termo, localizacao), termo, localizacao, tipo_negocio_selecionado)
+                    if idempotency_key:
                         with st.spinner("Iniciando análise completa..."):
                             market_id = db_utils.add_market(user_id, termo, localizacao, tipo_negocio_selecionado)
-                            run_analysis_with_progress(termo, localizacao, user_id, market_id, maps_api_key, tipo_negocio_selecionado)
+                            run_analysis_with_progress(termo, localizacao, user_id, market_id, maps_api_key, tipo_negocio_selecionado, idempotency_key)
                     else:
-                        st.error("Você já atingiu seu limite diário de análises."); time.sleep(3)
+                        time.sleep(3)
                 else:
                     st.warning("Preencha o termo e a localização.")
     st.divider()
     st.subheader("Meus Mercados Monitorados")
-    user_markets = db_utils.get_user_markets(st.session_state.user['id'])
-    if not user_markets:
+    # A checagem de lista vazia usa a primeira página paginada (a mesma, em cache, que a lista exibe)
+    first_page, _ = db_utils.list_user_markets(st.session_state.user['id'])
+    if not first_page:
         st.info("Você ainda não adicionou nenhum mercado.")
     else:
-        analysis_info = db_utils.get_user_analysis_info(st.session_state.user['id'])
-        limit_reached = analysis_info['limit_reached']
-        for market in user_markets:
-            with st.container(border=True):
-                cols = st.columns([4, 2, 2, 2])
-                with cols[0]:
-                    st.markdown(f"#### {market.get('termo', 'N/A')}")
-                    st.caption(f"Em: {market.get('localizacao', 'N/A')} | Tipo: {market.get('tipo_negocio', 'N/A')}")
-                with cols[1]:
-                    last_date = db_utils.get_latest_snapshot_date(market['id'])
-                    st.caption("Última análise:" if last_date else "Status:")
-                    st.markdown(f"**{last_date.strftime('%d/%m/%Y')}**" if last_date else "**Ainda não analisado**")
-                if cols[2].button("Ver Detalhes", key=f"details_{market['id']}", use_container_width=True):
-                    st.session_state.selected_market = market; st.session_state.page = 'details'; st.rerun()
-                disable_button = limit_reached
-                tooltip = "Você atingiu seu limite diário de análises." if limit_reached else f"Reanalisar mercado (consome 1 de suas {int(db_utils.get_platform_setting('daily_analysis_limit'))} análises diárias)"
-                if cols[3].button("Reanalisar", key=f"reanalyze_{market['id']}", use_container_width=True, disabled=disable_button, help=tooltip, type="primary"):
-                    if db_utils.check_and_update_daily_limit(st.session_state.user['id']):
-                        run_analysis_with_progress(market['termo'], market['localizacao'], st.session_state.user['id'], market['id'], maps_api_key, market.get('tipo_negocio'))
-                    else: st.error("Limite de análises diárias atingido."); time.sleep(2); st.rerun()
+        render_bulk_export(st.session_state.user['id'], maps_api_key)
+        render_markets_list(st.session_state.user['id'], maps_api_key)
+
+def _reset_markets_pages():
+    st.session_state.markets_pages = 1
+
+@st.fragment
+def render_markets_list(user_id, maps_api_key):
+    """Lista paginada (keyset no servidor) com busca e ordenação; "Carregar mais" só refaz este fragmento."""
+    col_busca, col_ordem = st.columns([3, 1])
+    search = col_busca.text_input("Buscar mercado", placeholder="Termo ou localização", key="markets_search", on_change=_reset_markets_pages)
+    sort = col_ordem.selectbox("Ordenar por", list(db_utils.MARKET_SORTS), format_func=db_utils.MARKET_SORTS.get, key="markets_sort", on_change=_reset_markets_pages)
+    st.session_state.setdefault('markets_pages', 1)
+
+    # Constantes dos cards calculadas uma vez por renderização, não uma vez por card.
+    credits = credit_state.get_credit_state(user_id)
+    limit_reached = credit_state.limit_reached(credits)
+    reanalyze_help = "Você atingiu seu limite diário de análises." if limit_reached else f"Reanalisar mercado (consome 1 de suas {credits['limit']} análises diárias)"
+
+    cursor = None
+    for _ in range(st.session_state.markets_pages):
+        page, cursor = db_utils.list_user_markets(user_id, search.strip(), sort, cursor)
+        for market in page:
+            render_market_card(market, limit_reached, reanalyze_help, maps_api_key)
+        if cursor is None: break
+
+    if search.strip() and st.session_state.markets_pages == 1 and not page:
+        st.info("Nenhum mercado encontrado para esta busca.")
+    if cursor is not None and st.button("Carregar mais", use_container_width=True):
+        st.session_state.markets_pages += 1; st.rerun(scope="fragment")
+
+@st.fragment
+def render_market_card(market, limit_reached, reanalyze_help, maps_api_key):
+    """Card de um mercado; é um fragmento, então cliques nele não refazem as consultas dos outros cards."""
+    with st.container(border=True):
+        cols = st.columns([4, 2, 2, 2])
+        with cols[0]:
+            st.markdown(f"#### {market.get('termo', 'N/A')}")
+            st.caption(f"Em: {market.get('localizacao', 'N/A')} | Tipo: {market.get('tipo_negocio', 'N/A')}")
+        with cols[1]:
+            last_date = datetime.fromisoformat(market['last_analysis_at'].replace('Z', '+00:00')) if market.get('last_analysis_at') else None
+            st.caption("Última análise:" if last_date else "Status:")
+            st.markdown(f"**{last_date.strftime('%d/%m/%Y')}**" if last_date else "**Ainda não analisado**")
+        if cols[2].button("Ver Detalhes", key=f"details_{market['id']}", use_container_width=True):
+            st.session_state.selected_market = market; st.session_state.page = 'details'; st.rerun()
+        force_refresh = cols[3].toggle("Refazer IA", key=f"force_refresh_{market['id']}", help="Gera uma nova análise da IA mesmo que os concorrentes não tenham mudado desde a última.")
+        if cols[3].button("Reanalisar", key=f"reanalyze_{market['id']}", use_container_width=True, disabled=limit_reached, help=reanalyze_help, type="primary"):
+            idempotency_key = claim_analysis(st.session_state.user['id'], market['id'], market['termo'], market['localizacao'], market.get('tipo_negocio'))
+            if idempotency_key:
+                run_analysis_with_progress(market['termo'], market['localizacao'], st.session_state.user['id'], market['id'], maps_api_key, market.get('tipo_negocio'), idempotency_key, force_refresh)
+            else: time.sleep(2); st.rerun()
+
+def render_bulk_export(user_id, maps_api_key):
+    expander = st.expander("📦 Exportar Relatórios em Lote (ZIP)", key="bulk_export_expander", on_change="rerun")
+    with expander:
+        # A lista completa de mercados só é buscada com o painel aberto
+        if not expander.open: return
+        user_markets = db_utils.get_user_markets(user_id)
+        labels = {m['id']: f"{m.get('termo', 'N/A')} — {m.get('localizacao', 'N/A')}" for m in user_markets}
+        selected_ids = st.multiselect("Mercados", list(labels), format_func=labels.get, placeholder="Selecione os mercados")
+        if st.button("Gerar ZIP", disabled=not selected_ids, use_container_width=True):
+            import report_export
+            progress_bar = st.progress(0, text="Gerando relatórios...")
+            def on_progress(done, total, nome): progress_bar.progress(done / total, text=f"{done} de {total} relatórios prontos ({nome})")
+            selected = [m for m in user_markets if m['id'] in selected_ids]
+            zip_path, failures = report_export.build_reports_zip(selected, maps_api_key, on_progress)
+            progress_bar.empty()
+            st.session_state.bulk_export_zip = zip_path
+            for failure in failures: st.warning(f"Relatório não incluído — {failure}")
+        zip_path = st.session_state.get('bulk_export_zip')
+        if zip_path and os.path.exists(zip_path):
+            # Com um callable, o ZIP só é lido do disco no clique, e não a cada rerun com o painel aberto
+            st.download_button("⬇️ Baixar ZIP", Path(zip_path).read_bytes, f"Relatorios_RadarPro_{datetime.now().strftime('%Y%m%d')}.zip", "application/zip", use_container_width=True)
+
+@st.fragment
+def render_report_download(latest_snapshot):
+    import report_generator
+    import report_pool
+    data = latest_snapshot.get('dados_json', {})
+    pdf_bytes = report_generator.get_cached_report_pdf(latest_snapshot['id'])
+    if not pdf_bytes and st.button("📄 Gerar Relatório PDF", use_container_width=True):
+        pdf_future = report_pool.submit_report(latest_snapshot, st.secrets.google["maps_api_key"])
+        if pdf_future is None: st.warning("Muitos relatórios sendo gerados agora. Tente novamente em instantes.")
+        else:
+            with st.spinner("Gerando relatório..."): pdf_bytes, pdf_error = report_pool.wait_for_report(pdf_future)
+            if pdf_error: st.error(pdf_error)
+    if pdf_bytes: st.download_button("📄 Baixar Relatório PDF", pdf_bytes, f"Relatorio_{data.get('termo_busca')}.pdf", "application/pdf", use_container_width=True)
 
 def details_page():
     if 'selected_market' not in st.session_state or st.session_state.selected_market is None:
         st.warning("Nenhum mercado selecionado. Redirecionando..."); st.session_state.page = 'dashboard'; time.sleep(1); st.rerun(); return
     market = st.session_state.selected_market
-    latest_snapshot = db_utils.get_latest_snapshot(market['id'])
+    latest_snapshot = db_utils.get_latest_snapshot(market['id'], st.session_state.user['id'])
     if not latest_snapshot:
         st.error("Dados de análise não encontrados."); 
         if st.button("⬅️ Voltar ao Dashboard"): st.session_state.selected_market = None; st.session_state.page = 'dashboard'; st.rerun()
@@ -133,8 +231,7 @@ def details_page():
         st.subheader(f"Localização: {data.get('localizacao_busca', 'N/A')}")
         st.caption(f"Tipo de Negócio Analisado: {data.get('tipo_negocio', 'Genérico / Outros')}")
     with col2:
-        st.write(""); pdf_bytes = report_generator.gerar_relatorio_pdf(data, st.secrets.google["maps_api_key"])
-        if pdf_bytes: st.download_button("📄 Baixar Relatório PDF", pdf_bytes, f"Relatorio_{data.get('termo_busca')}.pdf", "application/pdf", use_container_width=True)
+        st.write(""); render_report_download(latest_snapshot); render_auto_reanalysis(market)
         if st.button("⬅️ Voltar ao Dashboard"): st.session_state.selected_market = None; st.session_state.page = 'dashboard'; st.rerun()
 
     st.divider()
@@ -143,104 +240,167 @@ def details_page():
      tab_dossies, tab_mapa, tab_swot, tab_evolucao) = st.tabs(tabs_list)
 
     # --- Abas de Detalhes ---
-    with tab_geral:
-        st.header("Sumário Executivo"); st.write(data.get('sumario_executivo', 'N/A'))
-        st.header("Análise de Sentimentos"); sentimentos = data.get('analise_sentimentos', {})
-        if sentimentos:
-            cols = st.columns(len(sentimentos)); cores = {"Positivo": "normal", "Neutro": "off", "Negativo": "inverse"}
-            for i, (s, p) in enumerate(sentimentos.items()):
-                with cols[i]: st.metric(label=s, value=f"{p}%", delta_color=cores.get(s, "off"))
-        else: st.info("Nenhuma análise de sentimentos foi gerada.")
-
-    with tab_plano:
-        st.header("Plano de Ação Sugerido"); plano = data.get('plano_de_acao', [])
-        if plano:
-            for i, passo in enumerate(plano): st.markdown(f"**{i+1}.** {passo}")
-        else: st.info("Nenhum plano de ação foi gerado.")
-
-    with tab_extra:
-        st.header("Insights Específicos do Setor"); has_extra_data = False
-        insights_map = {"analise_cardapio": "Análise de Cardápio", "estrategia_delivery": "Estratégia de Delivery", "analise_mix_produtos": "Análise de Mix de Produtos", "estrategia_visual_merchandising": "Estratégia de Visual Merchandising", "servicos_diferenciados": "Serviços Diferenciados", "estrategia_agendamento": "Estratégia de Agendamento"}
-        for key, title in insights_map.items():
-            if key in data: st.subheader(title); st.write(data.get(key)); has_extra_data = True
-        if not has_extra_data: st.info("Nenhum insight específico para este setor foi gerado.")
-
-    with tab_tendencias:
-        st.header(f"📈 Tendências de Busca para '{data.get('termo_busca')}'"); st.info("Análise do interesse de busca nos últimos 12 meses no Brasil (Fonte: Google Trends).")
-        with st.spinner("Buscando dados de tendências..."): trends_df = api_calls.get_interest_over_time(data.get('termo_busca'))
-        if not trends_df.empty:
-            st.line_chart(trends_df)
-            media = trends_df.iloc[:, 0].mean(); ultimo_valor = trends_df.iloc[-1, 0]
-            st.write(f"**Análise da Tendência:**")
-            if ultimo_valor > media * 1.2: st.success(f"O interesse atual ({ultimo_valor}) está significativamente **acima** da média anual ({media:.1f}).")
-            elif ultimo_valor < media * 0.8: st.warning(f"O interesse atual ({ultimo_valor}) está significativamente **abaixo** da média anual ({media:.1f}).")
-            else: st.info(f"O interesse atual ({ultimo_valor}) está **estável** em relação à média anual ({media:.1f}).")
-        else: st.error("Não foi possível obter os dados de tendências para este termo.")
-
-    with tab_demografia:
-        st.header("Análise Demográfica do Público-Alvo"); demografia = data.get('analise_demografica', {});
-        if demografia:
-            st.subheader("Resumo do Perfil"); st.write(demografia.get('resumo', 'N/A'))
-            st.subheader("Faixa Etária Principal"); st.info(f"📊 {demografia.get('faixa_etaria', 'N/A')}")
-            st.subheader("Principais Interesses"); [st.markdown(f"- {i}") for i in demografia.get('interesses_principais', [])]
-        else: st.info("Nenhuma análise demográfica foi gerada.")
-
-    with tab_dossies:
-        st.header("Dossiês dos Principais Concorrentes"); dossies = data.get('dossies_concorrentes', [])
-        if dossies:
-            for concorrente in dossies:
-                with st.container(border=True):
-                    st.subheader(concorrente.get('nome', 'N/A')); st.markdown(f"**Posicionamento:** *{concorrente.get('posicionamento_mercado', 'N/A')}*")
-                    col1, col2 = st.columns(2)
-                    with col1: st.success(f"**Pontos Fortes:**\n{concorrente.get('pontos_fortes', 'N/A')}")
-                    with col2: st.warning(f"**Pontos Fracos:**\n{concorrente.get('pontos_fracos', 'N/A')}")
-        else: st.info("Nenhum dossiê de concorrente foi gerado.")
-
-    with tab_mapa:
-        st.header("Mapa Interativo da Concorrência"); competidores = data.get('competidores', [])
-        competidores_com_coords = [c for c in competidores if c.get('latitude') and c.get('longitude')]
-        if competidores_com_coords:
-            avg_lat = sum(c['latitude'] for c in competidores_com_coords) / len(competidores_com_coords)
-            avg_lon = sum(c['longitude'] for c in competidores_com_coords) / len(competidores_com_coords)
-            mapa = folium.Map(location=[avg_lat, avg_lon], zoom_start=14)
-            for comp in competidores_com_coords: folium.Marker(location=[comp['latitude'], comp['longitude']], popup=f"<b>{comp['name']}</b>", tooltip=comp['name'], icon=folium.Icon(color='red', icon='info-sign')).add_to(mapa)
-            st_folium(mapa, use_container_width=True)
-        else: st.warning("Nenhum concorrente com dados de localização foi encontrado.")
-
-    with tab_swot:
-        st.header("Análise SWOT Estratégica"); st.info(f"Esta análise é gerada sob demanda e consome 1 de suas análises diárias.")
-        st.session_state.setdefault('swot_analysis', None)
-        if st.button("Gerar Análise SWOT com IA", type="primary"):
-            if db_utils.check_and_update_daily_limit(st.session_state.user['id']):
-                with st.spinner("A IA está elaborando a matriz estratégica..."):
-                    try:
-                        st.session_state.swot_analysis = api_calls.generate_swot_analysis(data)
-                        st.toast("Análise SWOT gerada!", icon="🧠"); st.rerun()
-                    except Exception as e: st.error(f"Erro ao gerar análise SWOT: {e}"); st.session_state.swot_analysis = None
-            else: st.error("Limite de análises diárias atingido.")
-        if st.session_state.swot_analysis:
-            swot = st.session_state.swot_analysis; col1, col2 = st.columns(2)
-            with col1:
-                st.subheader("👍 Forças"); [st.markdown(f"- {item}") for item in swot.get("strengths", [])]
-                st.subheader("👎 Fraquezas"); [st.markdown(f"- {item}") for item in swot.get("weaknesses", [])]
-            with col2:
-                st.subheader("✨ Oportunidades"); [st.markdown(f"- {item}") for item in swot.get("opportunities", [])]
-                st.subheader("❗ Ameaças"); [st.markdown(f"- {item}") for item in swot.get("threats", [])]
-    
-    with tab_evolucao:
-        st.header("Evolução Histórica dos Indicadores (KPIs)")
-        history_df = db_utils.get_kpi_history(market['id'])
-        if history_df.empty or len(history_df) < 2:
-            st.info("É necessário ter pelo menos duas análises para visualizar a evolução dos KPIs.")
+    # Cada aba é um fragmento: interações dentro dela (mapa, SWOT...) reexecutam só a própria aba.
+    with tab_geral: render_overview_tab(data)
+    with tab_plano: render_action_plan_tab(data)
+    with tab_extra: render_insights_tab(data)
+    with tab_tendencias: render_trends_tab(data)
+    with tab_demografia: render_demographics_tab(data)
+    with tab_dossies: render_dossiers_tab(data)
+    with tab_mapa: render_map_tab(latest_snapshot['id'], data)
+    with tab_swot: render_swot_tab(data)
+    with tab_evolucao: render_evolution_tab(market['id'])
+
+@st.fragment
+def render_auto_reanalysis(market):
+    opcoes = list(db_utils.AUTO_REANALYSIS_OPTIONS)
+    atual = market.get('auto_reanalysis_days')
+    # Uma cadência fora da lista entra como opção, para não ser trocada por "Desligada" sem o usuário pedir
+    if atual not in opcoes: opcoes.append(atual)
+    cadencia = st.selectbox("Reanálise automática", opcoes, index=opcoes.index(atual),
+                            format_func=db_utils.auto_reanalysis_label, key=f"auto_reanalysis_{market['id']}",
+                            help="Reanalisa este mercado periodicamente, em um horário fixo do dia, sem consumir suas análises diárias.")
+    if cadencia != atual and db_utils.set_market_auto_reanalysis(market['id'], st.session_state.user['id'], cadencia):
+        market['auto_reanalysis_days'] = cadencia
+        st.toast("Reanálise automática atualizada.", icon="🔁")
+
+# --- Abas de Detalhes (fragmentos) ---
+@st.fragment
+def render_overview_tab(data):
+    st.header("Sumário Executivo"); st.write(data.get('sumario_executivo', 'N/A'))
+    # Reanálises sem mudança na concorrência reaproveitam o texto da IA; a data mostra de quando ele é
+    if data.get('ai_generated_at'): st.caption(f"Análise da IA gerada em {datetime.fromisoformat(data['ai_generated_at']).strftime('%d/%m/%Y')}.")
+    st.header("Análise de Sentimentos"); sentimentos = data.get('analise_sentimentos', {})
+    if sentimentos:
+        cols = st.columns(len(sentimentos)); cores = {"Positivo": "normal", "Neutro": "off", "Negativo": "inverse"}
+        for i, (s, p) in enumerate(sentimentos.items()):
+            with cols[i]: st.metric(label=s, value=f"{p}%", delta_color=cores.get(s, "off"))
+    else: st.info("Nenhuma análise de sentimentos foi gerada.")
+
+@st.fragment
+def render_action_plan_tab(data):
+    st.header("Plano de Ação Sugerido"); plano = data.get('plano_de_acao', [])
+    if plano:
+        for i, passo in enumerate(plano): st.markdown(f"**{i+1}.** {passo}")
+    else: st.info("Nenhum plano de ação foi gerado.")
+
+@st.fragment
+def render_insights_tab(data):
+    st.header("Insights Específicos do Setor"); has_extra_data = False
+    insights_map = {"analise_cardapio": "Análise de Cardápio", "estrategia_delivery": "Estratégia de Delivery", "analise_mix_produtos": "Análise de Mix de Produtos", "estrategia_visual_merchandising": "Estratégia de Visual Merchandising", "servicos_diferenciados": "Serviços Diferenciados", "estrategia_agendamento": "Estratégia de Agendamento"}
+    for key, title in insights_map.items():
+        if key in data: st.subheader(title); st.write(data.get(key)); has_extra_data = True
+    if not has_extra_data: st.info("Nenhum insight específico para este setor foi gerado.")
+
+@st.fragment
+def render_trends_tab(data):
+    import api_calls
+    import trends_regions
+    import trends_store
+    geo = trends_regions.resolve_trends_geo(data)
+    regiao = trends_regions.region_label(geo)
+    st.header(f"📈 Tendências de Busca para '{data.get('termo_busca')}'"); st.info(f"Análise do interesse de busca nos últimos 12 meses {'no Brasil' if geo == trends_regions.COUNTRY_GEO else f'em {regiao}'} (Fonte: Google Trends).")
+    try:
+        with st.spinner("Buscando dados de tendências..."):
+            trends_df = api_calls.get_interest_over_time(data.get('termo_busca'), geo)
+            if trends_df.empty and geo != trends_regions.COUNTRY_GEO:
+                # Termos de nicho costumam não ter volume suficiente no estado; cai para o Brasil inteiro
+                trends_df = api_calls.get_interest_over_time(data.get('termo_busca'), trends_regions.COUNTRY_GEO)
+                if not trends_df.empty: st.caption(f"Sem volume de buscas suficiente em {regiao}; mostrando o interesse no Brasil.")
+    except trends_store.TrendsPending:
+        st.info("Os dados de tendências deste termo estão na fila do Google Trends (que limita o número de consultas). Volte a esta aba em alguns minutos."); return
+    if not trends_df.empty:
+        st.line_chart(trends_df)
+        media = trends_df.iloc[:, 0].mean(); ultimo_valor = trends_df.iloc[-1, 0]
+        st.write(f"**Análise da Tendência:**")
+        if ultimo_valor > media * 1.2: st.success(f"O interesse atual ({ultimo_valor}) está significativamente **acima** da média anual ({media:.1f}).")
+        elif ultimo_valor < media * 0.8: st.warning(f"O interesse atual ({ultimo_valor}) está significativamente **abaixo** da média anual ({media:.1f}).")
+        else: st.info(f"O interesse atual ({ultimo_valor}) está **estável** em relação à média anual ({media:.1f}).")
+    else: st.error("Não foi possível obter os dados de tendências para este termo.")
+
+@st.fragment
+def render_demographics_tab(data):
+    st.header("Análise Demográfica do Público-Alvo"); demografia = data.get('analise_demografica', {});
+    if demografia:
+        st.subheader("Resumo do Perfil"); st.write(demografia.get('resumo', 'N/A'))
+        st.subheader("Faixa Etária Principal"); st.info(f"📊 {demografia.get('faixa_etaria', 'N/A')}")
+        st.subheader("Principais Interesses"); [st.markdown(f"- {i}") for i in demografia.get('interesses_principais', [])]
+    else: st.info("Nenhuma análise demográfica foi gerada.")
+
+@st.fragment
+def render_dossiers_tab(data):
+    st.header("Dossiês dos Principais Concorrentes"); dossies = data.get('dossies_concorrentes', [])
+    if dossies:
+        for concorrente in dossies:
+            with st.container(border=True):
+                st.subheader(concorrente.get('nome', 'N/A')); st.markdown(f"**Posicionamento:** *{concorrente.get('posicionamento_mercado', 'N/A')}*")
+                col1, col2 = st.columns(2)
+                with col1: st.success(f"**Pontos Fortes:**\n{concorrente.get('pontos_fortes', 'N/A')}")
+                with col2: st.warning(f"**Pontos Fracos:**\n{concorrente.get('pontos_fracos', 'N/A')}")
+    else: st.info("Nenhum dossiê de concorrente foi gerado.")
+
+@st.fragment
+def render_map_tab(snapshot_id, data):
+    import competitor_map
+    st.header("Mapa Interativo da Concorrência"); competidores = data.get('competidores', [])
+    if competitor_map.competitors_with_coords(competidores):
+        # A lista completa, como no PDF: mesma numeração dos marcadores e mesma imagem em cache
+        if st.toggle("Pré-visualização rápida (imagem estática)", key="map_static_preview"):
+            import static_maps
+            png = static_maps.get_static_map_png(competidores, st.secrets.google["maps_api_key"])
+            if png: st.image(png, caption=f"Mostrando até {static_maps.MAX_MARKERS} concorrentes, numerados na ordem da lista.", use_container_width=True)
+            else: st.warning("Não foi possível carregar a imagem do mapa. Desative a pré-visualização para ver o mapa interativo.")
         else:
-            st.subheader("Concorrentes e Nota Média")
-            st.line_chart(history_df[['competitor_count', 'avg_rating']])
-            st.subheader("Sentimento do Mercado (%)")
-            st.line_chart(history_df[['positive_sentiment', 'neutral_sentiment', 'negative_sentiment']])
-            st.subheader("Histórico de Sumários Executivos")
-            for index, row in history_df.sort_index(ascending=False).iterrows():
-                with st.expander(f"Análise de {index.strftime('%d/%m/%Y')}"):
-                    st.write(row['executive_summary'])
+            competitor_map.render_interactive_map(snapshot_id, competidores)
+    else: st.warning("Nenhum concorrente com dados de localização foi encontrado.")
+
+@st.fragment
+def render_swot_tab(data):
+    import api_calls
+    st.header("Análise SWOT Estratégica"); st.info(f"Esta análise é gerada sob demanda e consome 1 de suas análises diárias.")
+    st.session_state.setdefault('swot_analysis', None)
+    if st.button("Gerar Análise SWOT com IA", type="primary"):
+        if credit_state.consume_credit(st.session_state.user['id']):
+            with st.spinner("A IA está elaborando a matriz estratégica..."):
+                try:
+                    st.session_state.swot_analysis = api_calls.generate_swot_analysis(data)
+                    st.toast("Análise SWOT gerada!", icon="🧠"); st.rerun()  # rerun completo: o crédito consumido muda a barra lateral
+                except Exception as e: st.error(f"Erro ao gerar análise SWOT: {e}"); st.session_state.swot_analysis = None
+        else: st.error("Limite de análises diárias atingido.")
+    if st.session_state.swot_analysis:
+        swot = st.session_state.swot_analysis; col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("👍 Forças"); [st.markdown(f"- {item}") for item in swot.get("strengths", [])]
+            st.subheader("👎 Fraquezas"); [st.markdown(f"- {item}") for item in swot.get("weaknesses", [])]
+        with col2:
+            st.subheader("✨ Oportunidades"); [st.markdown(f"- {item}") for item in swot.get("opportunities", [])]
+            st.subheader("❗ Ameaças"); [st.markdown(f"- {item}") for item in swot.get("threats", [])]
+
+@st.fragment
+def render_evolution_tab(market_id):
+    st.header("Evolução Histórica dos Indicadores (KPIs)")
+    history_df = db_utils.get_kpi_history(market_id, st.session_state.user['id'])
+    if history_df.empty or len(history_df) < 2:
+        st.info("É necessário ter pelo menos duas análises para visualizar a evolução dos KPIs.")
+    else:
+        st.subheader("Concorrentes e Nota Média")
+        st.line_chart(history_df[['competitor_count', 'avg_rating']])
+        st.subheader("Sentimento do Mercado (%)")
+        st.line_chart(history_df[['positive_sentiment', 'neutral_sentiment', 'negative_sentiment']])
+        st.subheader("Histórico de Sumários Executivos")
+        for index, row in history_df.sort_index(ascending=False).iterrows():
+            with st.expander(f"Análise de {index.strftime('%d/%m/%Y')}"):
+                st.write(row['executive_summary'])
+
+@st.fragment
+def render_sidebar_credits(user_id):
+    credits = credit_state.get_credit_state(user_id)
+    limit = credits['limit']
+    analyses_left = credit_state.remaining(credits)
+
+    st.write("Análises gratuitas hoje:")
+    st.progress(analyses_left / limit if limit > 0 else 0)
+    st.caption(f"{analyses_left} de {limit} restantes")
 
 # --- Roteador Principal ---
 def main():
@@ -257,13 +417,7 @@ def main():
             st.image("logo.png")
             st.write(f"Bem-vindo, **{st.session_state.user.get('email')}**")
             
-            analysis_info = db_utils.get_user_analysis_info(st.session_state.user['id'])
-            limit = int(db_utils.get_platform_setting('daily_analysis_limit'))
-            analyses_left = limit - analysis_info['count']
-            
-            st.write("Análises gratuitas hoje:")
-            st.progress(analyses_left / limit if analyses_left >= 0 and limit > 0 else 0)
-            st.caption(f"{analyses_left if analyses_left >= 0 else 0} de {limit} restantes")
+            render_sidebar_credits(st.session_state.user['id'])
             
             st.divider()
             if st.button("Meu Dashboard", use_container_width=True): st.session_state.page = 'dashboard'; st.session_state.pop('selected_market', None); st.session_state.pop('swot_analysis', None); st.rerun()
@@ -0,0 +1,64 @@
+-- 0001_schema_base.sql
+-- Tabelas base usadas pela aplicação (db_utils.py / auth_utils.py).
+
+-- Em um projeto Supabase o schema "auth" já existe; os comandos abaixo só
+-- criam um equivalente mínimo quando rodamos contra um Postgres local.
+create schema if not exists auth;
+create table if not exists auth.users (
+    id uuid primary key,
+    email text,
+    last_sign_in_at timestamptz
+);
+
+create table if not exists public.profiles (
+    id uuid primary key references auth.users (id) on delete cascade,
+    is_active boolean not null default true,
+    daily_analysis_count integer not null default 0,
+    last_analysis_date date,
+    analysis_credits integer not null default 0
+);
+
+create table if not exists public.admins (
+    user_id uuid primary key references auth.users (id) on delete cascade
+);
+
+create table if not exists public.platform_settings (
+    setting_name text primary key,
+    setting_value text not null
+);
+
+insert into public.platform_settings (setting_name, setting_value)
+values ('daily_analysis_limit', '10')
+on conflict (setting_name) do nothing;
+
+create table if not exists public.mercados_monitorados (
+    id bigint generated by default as identity primary key,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    termo text not null,
+    localizacao text not null,
+    tipo_negocio text,
+    created_at timestamptz not null default now()
+);
+
+create table if not exists public.snapshots_dados (
+    id bigint generated by default as identity primary key,
+    mercado_id bigint not null references public.mercados_monitorados (id) on delete cascade,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    dados_json jsonb not null,
+    data_snapshot timestamptz not null default now(),
+    created_at timestamptz not null default now()
+);
+
+create table if not exists public.kpi_history (
+    id bigint generated by default as identity primary key,
+    snapshot_id bigint references public.snapshots_dados (id) on delete cascade,
+    market_id bigint not null references public.mercados_monitorados (id) on delete cascade,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    analysis_date date not null default current_date,
+    competitor_count integer not null default 0,
+    avg_rating numeric(4, 2) not null default 0,
+    positive_sentiment numeric not null default 0,
+    neutral_sentiment numeric not null default 0,
+    negative_sentiment numeric not null default 0,
+    executive_summary text
+);
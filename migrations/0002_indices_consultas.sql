@@ -0,0 +1,25 @@
+-- 0002_indices_consultas.sql
+-- Índices de cobertura para as consultas quentes da aplicação.
+-- Cada índice é verificado por migrations/check_indexes.py.
+
+-- get_latest_snapshot: where mercado_id = ? order by data_snapshot desc limit 1
+create index if not exists snapshots_dados_mercado_data_idx
+    on public.snapshots_dados (mercado_id, data_snapshot desc);
+
+-- get_kpi_history: where market_id = ? order by analysis_date
+create index if not exists kpi_history_market_date_idx
+    on public.kpi_history (market_id, analysis_date);
+
+-- get_user_markets: where user_id = ? order by created_at desc
+create index if not exists mercados_monitorados_user_created_idx
+    on public.mercados_monitorados (user_id, created_at desc);
+
+-- find_market_by_term_and_location: where user_id = ? and termo = ? and localizacao = ?
+create index if not exists mercados_monitorados_user_termo_local_idx
+    on public.mercados_monitorados (user_id, termo, localizacao);
+
+-- Chaves estrangeiras usadas em deleções em cascata e contagens do painel admin.
+create index if not exists snapshots_dados_user_idx on public.snapshots_dados (user_id);
+create index if not exists kpi_history_snapshot_idx on public.kpi_history (snapshot_id);
+
+-- platform_settings.setting_name e admins.user_id já são chaves primárias (0001).
@@ -0,0 +1,40 @@
+-- 0003_rpcs_admin.sql
+-- Funções chamadas via supabase_client.rpc() pelo painel de administração.
+
+create or replace function public.count_total_users()
+returns bigint
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select count(*) from auth.users;
+$$;
+
+create or replace function public.get_all_users_with_details()
+returns table (
+    id uuid,
+    email text,
+    last_sign_in_at timestamptz,
+    is_active boolean,
+    analysis_credits integer,
+    snapshot_count bigint,
+    market_count bigint
+)
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select
+        u.id,
+        u.email,
+        u.last_sign_in_at,
+        p.is_active,
+        p.analysis_credits,
+        (select count(*) from public.snapshots_dados s where s.user_id = u.id) as snapshot_count,
+        (select count(*) from public.mercados_monitorados m where m.user_id = u.id) as market_count
+    from auth.users u
+    left join public.profiles p on p.id = u.id
+    order by u.email;
+$$;
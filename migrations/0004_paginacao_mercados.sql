@@ -0,0 +1,104 @@
+-- 0004_paginacao_mercados.sql
+-- Paginação por cursor (keyset), busca e ordenação por última análise
+-- da lista "Meus Mercados Monitorados".
+
+-- Data da última análise desnormalizada no próprio mercado, para ordenar
+-- sem um join/subconsulta em snapshots_dados por linha.
+alter table public.mercados_monitorados
+    add column if not exists last_analysis_at timestamptz;
+
+update public.mercados_monitorados m
+set last_analysis_at = s.ultima
+from (
+    select mercado_id, max(data_snapshot) as ultima
+    from public.snapshots_dados
+    group by mercado_id
+) s
+where s.mercado_id = m.id
+  and m.last_analysis_at is distinct from s.ultima;
+
+create or replace function public.touch_market_last_analysis()
+returns trigger
+language plpgsql
+security definer
+set search_path = public
+as $$
+begin
+    update public.mercados_monitorados
+    set last_analysis_at = greatest(coalesce(last_analysis_at, new.data_snapshot), new.data_snapshot)
+    where id = new.mercado_id;
+    return new;
+end;
+$$;
+
+drop trigger if exists snapshots_dados_touch_market on public.snapshots_dados;
+create trigger snapshots_dados_touch_market
+    after insert on public.snapshots_dados
+    for each row execute function public.touch_market_last_analysis();
+
+-- list_user_markets (ultima_analise): mercados nunca analisados vão para o fim.
+create index if not exists mercados_monitorados_user_last_analysis_idx
+    on public.mercados_monitorados (user_id, (coalesce(last_analysis_at, '-infinity'::timestamptz)) desc, id desc);
+
+-- list_user_markets (criacao): o id desempata mercados criados no mesmo instante.
+create index if not exists mercados_monitorados_user_created_id_idx
+    on public.mercados_monitorados (user_id, created_at desc, id desc);
+
+-- Busca por trecho do termo ou da localização.
+create extension if not exists pg_trgm;
+create index if not exists mercados_monitorados_busca_trgm_idx
+    on public.mercados_monitorados using gin ((termo || ' ' || localizacao) gin_trgm_ops);
+
+-- Uma página de mercados do usuário. O cursor (p_after_ts, p_after_id) é a
+-- chave de ordenação da última linha da página anterior; nulo na primeira.
+-- security invoker: as políticas de RLS de mercados_monitorados continuam valendo.
+create or replace function public.list_user_markets(
+    p_user_id uuid,
+    p_search text default null,
+    p_sort text default 'ultima_analise',
+    p_after_ts timestamptz default null,
+    p_after_id bigint default null,
+    p_limit integer default 20
+)
+returns table (
+    id bigint,
+    termo text,
+    localizacao text,
+    tipo_negocio text,
+    created_at timestamptz,
+    last_analysis_at timestamptz,
+    sort_ts timestamptz
+)
+language plpgsql
+stable
+set search_path = public
+as $$
+declare
+    padrao text := case
+        when coalesce(btrim(p_search), '') = '' then null
+        else '%' || replace(replace(replace(btrim(p_search), '\', '\\'), '%', '\%'), '_', '\_') || '%'
+    end;
+begin
+    if p_sort = 'criacao' then
+        return query
+        select m.id, m.termo, m.localizacao, m.tipo_negocio, m.created_at, m.last_analysis_at, m.created_at
+        from public.mercados_monitorados m
+        where m.user_id = p_user_id
+          and (padrao is null or (m.termo || ' ' || m.localizacao) ilike padrao)
+          and (p_after_id is null or (m.created_at, m.id) < (p_after_ts, p_after_id))
+        order by m.created_at desc, m.id desc
+        limit p_limit;
+    else
+        return query
+        select m.id, m.termo, m.localizacao, m.tipo_negocio, m.created_at, m.last_analysis_at,
+               coalesce(m.last_analysis_at, '-infinity'::timestamptz)
+        from public.mercados_monitorados m
+        where m.user_id = p_user_id
+          and (padrao is null or (m.termo || ' ' || m.localizacao) ilike padrao)
+          and (p_after_id is null
+               or (coalesce(m.last_analysis_at, '-infinity'::timestamptz), m.id) < (p_after_ts, p_after_id))
+        order by coalesce(m.last_analysis_at, '-infinity'::timestamptz) desc, m.id desc
+        limit p_limit;
+    end if;
+end;
+$$;
@@ -0,0 +1,34 @@
+-- 0005_session_bootstrap.sql
+-- Tudo o que o login precisa em uma única chamada: perfil, conta ativa,
+-- administrador e configurações da plataforma.
+
+-- Fora do Supabase (Postgres local/CI) auth.uid() não existe; cria uma versão
+-- equivalente que lê o "sub" do JWT da requisição, como a do Supabase.
+do $$
+begin
+    if not exists (
+        select 1 from pg_proc p join pg_namespace n on n.oid = p.pronamespace
+        where n.nspname = 'auth' and p.proname = 'uid'
+    ) then
+        create function auth.uid() returns uuid
+        language sql stable
+        as 'select nullif(coalesce(current_setting(''request.jwt.claim.sub'', true), (current_setting(''request.jwt.claims'', true)::jsonb ->> ''sub'')), '''')::uuid';
+    end if;
+end;
+$$;
+
+create or replace function public.session_bootstrap()
+returns jsonb
+language sql
+stable
+security definer
+set search_path = public
+as $$
+    select jsonb_build_object(
+        'user_id', auth.uid(),
+        'profile', (select to_jsonb(p) from public.profiles p where p.id = auth.uid()),
+        'is_active', coalesce((select p.is_active from public.profiles p where p.id = auth.uid()), false),
+        'is_admin', exists (select 1 from public.admins a where a.user_id = auth.uid()),
+        'settings', coalesce((select jsonb_object_agg(s.setting_name, s.setting_value) from public.platform_settings s), '{}'::jsonb)
+    );
+$$;
@@ -0,0 +1,24 @@
+-- 0006_trends_series.sql
+-- Séries do Google Trends persistidas por (palavra-chave, geo), compartilhadas
+-- entre sessões e réplicas. Usadas por trends_store.py, que só busca a janela
+-- recente que falta e a anexa aqui.
+
+-- Um ponto por semana (domingo que inicia a semana, como no Trends). O valor
+-- fica na escala da primeira busca completa; as atualizações incrementais são
+-- reescaladas pelas semanas em comum antes de serem gravadas.
+create table if not exists public.trends_series (
+    keyword text not null,
+    geo text not null,
+    week date not null,
+    value real not null,
+    primary key (keyword, geo, week)
+);
+
+create table if not exists public.trends_series_meta (
+    keyword text not null,
+    geo text not null,
+    last_fetched_at timestamptz not null default now(),
+    -- última busca completa (12 meses), que redefine a escala da série
+    last_full_at timestamptz,
+    primary key (keyword, geo)
+);
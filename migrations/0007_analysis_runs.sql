@@ -0,0 +1,25 @@
+-- 0007_analysis_runs.sql
+-- Execuções do pipeline de análise (api_calls.run_full_analysis) com o
+-- checkpoint de cada etapa concluída. Uma execução que falha pode ser
+-- retomada a partir da última etapa, sem refazer Places, geocode e IA e sem
+-- consumir outra análise diária.
+
+create table if not exists public.analysis_runs (
+    id bigint generated by default as identity primary key,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    market_id bigint not null references public.mercados_monitorados (id) on delete cascade,
+    status text not null default 'running' check (status in ('running', 'failed', 'completed')),
+    -- última etapa concluída (collect, geocode, enrich, llm, persist); nula antes da primeira
+    stage text,
+    -- entradas da análise + saídas das etapas concluídas
+    checkpoint jsonb not null default '{}'::jsonb,
+    error text,
+    snapshot_id bigint references public.snapshots_dados (id) on delete set null,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+-- get_resumable_run: where user_id = ? and market_id = ? and status <> 'completed' order by created_at desc limit 1
+create index if not exists analysis_runs_resumable_idx
+    on public.analysis_runs (user_id, market_id, created_at desc)
+    where status <> 'completed';
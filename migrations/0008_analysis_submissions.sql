@@ -0,0 +1,73 @@
+-- 0008_analysis_submissions.sql
+-- Deduplicação de disparos de análise. Cada envio ("Analisar Mercado",
+-- "Reanalisar") carrega uma chave de idempotência derivada do usuário, do
+-- formulário e de uma janela de tempo; repetições dentro da janela (reruns,
+-- cliques duplos, F5, outra aba) encontram a chave já reservada e não rodam
+-- a análise, nem consomem crédito, de novo.
+
+create table if not exists public.analysis_submissions (
+    idempotency_key text primary key,
+    user_id uuid not null references auth.users (id) on delete cascade,
+    market_id bigint references public.mercados_monitorados (id) on delete cascade,
+    status text not null default 'in_progress' check (status in ('in_progress', 'completed', 'failed')),
+    snapshot_id bigint references public.snapshots_dados (id) on delete set null,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now()
+);
+
+-- Reserva a chave de forma atômica. Retorna claimed = true para quem deve
+-- executar a análise; os demais recebem o status (e o snapshot, se houver)
+-- do envio existente. Envios que falharam, ou que ficaram "in_progress" por
+-- mais de 15 minutos (processo interrompido), podem ser reservados de novo.
+-- p_previous_key é a chave da janela anterior: um clique logo depois da
+-- virada da janela ainda encontra o envio feito pouco antes dela.
+create or replace function public.claim_analysis_submission(
+    p_key text,
+    p_user_id uuid,
+    p_previous_key text default null,
+    p_window_minutes integer default 10
+)
+returns jsonb
+language plpgsql
+set search_path = public
+as $$
+declare
+    v_row public.analysis_submissions;
+begin
+    select * into v_row from public.analysis_submissions
+    where idempotency_key = p_previous_key
+      and status <> 'failed'
+      and created_at > now() - make_interval(mins => p_window_minutes)
+      and not (status = 'in_progress' and updated_at < now() - interval '15 minutes');
+    if found then
+        return jsonb_build_object(
+            'claimed', false,
+            'status', v_row.status,
+            'market_id', v_row.market_id,
+            'snapshot_id', v_row.snapshot_id,
+            'created_at', v_row.created_at
+        );
+    end if;
+
+    insert into public.analysis_submissions as s (idempotency_key, user_id)
+    values (p_key, p_user_id)
+    on conflict (idempotency_key) do update
+        set status = 'in_progress', snapshot_id = null, updated_at = now()
+        where s.status = 'failed'
+           or (s.status = 'in_progress' and s.updated_at < now() - interval '15 minutes')
+    returning * into v_row;
+
+    if found then
+        return jsonb_build_object('claimed', true, 'status', v_row.status);
+    end if;
+
+    select * into v_row from public.analysis_submissions where idempotency_key = p_key;
+    return jsonb_build_object(
+        'claimed', false,
+        'status', v_row.status,
+        'market_id', v_row.market_id,
+        'snapshot_id', v_row.snapshot_id,
+        'created_at', v_row.created_at
+    );
+end;
+$$;
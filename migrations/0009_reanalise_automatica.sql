@@ -0,0 +1,31 @@
+-- 0009_reanalise_automatica.sql
+-- Reanálise automática de mercados monitorados (scheduler_worker.py).
+
+-- Cadência em dias (nula = desligada) e o próximo horário agendado. O horário
+-- dentro do dia é fixo por mercado (derivado do id), para espalhar as
+-- execuções ao longo do dia em vez de concentrá-las à meia-noite.
+alter table public.mercados_monitorados
+    add column if not exists auto_reanalysis_days integer check (auto_reanalysis_days is null or auto_reanalysis_days > 0),
+    add column if not exists next_auto_analysis_at timestamptz;
+
+-- list_due_markets: where auto_reanalysis_days is not null and next_auto_analysis_at <= now() order by next_auto_analysis_at
+create index if not exists mercados_monitorados_auto_due_idx
+    on public.mercados_monitorados (next_auto_analysis_at)
+    where auto_reanalysis_days is not null;
+
+-- Mercados com reanálise vencida cujos donos estão com a conta ativa.
+create or replace function public.list_due_markets(p_limit integer default 20)
+returns setof public.mercados_monitorados
+language sql
+stable
+set search_path = public
+as $$
+    select m.*
+    from public.mercados_monitorados m
+    join public.profiles p on p.id = m.user_id
+    where m.auto_reanalysis_days is not null
+      and m.next_auto_analysis_at <= now()
+      and p.is_active
+    order by m.next_auto_analysis_at
+    limit p_limit;
+$$;
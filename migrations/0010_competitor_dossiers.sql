@@ -0,0 +1,72 @@
+-- 0010_competitor_dossiers.sql
+-- Dossiês de concorrentes gerados pela IA, guardados por place_id do Google.
+-- Os mesmos estabelecimentos aparecem em muitas análises (e em mercados de
+-- usuários diferentes); enquanto o dossiê estiver dentro da janela de
+-- validade, o prompt não pede outro para o mesmo concorrente.
+
+create table if not exists public.competitor_dossiers (
+    place_id text primary key,
+    -- {nome, posicionamento_mercado, pontos_fortes, pontos_fracos}
+    dossie jsonb not null,
+    generated_at timestamptz not null default now()
+);
+
+-- get_competitor_dossiers: where place_id in (...) and generated_at >= ? (a PK já cobre o place_id)
+
+-- A tabela é compartilhada entre usuários: qualquer usuário logado lê, mas
+-- ninguém escreve direto; a gravação passa por save_competitor_dossiers.
+alter table public.competitor_dossiers enable row level security;
+drop policy if exists competitor_dossiers_read on public.competitor_dossiers;
+create policy competitor_dossiers_read on public.competitor_dossiers
+    for select using (auth.uid() is not null);
+
+-- Grava os dossiês recém-gerados, {place_id: dossiê}, e retorna quantos
+-- foram gravados. Dossiês fora do formato esperado são recusados, e um
+-- dossiê ainda válido (mesmo prazo de db_utils.DOSSIER_FRESH_DAYS, 30 dias)
+-- não é sobrescrito: outros relatórios podem estar usando.
+create or replace function public.save_competitor_dossiers(p_dossies jsonb)
+returns integer
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_place_id text;
+    v_dossie jsonb;
+    v_gravados integer := 0;
+begin
+    if jsonb_typeof(p_dossies) is distinct from 'object' then
+        raise exception 'dossiês inválidos';
+    end if;
+    for v_place_id, v_dossie in select key, value from jsonb_each(p_dossies) loop
+        if length(v_place_id) > 300
+           or jsonb_typeof(v_dossie) <> 'object'
+           or jsonb_typeof(v_dossie -> 'nome') is distinct from 'string'
+           or exists (select 1 from jsonb_object_keys(v_dossie) k
+                      where k not in ('nome', 'posicionamento_mercado', 'pontos_fortes', 'pontos_fracos'))
+           or pg_column_size(v_dossie) > 8192 then
+            raise exception 'dossiê inválido para %', v_place_id;
+        end if;
+
+        insert into public.competitor_dossiers as d (place_id, dossie, generated_at)
+        values (v_place_id, v_dossie, now())
+        on conflict (place_id) do update
+            set dossie = excluded.dossie, generated_at = now()
+            where d.generated_at < now() - interval '30 days';
+        if found then
+            v_gravados := v_gravados + 1;
+        end if;
+    end loop;
+    return v_gravados;
+end;
+$$;
+
+-- anon/authenticated/service_role só existem no Supabase; no Postgres local a função fica com as permissões padrão
+do $$
+begin
+    if exists (select 1 from pg_roles where rolname = 'anon') then
+        revoke execute on function public.save_competitor_dossiers(jsonb) from public, anon;
+        grant execute on function public.save_competitor_dossiers(jsonb) to authenticated, service_role;
+    end if;
+end;
+$$;
@@ -0,0 +1,115 @@
+-- 0011_market_data_shared.sql
+-- Camada compartilhada (sem dono) com os dados brutos dos provedores. Usuários
+-- diferentes que analisam o mesmo termo na mesma localização reaproveitam a
+-- busca do Places e o geocode enquanto estiverem dentro da validade; o
+-- geocode é reaproveitado também entre termos diferentes na mesma localização.
+-- As séries do Google Trends já são compartilhadas por palavra-chave em
+-- trends_series (0006). O que é do usuário (a análise da IA, os KPIs) continua
+-- em snapshots_dados/kpi_history.
+--
+-- Atenção: snapshots_dados e kpi_history NÃO têm RLS por dono. O app usa um só
+-- cliente Supabase por processo, autenticado como o último usuário que entrou,
+-- e uma política por auth.uid() barraria as sessões dos outros usuários. O
+-- isolamento hoje é só do app (db_utils filtra por user_id em
+-- get_latest_snapshot/get_kpi_history); quem chama a API do Supabase direto
+-- com um token válido ainda consegue ler essas linhas. A RLS depende de um
+-- cliente por sessão.
+
+create table if not exists public.market_data_shared (
+    id bigint generated by default as identity primary key,
+    -- termo e localização normalizados (minúsculas, sem acentos e sem pontuação)
+    termo_norm text not null,
+    localizacao_norm text not null,
+    competidores jsonb,
+    places_fetched_at timestamptz,
+    -- {location_geocode, location_state}
+    geocode jsonb,
+    geocode_fetched_at timestamptz,
+    created_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    unique (termo_norm, localizacao_norm)
+);
+
+-- get_shared_geocode: where localizacao_norm = ? and geocode_fetched_at >= ? order by geocode_fetched_at desc limit 1
+create index if not exists market_data_shared_localizacao_idx
+    on public.market_data_shared (localizacao_norm, geocode_fetched_at desc);
+
+alter table public.snapshots_dados
+    add column if not exists shared_data_id bigint references public.market_data_shared (id) on delete set null;
+
+-- Dados brutos são públicos para qualquer usuário logado (vêm do Places/Geocoding, não de quem pediu).
+-- Não há política de escrita: os clientes gravam só por save_market_data_shared.
+alter table public.market_data_shared enable row level security;
+drop policy if exists market_data_shared_read on public.market_data_shared;
+create policy market_data_shared_read on public.market_data_shared
+    for select using (auth.uid() is not null);
+
+-- Grava o resultado do Places e/ou o geocode de uma busca. Cada parte só é
+-- gravada se a da linha estiver ausente ou vencida (mesmos prazos de db_utils:
+-- 24 horas para o Places, 90 dias para o geocode). Assim um usuário não
+-- sobrescreve dados válidos que outros estão reaproveitando; o formato também
+-- é conferido antes de gravar. Retorna {id, places_stored, geocode_stored}:
+-- quem enviou dados que não foram gravados não deve apontar para esta linha.
+drop function if exists public.save_market_data_shared(text, text, jsonb, jsonb);
+create function public.save_market_data_shared(
+    p_termo_norm text,
+    p_localizacao_norm text,
+    p_competidores jsonb default null,
+    p_geocode jsonb default null
+)
+returns jsonb
+language plpgsql
+security definer
+set search_path = public
+as $$
+declare
+    v_row public.market_data_shared;
+begin
+    if p_competidores is not null
+       and (jsonb_typeof(p_competidores) <> 'array' or jsonb_array_length(p_competidores) > 20) then
+        raise exception 'competidores inválidos';
+    end if;
+    if p_geocode is not null and jsonb_typeof(p_geocode) <> 'object' then
+        raise exception 'geocode inválido';
+    end if;
+
+    insert into public.market_data_shared as m
+        (termo_norm, localizacao_norm, competidores, places_fetched_at, geocode, geocode_fetched_at)
+    values (
+        p_termo_norm, p_localizacao_norm,
+        p_competidores, case when p_competidores is not null then now() end,
+        p_geocode, case when p_geocode is not null then now() end
+    )
+    on conflict (termo_norm, localizacao_norm) do update
+        set competidores = case when p_competidores is not null
+                                 and (m.places_fetched_at is null or m.places_fetched_at < now() - interval '24 hours')
+                                then excluded.competidores else m.competidores end,
+            places_fetched_at = case when p_competidores is not null
+                                      and (m.places_fetched_at is null or m.places_fetched_at < now() - interval '24 hours')
+                                     then now() else m.places_fetched_at end,
+            geocode = case when p_geocode is not null
+                            and (m.geocode_fetched_at is null or m.geocode_fetched_at < now() - interval '90 days')
+                           then excluded.geocode else m.geocode end,
+            geocode_fetched_at = case when p_geocode is not null
+                                       and (m.geocode_fetched_at is null or m.geocode_fetched_at < now() - interval '90 days')
+                                      then now() else m.geocode_fetched_at end,
+            updated_at = now()
+    returning m.* into v_row;
+    -- now() é o início da transação: o horário bate só com o que esta chamada gravou
+    return jsonb_build_object(
+        'id', v_row.id,
+        'places_stored', p_competidores is not null and v_row.places_fetched_at = now(),
+        'geocode_stored', p_geocode is not null and v_row.geocode_fetched_at = now()
+    );
+end;
+$$;
+
+-- anon/authenticated/service_role só existem no Supabase; no Postgres local a função fica com as permissões padrão
+do $$
+begin
+    if exists (select 1 from pg_roles where rolname = 'anon') then
+        revoke execute on function public.save_market_data_shared(text, text, jsonb, jsonb) from public, anon;
+        grant execute on function public.save_market_data_shared(text, text, jsonb, jsonb) to authenticated, service_role;
+    end if;
+end;
+$$;
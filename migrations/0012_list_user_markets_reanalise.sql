@@ -0,0 +1,63 @@
+-- 0012_list_user_markets_reanalise.sql
+-- list_user_markets passa a devolver a cadência da reanálise automática (0009),
+-- que o seletor da página de detalhes lê da linha do mercado. O tipo de retorno
+-- muda, então a função é recriada em vez de substituída.
+
+drop function if exists public.list_user_markets(uuid, text, text, timestamptz, bigint, integer);
+
+-- Mesmo corpo de 0004, com as duas colunas novas no fim.
+-- security invoker: as políticas de RLS de mercados_monitorados continuam valendo.
+create function public.list_user_markets(
+    p_user_id uuid,
+    p_search text default null,
+    p_sort text default 'ultima_analise',
+    p_after_ts timestamptz default null,
+    p_after_id bigint default null,
+    p_limit integer default 20
+)
+returns table (
+    id bigint,
+    termo text,
+    localizacao text,
+    tipo_negocio text,
+    created_at timestamptz,
+    last_analysis_at timestamptz,
+    sort_ts timestamptz,
+    auto_reanalysis_days integer,
+    next_auto_analysis_at timestamptz
+)
+language plpgsql
+stable
+set search_path = public
+as $$
+declare
+    padrao text := case
+        when coalesce(btrim(p_search), '') = '' then null
+        else '%' || replace(replace(replace(btrim(p_search), '\', '\\'), '%', '\%'), '_', '\_') || '%'
+    end;
+begin
+    if p_sort = 'criacao' then
+        return query
+        select m.id, m.termo, m.localizacao, m.tipo_negocio, m.created_at, m.last_analysis_at, m.created_at,
+               m.auto_reanalysis_days, m.next_auto_analysis_at
+        from public.mercados_monitorados m
+        where m.user_id = p_user_id
+          and (padrao is null or (m.termo || ' ' || m.localizacao) ilike padrao)
+          and (p_after_id is null or (m.created_at, m.id) < (p_after_ts, p_after_id))
+        order by m.created_at desc, m.id desc
+        limit p_limit;
+    else
+        return query
+        select m.id, m.termo, m.localizacao, m.tipo_negocio, m.created_at, m.last_analysis_at,
+               coalesce(m.last_analysis_at, '-infinity'::timestamptz),
+               m.auto_reanalysis_days, m.next_auto_analysis_at
+        from public.mercados_monitorados m
+        where m.user_id = p_user_id
+          and (padrao is null or (m.termo || ' ' || m.localizacao) ilike padrao)
+          and (p_after_id is null
+               or (coalesce(m.last_analysis_at, '-infinity'::timestamptz), m.id) < (p_after_ts, p_after_id))
+        order by coalesce(m.last_analysis_at, '-infinity'::timestamptz) desc, m.id desc
+        limit p_limit;
+    end if;
+end;
+$$;
@@ -0,0 +1,120 @@
+# pdf_optimize.py
+#
+# Etapa de otimização do relatório PDF, aplicada ao contexto antes da
+# renderização (vale para todos os backends):
+# - imagens redimensionadas para TARGET_DPI no tamanho em que aparecem no
+#   relatório, com a transparência achatada sobre fundo branco (sem SMask);
+# - fotos/mapas recomprimidos em JPEG, embutidos sem reencode (DCTDecode);
+# - streams gravados em binário: o reportlab usa ASCII85 por padrão, que
+#   aumenta cada stream em ~25%. O reportlab só tem essa opção global
+#   (rl_config.useA85, lida enquanto o PDF é escrito), então ela vale apenas
+#   durante as renderizações do relatório (binary_streams) e depois volta.
+# As fontes do relatório são as base-14 (Helvetica), que não são embutidas;
+# fontes TrueType registradas no reportlab já são sempre subconjuntos.
+
+import base64
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+
+from reportlab import rl_config
+
+TARGET_DPI = int(os.environ.get("RADAR_PDF_DPI", 150))
+JPEG_QUALITY = 80
+ENABLED = os.environ.get("RADAR_PDF_OPTIMIZE", "1") != "0"
+
+# Chave do contexto -> (largura exibida no relatório em polegadas, formato de saída).
+# Larguras conforme template.html (px CSS a 96 por polegada).
+IMAGE_TARGETS = {
+    'logo_base64': (150 / 96, 'PNG'),
+    'sentiment_chart_b64': (500 / 96, 'PNG'),
+    'static_map_url': (600 / 96, 'JPEG'),
+}
+
+IMAGE_CACHE_SIZE = 64
+
+_a85_lock = threading.Lock()
+_a85_users = 0
+_a85_saved = None
+
+@contextmanager
+def binary_streams():
+    """Desliga o ASCII85 do reportlab só enquanto há renderizações do relatório em andamento."""
+    global _a85_users, _a85_saved
+    if not ENABLED:
+        yield; return
+    with _a85_lock:
+        if _a85_users == 0:
+            _a85_saved, rl_config.useA85 = rl_config.useA85, 0
+        _a85_users += 1
+    try:
+        yield
+    finally:
+        with _a85_lock:
+            _a85_users -= 1
+            if _a85_users == 0:
+                rl_config.useA85 = _a85_saved
+
+# Cache das imagens otimizadas, indexado pelo hash do Base64 de entrada (o logo sozinho tem ~1,9 MB)
+_image_cache: OrderedDict[tuple, str] = OrderedDict()
+_image_cache_lock = threading.Lock()
+
+def _optimize_image(b64: str, max_width_px: int, fmt: str) -> str:
+    key = (hashlib.sha256(b64.encode("ascii", "ignore")).hexdigest(), max_width_px, fmt)
+    with _image_cache_lock:
+        if key in _image_cache:
+            _image_cache.move_to_end(key)
+            return _image_cache[key]
+    result = _encode_image(b64, max_width_px, fmt)
+    with _image_cache_lock:
+        _image_cache[key] = result
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+    return result
+
+def _encode_image(b64: str, max_width_px: int, fmt: str) -> str:
+    from PIL import Image
+
+    is_data_uri = b64.startswith("data:")
+    raw = base64.b64decode(b64.split(",", 1)[1] if is_data_uri else b64)
+    image = Image.open(BytesIO(raw))
+    image.load()
+    if image.width > max_width_px:
+        height = round(image.height * max_width_px / image.width)
+        image = image.resize((max_width_px, height), Image.LANCZOS)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        image = background
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+
+    out = BytesIO()
+    if fmt == "JPEG":
+        image.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=False)
+    else:
+        image.save(out, format="PNG", optimize=True)
+    encoded = base64.b64encode(out.getvalue()).decode("utf-8")
+    return f"data:image/{fmt.lower()};base64,{encoded}" if is_data_uri else encoded
+
+def optimize_report_context(context: dict) -> dict:
+    """Retorna uma cópia do contexto com as imagens otimizadas para o PDF."""
+    if not ENABLED:
+        return context
+    optimized = dict(context)
+    for key, (width_in, fmt) in IMAGE_TARGETS.items():
+        value = optimized.get(key)
+        if not value:
+            continue
+        # Logo e gráfico entram no template como PNG fixo; apenas o mapa (data URI) pode mudar de formato.
+        if fmt == "JPEG" and not value.startswith("data:"):
+            fmt = "PNG"
+        try:
+            optimized[key] = _optimize_image(value, int(width_in * TARGET_DPI), fmt)
+        except Exception as e:
+            print(f"Erro ao otimizar imagem '{key}' do relatório: {e}")
+    return optimized
@@ -0,0 +1,140 @@
+# pdf_reportlab.py
+#
+# Backend de PDF que desenha o relatório direto com o reportlab (platypus),
+# sem passar por HTML/CSS. Recebe o mesmo contexto que o template.html e
+# reproduz o mesmo layout: cabeçalho, seções, gráfico, mapa e dossiês.
+
+import base64
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Image, KeepTogether, ListFlowable, ListItem, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+import report_charts
+
+PRIMARY = colors.HexColor("#005f73")
+SECONDARY = colors.HexColor("#0a9396")
+TEXT = colors.HexColor("#333333")
+MUTED = colors.HexColor("#888888")
+BORDER = colors.HexColor("#e0e0e0")
+
+STYLES = {
+    "body": ParagraphStyle("body", fontName="Helvetica", fontSize=10, leading=15, textColor=TEXT),
+    "h1": ParagraphStyle("h1", fontName="Helvetica-Bold", fontSize=24, leading=28, textColor=PRIMARY, spaceAfter=4),
+    "h2": ParagraphStyle("h2", fontName="Helvetica-Bold", fontSize=16, leading=20, textColor=SECONDARY, spaceBefore=18, spaceAfter=8),
+    "h4": ParagraphStyle("h4", fontName="Helvetica-Bold", fontSize=12, leading=15, textColor=TEXT, spaceAfter=4),
+    "subtitle": ParagraphStyle("subtitle", fontName="Helvetica", fontSize=12, leading=16, textColor=colors.HexColor("#555555"), spaceAfter=12),
+}
+
+def _p(text, style="body"):
+    return Paragraph(escape(str(text if text is not None else "N/A")), STYLES[style])
+
+def _image_from_base64(b64: str, max_width: float):
+    """Flowable de imagem a partir de Base64 (aceita data URI), limitado à largura pedida."""
+    if not b64: return None
+    if b64.startswith("data:"): b64 = b64.split(",", 1)[1]
+    raw = BytesIO(base64.b64decode(b64))
+    width, height = ImageReader(raw).getSize()
+    raw.seek(0)
+    scale = min(1.0, max_width / width)
+    return Image(raw, width=width * scale, height=height * scale)
+
+def _sentiment_chart(sentimentos: dict, width: float):
+    """Gráfico de barras dos sentimentos desenhado em vetor, no lugar do PNG do matplotlib."""
+    if not sentimentos or not isinstance(sentimentos, dict): return None
+    try:
+        labels = [str(label) for label in sentimentos]
+        values = [float(value) for value in sentimentos.values()]
+    except (TypeError, ValueError):
+        return None
+    height = width * 0.6
+    drawing = Drawing(width, height)
+    chart = VerticalBarChart()
+    chart.x, chart.y, chart.width, chart.height = 40, 25, width - 55, height - 45
+    chart.data = [values]
+    chart.categoryAxis.categoryNames = labels
+    chart.categoryAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.valueMin, chart.valueAxis.valueMax, chart.valueAxis.valueStep = 0, 105, 20
+    chart.valueAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = BORDER
+    chart.bars.strokeColor = None
+    for i, label in enumerate(labels):
+        chart.bars[(0, i)].fillColor = colors.HexColor(report_charts.SENTIMENT_COLORS.get(label, report_charts.DEFAULT_COLOR))
+    chart.barLabelFormat = "%d"
+    chart.barLabels.nudge = 7
+    chart.barLabels.fontName = "Helvetica"
+    drawing.add(chart)
+    return drawing
+
+def _heading_rule():
+    rule = Table([[""]], colWidths=["100%"], rowHeights=[2])
+    rule.setStyle(TableStyle([("LINEABOVE", (0, 0), (-1, -1), 2, PRIMARY)]))
+    return rule
+
+def _footer(text):
+    def draw(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 8); canvas.setFillColor(MUTED)
+        canvas.drawCentredString(doc.pagesize[0] / 2, 0.5 * inch, text)
+        canvas.restoreState()
+    return draw
+
+def render(context: dict, sections: set) -> bytes:
+    """Renderiza o PDF. `sections` indica as seções opcionais da variante ('mapa', 'dossies')."""
+    buf = BytesIO()
+    doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=0.75 * inch, rightMargin=0.75 * inch, topMargin=0.75 * inch, bottomMargin=0.75 * inch,
+                            title=f"Análise de Mercado: {context.get('termo_busca', 'N/A')}", author="Radar Pro")
+    frame_width = doc.width
+    story = []
+
+    logo = _image_from_base64(context.get('logo_base64'), 1.5 * inch)
+    if logo: story += [logo, Spacer(1, 14)]
+    story += [_p(f"Análise de Mercado: {context.get('termo_busca', 'N/A')}", "h1"), _heading_rule(),
+              Paragraph(f"<b>Localização:</b> {escape(str(context.get('localizacao_busca', 'N/A')))}", STYLES["subtitle"])]
+
+    story += [_p("Sumário Executivo", "h2"), _p(context.get('sumario'))]
+
+    if context.get('plano_acao'):
+        story += [_p("Plano de Ação Sugerido", "h2"),
+                  ListFlowable([ListItem(_p(passo), leftIndent=12) for passo in context['plano_acao']], bulletType="bullet", leftIndent=12)]
+
+    chart_width = min(frame_width * 0.8, 5.2 * inch)
+    chart = _image_from_base64(context.get('sentiment_chart_b64'), chart_width) or _sentiment_chart(context.get('sentimentos'), chart_width)
+    if chart:
+        chart.hAlign = "CENTER"
+        story.append(KeepTogether([_p("Análise de Sentimentos", "h2"), chart]))
+
+    demografia = context.get('demografia')
+    if demografia:
+        story += [_p("Análise Demográfica", "h2"), _p(demografia.get('resumo'))]
+
+    if "mapa" in sections and context.get('static_map_url'):
+        mapa = _image_from_base64(context['static_map_url'], min(frame_width, 6.25 * inch))
+        if mapa:
+            story += [PageBreak(), _p("Mapa da Concorrência", "h2"), mapa, Spacer(1, 12), _p("Legenda", "h4")]
+            story += [Paragraph(f"<b>{i + 1}:</b> {escape(str(c.get('name')))}", STYLES["body"]) for i, c in enumerate(context.get('competidores_lista', []))]
+
+    if "dossies" in sections and context.get('dossies'):
+        story += [PageBreak(), _p("Dossiês dos Concorrentes", "h2")]
+        for d in context['dossies']:
+            card = Table([[[
+                _p(d.get('nome', 'N/A'), "h4"),
+                Paragraph(f"<b>Posicionamento:</b> {escape(str(d.get('posicionamento_mercado', 'N/A')))}", STYLES["body"]),
+                Paragraph(f"<b>Pontos Fortes:</b> {escape(str(d.get('pontos_fortes', 'N/A')))}", STYLES["body"]),
+                Paragraph(f"<b>Pontos Fracos:</b> {escape(str(d.get('pontos_fracos', 'N/A')))}", STYLES["body"]),
+            ]]], colWidths=[frame_width])
+            card.setStyle(TableStyle([("BOX", (0, 0), (-1, -1), 1, BORDER), ("LEFTPADDING", (0, 0), (-1, -1), 15), ("RIGHTPADDING", (0, 0), (-1, -1), 15),
+                                      ("TOPPADDING", (0, 0), (-1, -1), 12), ("BOTTOMPADDING", (0, 0), (-1, -1), 12)]))
+            story += [Spacer(1, 15), KeepTogether(card)]
+
+    footer = _footer(f"Relatório gerado por Radar Pro | {context.get('data_geracao', '')}")
+    doc.build(story, onFirstPage=footer, onLaterPages=footer)
+    return buf.getvalue()
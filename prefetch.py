@@ -0,0 +1,55 @@
+# prefetch.py
+#
+# Aquecimento do cache logo após o login. As consultas que o dashboard e o
+# primeiro "Ver Detalhes" fariam em sequência são disparadas em paralelo e
+# caem no st.cache_data, de onde a primeira renderização passa a ler.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import db_utils
+
+MAX_WORKERS = 6
+# Quantos mercados do topo da lista têm o snapshot mais recente pré-carregado
+PREFETCH_MARKETS = 5
+# Tempo máximo que o login espera pelo aquecimento; o que já foi agendado termina em segundo plano
+WAIT_SECONDS = 3.0
+
+def _attach_ctx(ctx):
+    # Sem o contexto da sessão, st.error dentro das funções cacheadas não teria onde aparecer.
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+def _prefetch_market_details(market_id: int, user_id: str):
+    db_utils.get_latest_snapshot(market_id, user_id)
+    db_utils.get_kpi_history(market_id, user_id)
+
+def _prefetch_markets(executor: ThreadPoolExecutor, user_id: str) -> list:
+    """Carrega a primeira página da lista e agenda os detalhes dos mercados do topo."""
+    page, _ = db_utils.list_user_markets(user_id, "", 'ultima_analise', None)
+    futures = []
+    for market in page[:PREFETCH_MARKETS]:
+        try:
+            futures.append(executor.submit(_prefetch_market_details, market['id'], user_id))
+        except RuntimeError:
+            break  # o login já desistiu de esperar e encerrou o executor
+    return futures
+
+def warm_dashboard_cache(user_id: str, wait_seconds: float = WAIT_SECONDS):
+    """Dispara o aquecimento em paralelo e espera no máximo `wait_seconds` por ele."""
+    deadline = time.monotonic() + wait_seconds
+    executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="radar-prefetch", initializer=_attach_ctx, initargs=(get_script_run_ctx(),))
+    try:
+        # A lista completa (get_user_markets) só é usada na exportação em lote e fica para quando ela for aberta
+        futures = [executor.submit(db_utils.get_platform_setting, 'daily_analysis_limit')]
+        markets_future = executor.submit(_prefetch_markets, executor, user_id)
+        done, _ = wait(futures + [markets_future], timeout=wait_seconds)
+        if markets_future in done and not markets_future.exception():
+            wait(markets_future.result(), timeout=max(deadline - time.monotonic(), 0))
+    except Exception as e:
+        print(f"Erro no pré-carregamento do dashboard: {e}")
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,42 @@
+# report_cache.py
+#
+# Cache persistente (em disco) dos PDFs gerados, indexado por
+# (id do snapshot, versão do template). Um snapshot nunca muda depois de
+# salvo, então o mesmo par sempre produz o mesmo relatório.
+
+import os
+import tempfile
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get("RADAR_CACHE_DIR", ".cache")) / "reports"
+
+def _cache_path(snapshot_id, template_version: str) -> Path:
+    return CACHE_DIR / f"snapshot_{snapshot_id}_{template_version}.pdf"
+
+def get_cached_pdf(snapshot_id, template_version: str) -> bytes | None:
+    """Retorna os bytes do PDF em cache, ou None se ainda não foi gerado."""
+    try:
+        return _cache_path(snapshot_id, template_version).read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"Erro ao ler PDF do cache: {e}")
+        return None
+
+def store_pdf(snapshot_id, template_version: str, pdf_bytes: bytes) -> None:
+    """Grava o PDF de forma atômica (arquivo temporário + rename)."""
+    tmp_path = None
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(pdf_bytes)
+        os.replace(tmp_path, _cache_path(snapshot_id, template_version))
+        tmp_path = None
+    except OSError as e:
+        print(f"Erro ao gravar PDF no cache: {e}")
+    finally:
+        # Falha no meio da escrita: não deixa o .tmp para trás
+        if tmp_path:
+            try: os.unlink(tmp_path)
+            except OSError: pass
@@ -0,0 +1,45 @@
+# report_charts.py
+#
+# Gráficos embutidos no relatório PDF. Usa a API orientada a objetos do
+# matplotlib (Figure + canvas Agg), sem pyplot e sem estado global, com o
+# import feito só na primeira renderização. Resultados são memoizados pelos
+# valores de entrada.
+
+import base64
+from functools import lru_cache
+from io import BytesIO
+
+SENTIMENT_COLORS = {'Positivo': '#2ca02c', 'Negativo': '#d62728', 'Neutro': '#ffaa00'}
+DEFAULT_COLOR = '#7f7f7f'
+
+@lru_cache(maxsize=256)
+def _render_sentiment_png(items: tuple) -> bytes:
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    labels = [label for label, _ in items]
+    values = [value for _, value in items]
+    fig = Figure(figsize=(6, 4), dpi=100)
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    bars = ax.bar(labels, values, color=[SENTIMENT_COLORS.get(s, DEFAULT_COLOR) for s in labels])
+    ax.set_title('Análise de Sentimentos', fontsize=16, weight='bold', color='#333')
+    ax.set_ylabel('Pontuação (0-100)', fontsize=12); ax.set_ylim(0, 105)
+    ax.grid(axis='y', color='#e5e5e5'); ax.set_axisbelow(True)
+    ax.spines['top'].set_visible(False); ax.spines['right'].set_visible(False)
+    for bar in bars:
+        yval = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2.0, yval + 1, int(yval), va='bottom', ha='center')
+    buf = BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight', transparent=True)
+    return buf.getvalue()
+
+def sentiment_chart_base64(sentimentos: dict) -> str:
+    """Gráfico de barras dos sentimentos como PNG em Base64 ('' se não houver dados)."""
+    if not sentimentos or not isinstance(sentimentos, dict): return ""
+    try:
+        items = tuple((str(label), float(value)) for label, value in sentimentos.items())
+        return base64.b64encode(_render_sentiment_png(items)).decode('utf-8')
+    except Exception as e:
+        print(f"Erro ao gerar gráfico de sentimentos: {e}")
+        return ""
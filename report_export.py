@@ -0,0 +1,87 @@
+# report_export.py
+#
+# Exportação em lote: renderiza os PDFs de vários mercados no pool de
+# processos (report_pool) e grava cada um no ZIP assim que fica pronto.
+# Apenas os PDFs em andamento ficam em memória; o ZIP é escrito em disco.
+
+import os
+import re
+import tempfile
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, wait
+from pathlib import Path
+
+import db_utils
+import report_pool
+import report_templates
+
+EXPORTS_DIR = Path(os.environ.get("RADAR_CACHE_DIR", ".cache")) / "exports"
+# Arquivos de exportação mais antigos que isso são apagados na próxima exportação.
+EXPORT_MAX_AGE_SECONDS = 3600
+# Quantos relatórios desta exportação podem estar no pool ao mesmo tempo.
+MAX_IN_FLIGHT = report_pool.MAX_WORKERS
+
+def _slugify(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "_", text).strip("_")[:40] or "mercado"
+
+def _cleanup_old_exports():
+    if not EXPORTS_DIR.exists(): return
+    cutoff = time.time() - EXPORT_MAX_AGE_SECONDS
+    for path in EXPORTS_DIR.glob("*.zip"):
+        try:
+            if path.stat().st_mtime < cutoff: path.unlink()
+        except OSError:
+            pass
+
+def build_reports_zip(markets: list, maps_api_key: str, on_progress=None, variant: str = report_templates.DEFAULT_VARIANT):
+    """Gera um ZIP com o relatório mais recente de cada mercado.
+
+    `on_progress(concluidos, total, nome_do_mercado)` é chamado a cada PDF
+    finalizado. Retorna (caminho_do_zip, lista_de_falhas).
+    """
+    _cleanup_old_exports()
+    EXPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    fd, zip_path = tempfile.mkstemp(dir=EXPORTS_DIR, prefix="relatorios_", suffix=".zip")
+    os.close(fd)
+
+    pending = []
+    failures = []
+    for index, market in enumerate(markets, start=1):
+        snapshot = db_utils.get_latest_snapshot(market['id'], market['user_id'])
+        if snapshot:
+            filename = f"{index:02d}_{_slugify(market.get('termo'))}_{_slugify(market.get('localizacao'))}.pdf"
+            pending.append((filename, market, snapshot))
+        else:
+            failures.append(f"{market.get('termo', 'N/A')}: sem análise salva")
+
+    total = len(pending)
+    done = 0
+    in_flight = {}
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zip_file:
+        # PDFs já são comprimidos internamente; ZIP_STORED evita gastar CPU à toa.
+        while pending or in_flight:
+            while pending and len(in_flight) < MAX_IN_FLIGHT:
+                filename, market, snapshot = pending[0]
+                future = report_pool.submit_report(snapshot, maps_api_key, variant)
+                if future is None:
+                    break  # fila global cheia: espera um dos nossos terminar
+                in_flight[future] = (filename, market)
+                pending.pop(0)
+            if not in_flight:
+                time.sleep(0.5); continue
+
+            finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for future in finished:
+                filename, market = in_flight.pop(future)
+                pdf_bytes, error = report_pool.wait_for_report(future, timeout=0)
+                if pdf_bytes:
+                    zip_file.writestr(filename, pdf_bytes)
+                else:
+                    failures.append(f"{market.get('termo', 'N/A')}: {error}")
+                done += 1
+                if on_progress:
+                    on_progress(done, total, market.get('termo', 'N/A'))
+    return zip_path, failures
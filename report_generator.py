@@ -1,109 +1,128 @@
 # report_generator.py
 
 import streamlit as st
-import base64
+import os
 from io import BytesIO
-from xhtml2pdf import pisa
-import matplotlib.pyplot as plt
-import pandas as pd
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from jinja2 import Environment, FileSystemLoader
+import pdf_optimize
+import report_cache
+import report_charts
+import report_templates
+import static_maps
 
-def image_to_base64(path):
-    """Converte uma imagem local para uma string Base64 para embutir no HTML."""
+# --- Backends de PDF ---
+# Cada backend recebe o contexto do relatório e a variante e devolve os bytes do PDF.
+
+def _render_with_xhtml2pdf(context: dict, variant: str) -> bytes:
+    # Importado só aqui: quem usa apenas o backend reportlab não carrega a pilha do xhtml2pdf
+    from xhtml2pdf import pisa
+    html_out = report_templates.render_report_html(context, variant)
+    pdf_bytes = BytesIO()
+    pisa_status = pisa.CreatePDF(BytesIO(html_out.encode('UTF-8')), dest=pdf_bytes)
+    if pisa_status.err:
+        print(f"Erro PDF: {pisa_status.err}")
+        raise RuntimeError("Ocorreu um erro ao renderizar o PDF.")
+    return pdf_bytes.getvalue()
+
+def _render_with_reportlab(context: dict, variant: str) -> bytes:
+    import pdf_reportlab
+    return pdf_reportlab.render(context, report_templates.variant_sections(variant))
+
+PDF_BACKENDS = {
+    'xhtml2pdf': _render_with_xhtml2pdf,
+    'reportlab': _render_with_reportlab,
+}
+# Backend padrão por tipo de relatório; RADAR_PDF_BACKEND força um backend para todos.
+BACKEND_BY_VARIANT = {
+    'completo': 'xhtml2pdf',
+    'resumido': 'reportlab',
+}
+FORCED_BACKEND = os.environ.get("RADAR_PDF_BACKEND")
+# Backends que desenham o gráfico de sentimentos por conta própria (sem o PNG do matplotlib)
+NATIVE_CHART_BACKENDS = {'reportlab'}
+
+def get_backend_name(variant: str, backend: str | None = None) -> str:
+    name = backend or FORCED_BACKEND or BACKEND_BY_VARIANT.get(variant, 'xhtml2pdf')
+    if name not in PDF_BACKENDS:
+        raise ValueError(f"Backend de PDF desconhecido: {name}")
+    return name
+
+def _artifact_version(variant: str, backend: str | None = None) -> str:
+    return f"{report_templates.get_template_version(variant)}-{get_backend_name(variant, backend)}"
+
+def build_report_context(data: dict, maps_api_key: str, variant: str = report_templates.DEFAULT_VARIANT, generated_at: datetime | None = None, chart_image: bool = True) -> dict:
+    """Contexto do relatório, comum a todos os backends. `generated_at` é a data impressa no relatório (padrão: agora).
+
+    Com `chart_image=False` o gráfico de sentimentos não é renderizado pelo matplotlib;
+    o backend recebe só os valores ('sentimentos') e desenha o gráfico.
+    """
+    competidores = data.get('competidores', [])
+    # O download do mapa (I/O) roda em paralelo com o gráfico (CPU); o resultado entra no relatório como data URI.
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        map_future = prefetch.submit(static_maps.get_static_map_data_uri, competidores, maps_api_key) if report_templates.variant_includes(variant, 'mapa') else None
+        sentiment_chart_b64 = report_charts.sentiment_chart_base64(data.get('analise_sentimentos', {})) if chart_image else ""
+        static_map_uri = map_future.result() if map_future else ""
+
+    # Logo e demais recursos estáticos são adicionados por report_templates / pelo backend
+    return {
+        'termo_busca': data.get('termo_busca', 'N/A'),
+        'localizacao_busca': data.get('localizacao_busca', 'N/A'),
+        'sumario': data.get('sumario_executivo', 'N/A'),
+        'plano_acao': data.get('plano_de_acao', []),
+        'demografia': data.get('analise_demografica', {}),
+        'dossies': data.get('dossies_concorrentes', []),
+        'data_geracao': (generated_at or datetime.now()).strftime('%d/%m/%Y'),
+        'sentiment_chart_b64': sentiment_chart_b64,
+        'sentimentos': data.get('analise_sentimentos', {}),
+        'static_map_url': static_map_uri,
+        'competidores_lista': competidores # Lista para a legenda do mapa
+    }
+
+def render_pdf_bytes(data: dict, maps_api_key: str, variant: str = report_templates.DEFAULT_VARIANT, backend: str | None = None, generated_at: datetime | None = None) -> bytes:
+    """Monta o contexto e renderiza o PDF. Não usa Streamlit: pode rodar em um processo de report_pool."""
+    name = get_backend_name(variant, backend)
+    render = PDF_BACKENDS[name]
+    context = build_report_context(data, maps_api_key, variant, generated_at, chart_image=name not in NATIVE_CHART_BACKENDS)
+    # Os recursos estáticos entram no contexto aqui para também passarem pela otimização.
+    context = pdf_optimize.optimize_report_context({**report_templates.get_static_assets(), **context})
+    with pdf_optimize.binary_streams():
+        return render(context, variant)
+
+def snapshot_date(snapshot: dict) -> datetime | None:
     try:
-        with open(path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
-    except FileNotFoundError:
-        print(f"Arquivo de imagem não encontrado em: {path}")
+        return datetime.fromisoformat(snapshot['data_snapshot'].replace('Z', '+00:00'))
+    except (KeyError, AttributeError, ValueError):
         return None
 
-def get_static_map_url(competidores, api_key):
-    """Gera a URL para um mapa estático com marcadores para os concorrentes."""
-    if not api_key or not competidores:
-        return ""
-
-    base_url = "https://maps.googleapis.com/maps/api/staticmap?"
-    params = {"size": "600x400", "maptype": "roadmap", "key": api_key}
-    
-    markers = []
-    # Limita o número de marcadores para não exceder o limite de URL da API
-    for i, comp in enumerate(competidores[:18]):
-        lat = comp.get('latitude')
-        lon = comp.get('longitude')
-        if lat and lon:
-            # Usando números para os labels para economizar espaço
-            markers.append(f"color:red|label:{i+1}|{lat},{lon}")
-
-    if markers:
-        params["markers"] = markers
+def render_snapshot_pdf(snapshot: dict, maps_api_key: str, variant: str = report_templates.DEFAULT_VARIANT) -> bytes:
+    """Retorna o PDF do snapshot, gerando e gravando no cache em disco apenas se necessário."""
+    snapshot_id = snapshot.get('id')
+    cached_pdf = get_cached_report_pdf(snapshot_id, variant)
+    if cached_pdf:
+        return cached_pdf
+    # O PDF fica em cache para o snapshot: a data impressa é a do snapshot, não a da primeira renderização
+    pdf_bytes = render_pdf_bytes(snapshot.get('dados_json', {}), maps_api_key, variant, generated_at=snapshot_date(snapshot))
+    if snapshot_id is not None:
+        report_cache.store_pdf(snapshot_id, _artifact_version(variant), pdf_bytes)
+    return pdf_bytes
 
+def gerar_relatorio_pdf(data: dict, maps_api_key: str, variant: str = report_templates.DEFAULT_VARIANT):
+    """Gera o relatório PDF na variante pedida, incluindo o logo e o mapa estático."""
     try:
-        request = requests.Request('GET', base_url, params=params).prepare()
-        # Retorna a URL pronta para ser usada na tag <img>
-        return request.url
+        return render_pdf_bytes(data, maps_api_key, variant)
     except Exception as e:
-        print(f"Erro ao criar URL do mapa estático: {e}")
-        return ""
+        st.error(f"Erro ao preparar o relatório PDF: {e}")
+        return None
 
-def generate_sentiment_chart_base64(sentimentos):
-    # ... (código desta função permanece o mesmo)
-    if not sentimentos or not isinstance(sentimentos, dict): return ""
-    try:
-        df = pd.DataFrame(list(sentimentos.items()), columns=['Sentimento', 'Pontuação'])
-        plt.style.use('seaborn-v0_8-whitegrid')
-        fig, ax = plt.subplots(figsize=(6, 4))
-        colors = {'Positivo': '#2ca02c', 'Negativo': '#d62728', 'Neutro': '#ffaa00'}
-        bar_colors = [colors.get(s, '#7f7f7f') for s in df['Sentimento']]
-        bars = ax.bar(df['Sentimento'], df['Pontuação'], color=bar_colors)
-        ax.set_title('Análise de Sentimentos', fontsize=16, weight='bold', color='#333')
-        ax.set_ylabel('Pontuação (0-100)', fontsize=12); ax.set_ylim(0, 105)
-        ax.spines['top'].set_visible(False); ax.spines['right'].set_visible(False)
-        for bar in bars:
-            yval = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2.0, yval + 1, int(yval), va='bottom', ha='center')
-        buf = BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', transparent=True); plt.close(fig)
-        buf.seek(0)
-        return base64.b64encode(buf.getvalue()).decode('utf-8')
-    except Exception as e:
-        print(f"Erro ao gerar gráfico de sentimentos: {e}")
-        return ""
+def get_cached_report_pdf(snapshot_id, variant: str = report_templates.DEFAULT_VARIANT):
+    """Retorna o PDF já gerado para o snapshot, sem renderizar nada."""
+    return report_cache.get_cached_pdf(snapshot_id, _artifact_version(variant))
 
-def gerar_relatorio_pdf(data: dict, maps_api_key: str):
-    """Gera o relatório PDF completo, agora incluindo o logo e o mapa estático."""
+def gerar_relatorio_pdf_cached(snapshot: dict, maps_api_key: str, variant: str = report_templates.DEFAULT_VARIANT):
+    """Versão síncrona de render_snapshot_pdf que exibe o erro na página."""
     try:
-        env = Environment(loader=FileSystemLoader('.'))
-        template = env.get_template("template.html")
-        
-        # Prepara o contexto com todos os dados necessários para o template
-        context = {
-            'logo_base64': image_to_base64("logo.png"), # Converte o logo
-            'termo_busca': data.get('termo_busca', 'N/A'),
-            'localizacao_busca': data.get('localizacao_busca', 'N/A'),
-            'sumario': data.get('sumario_executivo', 'N/A'),
-            'plano_acao': data.get('plano_de_acao', []),
-            'demografia': data.get('analise_demografica', {}),
-            'dossies': data.get('dossies_concorrentes', []),
-            'data_geracao': datetime.now().strftime('%d/%m/%Y'),
-            'sentiment_chart_b64': generate_sentiment_chart_base64(data.get('analise_sentimentos', {})),
-            'static_map_url': get_static_map_url(data.get('competidores', []), maps_api_key),
-            'competidores_lista': data.get('competidores', []) # Lista para a legenda do mapa
-        }
-
-        html_out = template.render(context)
-        
-        pdf_bytes = BytesIO()
-        pisa_status = pisa.CreatePDF(BytesIO(html_out.encode('UTF-8')), dest=pdf_bytes)
-
-        if pisa_status.err:
-            st.error("Ocorreu um erro ao renderizar o PDF.")
-            print(f"Erro PDF: {pisa_status.err}")
-            return None
-
-        pdf_bytes.seek(0)
-        return pdf_bytes.getvalue()
+        return render_snapshot_pdf(snapshot, maps_api_key, variant)
     except Exception as e:
         st.error(f"Erro ao preparar o relatório PDF: {e}")
-        return None
\ No newline at end of file
+        return None
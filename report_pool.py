@@ -0,0 +1,107 @@
+# report_pool.py
+#
+# Renderização de PDFs em um pool de processos limitado. xhtml2pdf e
+# matplotlib são CPU-bound e seguram o GIL; rodando em processos separados,
+# um relatório pesado não trava as outras sessões servidas pelo Streamlit.
+
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import streamlit as st
+
+import report_templates
+
+MAX_WORKERS = int(os.environ.get("RADAR_PDF_WORKERS", min(2, os.cpu_count() or 1)))
+# Máximo de relatórios aguardando ou em execução ao mesmo tempo (fila limitada).
+MAX_PENDING = int(os.environ.get("RADAR_PDF_MAX_PENDING", MAX_WORKERS * 4))
+RENDER_TIMEOUT_SECONDS = int(os.environ.get("RADAR_PDF_TIMEOUT", 90))
+
+def _alarm_handler(signum, frame):
+    raise TimeoutError(f"Renderização do PDF excedeu {RENDER_TIMEOUT_SECONDS}s.")
+
+def _render_in_worker(snapshot: dict, maps_api_key: str, variant: str) -> bytes:
+    """Executado no processo filho: interrompe a renderização se passar do tempo limite."""
+    import report_generator
+    use_alarm = hasattr(signal, "setitimer")  # indisponível no Windows
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _alarm_handler)
+        signal.setitimer(signal.ITIMER_REAL, RENDER_TIMEOUT_SECONDS)
+    try:
+        return report_generator.render_snapshot_pdf(snapshot, maps_api_key, variant)
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+class _ReportPool:
+    """Executor de processos com fila limitada e deduplicação de pedidos em andamento."""
+
+    def __init__(self):
+        self._executor = self._new_executor()
+        self._slots = threading.BoundedSemaphore(MAX_PENDING)
+        self._lock = threading.Lock()
+        self._in_flight: dict[tuple, Future] = {}
+
+    @staticmethod
+    def _new_executor() -> ProcessPoolExecutor:
+        # "spawn" evita herdar threads e sockets do servidor Streamlit via fork.
+        return ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit_to_executor(self, *args) -> Future:
+        try:
+            return self._executor.submit(_render_in_worker, *args)
+        except BrokenProcessPool:
+            # Um processo filho morreu (ex.: OOM killer) e o executor não aceita mais tarefas: recria
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+            return self._executor.submit(_render_in_worker, *args)
+
+    def submit(self, snapshot: dict, maps_api_key: str, variant: str) -> Future | None:
+        # Snapshot ainda não salvo (sem id): não há como saber se dois pedidos são o mesmo relatório
+        key = (snapshot['id'], variant) if snapshot.get('id') is not None else None
+        with self._lock:
+            future = self._in_flight.get(key) if key else None
+            if future is not None:
+                return future
+            if not self._slots.acquire(blocking=False):
+                return None
+            try:
+                future = self._submit_to_executor(snapshot, maps_api_key, variant)
+            except BaseException:
+                self._slots.release()
+                raise
+            if key:
+                self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._release(key, f))
+        return future
+
+    def _release(self, key: tuple | None, future: Future):
+        with self._lock:
+            if key and self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        self._slots.release()
+
+@st.cache_resource
+def get_report_pool() -> _ReportPool:
+    """Pool único por processo do servidor, compartilhado entre as sessões."""
+    return _ReportPool()
+
+def submit_report(snapshot: dict, maps_api_key: str, variant: str = report_templates.DEFAULT_VARIANT) -> Future | None:
+    """Agenda a geração do PDF e retorna um Future com os bytes.
+
+    Retorna None se a fila estiver cheia. Pedidos repetidos para o mesmo
+    snapshot/variante enquanto o primeiro ainda roda recebem o mesmo Future.
+    """
+    return get_report_pool().submit(snapshot, maps_api_key, variant)
+
+def wait_for_report(future: Future, timeout: float = RENDER_TIMEOUT_SECONDS + 5):
+    """Aguarda o resultado do Future. Retorna (pdf_bytes, erro)."""
+    try:
+        return future.result(timeout=timeout), None
+    except FutureTimeoutError:
+        return None, "O relatório demorou demais para ser gerado. Tente novamente em instantes."
+    except Exception as e:
+        return None, f"Erro ao preparar o relatório PDF: {e}"
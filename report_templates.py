@@ -0,0 +1,84 @@
+# report_templates.py
+#
+# Ambiente Jinja e recursos estáticos do relatório PDF, criados uma única vez
+# por processo. Em produção os templates são compilados uma vez e o bytecode
+# fica em disco; com RADAR_ENV=dev o Jinja recarrega templates alterados.
+
+import base64
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+TEMPLATES_DIR = Path(__file__).resolve().parent
+BYTECODE_CACHE_DIR = Path(os.environ.get("RADAR_CACHE_DIR", ".cache")) / "jinja"
+IS_DEV = os.environ.get("RADAR_ENV", "").lower() in ("dev", "development")
+
+# Variantes de relatório -> arquivo de template.
+TEMPLATE_VARIANTS = {
+    "completo": "template.html",
+    "resumido": "template_resumido.html",
+}
+DEFAULT_VARIANT = "completo"
+# Seções opcionais exibidas por cada variante (usado também pelos backends que não usam HTML).
+VARIANT_SECTIONS = {
+    "completo": {"mapa", "dossies"},
+    "resumido": set(),
+}
+
+# Chave no contexto do template -> arquivo de imagem embutido em Base64.
+STATIC_ASSETS = {
+    "logo_base64": "logo.png",
+}
+
+# Incrementar quando a lógica de montagem do relatório mudar sem alterar os templates.
+REPORT_TEMPLATE_VERSION = "3"
+
+@lru_cache(maxsize=1)
+def get_environment() -> Environment:
+    """Cria o ambiente Jinja compartilhado por todas as renderizações."""
+    BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    return Environment(
+        loader=FileSystemLoader(str(TEMPLATES_DIR)),
+        bytecode_cache=FileSystemBytecodeCache(str(BYTECODE_CACHE_DIR)),
+        auto_reload=IS_DEV,
+    )
+
+def image_to_base64(path):
+    """Converte uma imagem local para uma string Base64 para embutir no HTML."""
+    try:
+        with open(TEMPLATES_DIR / path, "rb") as image_file:
+            return base64.b64encode(image_file.read()).decode('utf-8')
+    except FileNotFoundError:
+        print(f"Arquivo de imagem não encontrado em: {path}")
+        return None
+
+@lru_cache(maxsize=1)
+def get_static_assets() -> dict:
+    """Lê e codifica os recursos estáticos uma única vez por processo."""
+    return {key: image_to_base64(path) for key, path in STATIC_ASSETS.items()}
+
+@lru_cache(maxsize=None)
+def get_template_version(variant: str = DEFAULT_VARIANT) -> str:
+    """Versão do relatório: versão manual + variante + hash de todos os templates."""
+    digest = hashlib.sha256()
+    for template_name in sorted(set(TEMPLATE_VARIANTS.values())):
+        try:
+            digest.update((TEMPLATES_DIR / template_name).read_bytes())
+        except FileNotFoundError:
+            digest.update(template_name.encode("utf-8"))
+    return f"v{REPORT_TEMPLATE_VERSION}-{variant}-{digest.hexdigest()[:12]}"
+
+def variant_sections(variant: str) -> set:
+    return VARIANT_SECTIONS.get(variant, VARIANT_SECTIONS[DEFAULT_VARIANT])
+
+def variant_includes(variant: str, section: str) -> bool:
+    return section in variant_sections(variant)
+
+def render_report_html(context: dict, variant: str = DEFAULT_VARIANT) -> str:
+    """Renderiza o HTML do relatório na variante pedida, já com os recursos estáticos."""
+    template_name = TEMPLATE_VARIANTS.get(variant, TEMPLATE_VARIANTS[DEFAULT_VARIANT])
+    template = get_environment().get_template(template_name)
+    return template.render({**get_static_assets(), **context})
@@ -0,0 +1,152 @@
+# scheduler_worker.py
+#
+# Worker de reanálise automática dos mercados monitorados. Roda fora do app
+# Streamlit, com a chave de serviço do Supabase, e reanalisa os mercados cuja
+# cadência (mercados_monitorados.auto_reanalysis_days) venceu, reaproveitando
+# o pipeline do app (api_calls.run_full_analysis -> add_snapshot ->
+# add_kpi_entry), com os mesmos checkpoints e a mesma deduplicação de envios.
+#
+# - Cada mercado tem um horário fixo no dia (derivado do id), o que espalha as
+#   execuções ao longo do dia em vez de concentrá-las num só momento.
+# - Cada provedor (Places, Geocoding, OpenAI) tem um orçamento por hora; sem
+#   saldo, o worker espera em vez de estourar a cota.
+# - Mercados de usuários inativos não são retornados por list_due_markets.
+#
+# Uso (lê o mesmo .streamlit/secrets.toml do app, que precisa de supabase.service_key):
+#   python scheduler_worker.py
+#   python scheduler_worker.py --once --batch 5
+#   python scheduler_worker.py --dry-run
+
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# Precisa vir antes do import de db_utils/supabase_client, que criam o cliente no import
+os.environ.setdefault("RADAR_SUPABASE_ROLE", "service")
+
+POLL_SECONDS = int(os.environ.get("RADAR_WORKER_POLL_SECONDS", 60))
+BATCH_SIZE = int(os.environ.get("RADAR_WORKER_BATCH", 10))
+# Análises por hora que cada provedor comporta (uma chamada por análise em cada um)
+PROVIDER_BUDGETS = {
+    'places': float(os.environ.get("RADAR_BUDGET_PLACES_PER_HOUR", 60)),
+    'geocode': float(os.environ.get("RADAR_BUDGET_GEOCODE_PER_HOUR", 120)),
+    'openai': float(os.environ.get("RADAR_BUDGET_OPENAI_PER_HOUR", 30)),
+}
+
+class _TokenBucket:
+    """Orçamento por hora que se recompõe continuamente; take() bloqueia até haver saldo."""
+
+    def __init__(self, per_hour: float):
+        self.capacity = max(per_hour, 1.0)
+        self.rate = self.capacity / 3600.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        agora = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (agora - self.updated) * self.rate)
+        self.updated = agora
+
+    def wait_seconds(self, amount: float = 1.0) -> float:
+        with self.lock:
+            self._refill()
+            return max(amount - self.tokens, 0) / self.rate
+
+    def take(self, amount: float = 1.0):
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                espera = (amount - self.tokens) / self.rate
+            time.sleep(espera)
+
+class LogProgress:
+    """Substitui o st.progress no pipeline: mesma interface (.progress(valor, text=...)), saída em log."""
+
+    def __init__(self, market: dict):
+        self.prefix = f"[mercado {market['id']}] {market.get('termo')} em {market.get('localizacao')}"
+
+    def progress(self, value: int, text: str = ""):
+        print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} {self.prefix}: {value}% {text}")
+
+def _reserve_budget(buckets: dict):
+    """Aguarda saldo em todos os provedores e só então consome, para não reter cota de um enquanto espera outro."""
+    while True:
+        espera = max(bucket.wait_seconds() for bucket in buckets.values())
+        if espera <= 0:
+            break
+        print(f"Orçamento de API esgotado; aguardando {espera:.0f}s.")
+        time.sleep(espera)
+    for bucket in buckets.values():
+        bucket.take()
+
+def reanalyze_market(market: dict, buckets: dict, maps_api_key: str | None) -> str:
+    """Reanalisa um mercado vencido. Retorna 'done', 'skipped' ou 'failed'."""
+    import api_calls
+    import db_utils
+
+    # Reagenda antes de rodar: se outro worker já pegou este mercado, a atualização não casa e ele é pulado
+    if not db_utils.reschedule_auto_analysis(market):
+        return 'skipped'
+
+    user_id, market_id = market['user_id'], market['id']
+    termo, localizacao, tipo_negocio = market['termo'], market['localizacao'], market.get('tipo_negocio')
+    agora = datetime.now(timezone.utc)
+    key = db_utils.analysis_idempotency_key(user_id, termo, localizacao, tipo_negocio, agora)
+    previous_key = db_utils.analysis_idempotency_key(user_id, termo, localizacao, tipo_negocio, agora - timedelta(minutes=db_utils.SUBMISSION_WINDOW_MINUTES))
+    if not db_utils.claim_analysis_submission(key, user_id, previous_key).get('claimed'):
+        # O usuário acabou de analisar (ou está analisando) este mesmo mercado
+        return 'skipped'
+
+    _reserve_budget(buckets)
+    try:
+        snapshot_id = api_calls.run_full_analysis(termo, localizacao, user_id, market_id, LogProgress(market), maps_api_key, tipo_negocio)
+    except Exception as e:
+        print(f"Falha na reanálise automática do mercado {market_id}: {e}")
+        db_utils.finish_analysis_submission(key, 'failed', market_id=market_id)
+        return 'failed'
+    db_utils.finish_analysis_submission(key, 'completed', market_id=market_id, snapshot_id=snapshot_id)
+    return 'done'
+
+def run_cycle(buckets: dict, batch: int, dry_run: bool = False) -> dict:
+    """Processa um lote de mercados vencidos. Retorna a contagem por resultado."""
+    import streamlit as st
+    import db_utils
+
+    mercados = db_utils.list_due_markets(batch)
+    resultado = {'done': 0, 'skipped': 0, 'failed': 0}
+    if dry_run:
+        for market in mercados:
+            print(f"[dry-run] mercado {market['id']} ({market.get('termo')} em {market.get('localizacao')}), vencido em {market.get('next_auto_analysis_at')}")
+        return resultado
+    maps_api_key = st.secrets.get("google", {}).get("maps_api_key")
+    for market in mercados:
+        resultado[reanalyze_market(market, buckets, maps_api_key)] += 1
+    return resultado
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de reanálise automática dos mercados monitorados.")
+    parser.add_argument("--once", action="store_true", help="processa um lote e termina")
+    parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="mercados por ciclo")
+    parser.add_argument("--poll", type=int, default=POLL_SECONDS, help="segundos entre ciclos sem trabalho")
+    parser.add_argument("--dry-run", action="store_true", help="apenas lista os mercados vencidos")
+    args = parser.parse_args()
+
+    buckets = {provider: _TokenBucket(per_hour) for provider, per_hour in PROVIDER_BUDGETS.items()}
+    while True:
+        resultado = run_cycle(buckets, args.batch, args.dry_run)
+        if any(resultado.values()):
+            print(f"Ciclo concluído: {resultado['done']} reanalisados, {resultado['skipped']} pulados, {resultado['failed']} com falha.")
+        if args.once or args.dry_run:
+            break
+        # Lote cheio: provavelmente há mais mercados vencidos, segue sem esperar
+        if sum(resultado.values()) < args.batch:
+            time.sleep(args.poll)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# static_maps.py
+#
+# Imagens do Google Static Maps usadas no relatório. A imagem é baixada uma
+# única vez por conjunto de marcadores + tamanho, guardada em disco e
+# embutida no HTML como data URI, para que o xhtml2pdf não faça nenhuma
+# requisição de rede durante a renderização.
+
+import base64
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import requests
+
+STATIC_MAPS_URL = "https://maps.googleapis.com/maps/api/staticmap"
+CACHE_DIR = Path(os.environ.get("RADAR_CACHE_DIR", ".cache")) / "static_maps"
+DEFAULT_SIZE = "600x400"
+REQUEST_TIMEOUT_SECONDS = 10
+# Limita o número de marcadores para não exceder o limite de URL da API
+MAX_MARKERS = 18
+
+_key_locks: dict[str, threading.Lock] = {}
+_key_locks_guard = threading.Lock()
+
+def build_map_params(competidores, size: str = DEFAULT_SIZE) -> dict:
+    """Parâmetros da API (sem a chave) para um mapa com os concorrentes numerados."""
+    markers = []
+    for i, comp in enumerate(competidores[:MAX_MARKERS]):
+        lat = comp.get('latitude')
+        lon = comp.get('longitude')
+        if lat and lon:
+            # Usando números para os labels para economizar espaço
+            markers.append(f"color:red|label:{i+1}|{lat},{lon}")
+    return {"size": size, "maptype": "roadmap", "format": "png", "markers": markers}
+
+def _cache_key(params: dict) -> str:
+    raw = "|".join([params["size"], params["maptype"], params["format"], *params["markers"]])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _lock_for(key: str) -> threading.Lock:
+    with _key_locks_guard:
+        return _key_locks.setdefault(key, threading.Lock())
+
+def _write_atomic(path: Path, data: bytes):
+    """Grava num temporário do mesmo diretório e renomeia: outro processo nunca lê uma imagem pela metade."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try: os.unlink(tmp_path)
+        except OSError: pass
+        raise
+
+def get_static_map_png(competidores, api_key, size: str = DEFAULT_SIZE) -> bytes | None:
+    """Retorna o PNG do mapa, do cache em disco ou baixando uma única vez."""
+    params = build_map_params(competidores or [], size)
+    if not api_key or not params["markers"]:
+        return None
+    key = _cache_key(params)
+    path = CACHE_DIR / f"{key}.png"
+    # O lock por chave evita downloads duplicados dentro do processo; entre processos,
+    # a gravação atômica garante que quem lê o cache veja a imagem inteira ou nenhuma.
+    with _lock_for(key):
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            pass
+        try:
+            response = requests.get(STATIC_MAPS_URL, params={**params, "key": api_key}, timeout=REQUEST_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            if not response.headers.get("Content-Type", "").startswith("image/"):
+                print(f"Resposta inesperada do Static Maps: {response.text[:200]}")
+                return None
+            _write_atomic(path, response.content)
+            return response.content
+        except Exception as e:
+            print(f"Erro ao baixar mapa estático: {e}")
+            return None
+
+def get_static_map_data_uri(competidores, api_key, size: str = DEFAULT_SIZE) -> str:
+    """Mapa pronto para <img src=...>, embutido em Base64 ('' se indisponível)."""
+    png = get_static_map_png(competidores, api_key, size)
+    if not png:
+        return ""
+    return "data:image/png;base64," + base64.b64encode(png).decode("utf-8")
@@ -1,8 +1,14 @@
 # Conteúdo para o arquivo: supabase_client.py (VERSÃO CORRIGIDA)
 
+import os
+
 import streamlit as st
 from supabase import create_client, Client
 
+# Processos sem usuário logado (scheduler_worker.py) definem RADAR_SUPABASE_ROLE=service
+# antes de importar este módulo para usar a chave de serviço do Supabase.
+SERVICE_ROLE = os.environ.get("RADAR_SUPABASE_ROLE") == "service"
+
 # A anotação @st.cache_resource garante que esta função rode apenas uma vez,
 # criando um único cliente Supabase e reutilizando-o.
 @st.cache_resource
@@ -13,12 +19,12 @@ def get_supabase_client() -> Client:
     """
     try:
         supabase_url = st.secrets["supabase"]["url"]
-        supabase_key = st.secrets["supabase"]["key"]
+        supabase_key = st.secrets["supabase"]["service_key" if SERVICE_ROLE else "key"]
         client = create_client(supabase_url, supabase_key)
 
         # A lógica de restauração da sessão é movida para dentro da função.
         # Isso garante que seja executada no momento certo.
-        if "user_session" in st.session_state and st.session_state.user_session:
+        if not SERVICE_ROLE and "user_session" in st.session_state and st.session_state.user_session:
             client.auth.set_session(
                 st.session_state.user_session.access_token,
                 st.session_state.user_session.refresh_token
@@ -0,0 +1,34 @@
+# tests/conftest.py
+#
+# Os módulos do app criam o cliente Supabase no import (supabase_client.py) e
+# leem chaves de st.secrets. Para testar as funções puras sem o app rodando,
+# os testes apontam o HOME para um diretório com um secrets.toml fictício
+# (como benchmarks/bench_startup.py) e colocam a raiz do projeto no sys.path.
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+DUMMY_SECRETS = """
+[supabase]
+url = "http://localhost:54321"
+key = "test-anon-key"
+service_key = "test-service-key"
+jwt_secret = "test-jwt-secret"
+
+[google]
+maps_api_key = "test"
+
+[openai]
+api_key = "test"
+"""
+
+_home = Path(tempfile.mkdtemp(prefix="radar-tests-"))
+(_home / ".streamlit").mkdir()
+(_home / ".streamlit" / "secrets.toml").write_text(DUMMY_SECRETS, encoding="utf-8")
+os.environ["HOME"] = str(_home)
+os.environ.setdefault("RADAR_CACHE_DIR", str(_home / "cache"))
+sys.path.insert(0, str(ROOT_DIR))
@@ -0,0 +1,66 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import api_calls
+import db_utils
+
+COMPETIDORES = [
+    {'place_id': 'B', 'name': 'Pizzaria Bella', 'rating': 4.52, 'user_ratings_total': 120},
+    {'place_id': 'A', 'name': 'Forno da Vila', 'rating': 4.1, 'user_ratings_total': 40},
+]
+
+def _com(**mudancas):
+    return [{**COMPETIDORES[0], **mudancas}, COMPETIDORES[1]]
+
+def test_fingerprint_is_sorted_and_bucketed():
+    assert api_calls.landscape_fingerprint(COMPETIDORES) == [['A', 4.1, 1], ['B', 4.5, 3]]
+    # A ordem da busca não importa e a impressão sobrevive ao JSON do snapshot
+    anterior = json.loads(json.dumps(api_calls.landscape_fingerprint(COMPETIDORES[::-1])))
+    assert api_calls.landscape_unchanged(api_calls.landscape_fingerprint(COMPETIDORES), anterior)
+
+@pytest.mark.parametrize("mudancas, igual", [
+    ({'rating': 4.6}, True),                 # dentro da tolerância
+    ({'user_ratings_total': 200}, True),     # mesma faixa de avaliações
+    ({'rating': 4.7}, False),
+    ({'user_ratings_total': 260}, False),
+    ({'place_id': 'C'}, False),
+])
+def test_landscape_unchanged(mudancas, igual):
+    anterior = api_calls.landscape_fingerprint(COMPETIDORES)
+    assert api_calls.landscape_unchanged(api_calls.landscape_fingerprint(_com(**mudancas)), anterior) is igual
+
+def test_landscape_changes_with_competitor_count():
+    anterior = api_calls.landscape_fingerprint(COMPETIDORES)
+    assert not api_calls.landscape_unchanged(api_calls.landscape_fingerprint(COMPETIDORES[:1]), anterior)
+    assert not api_calls.landscape_unchanged(anterior, None)
+
+@pytest.fixture
+def snapshot_anterior(monkeypatch):
+    dados = {'termo_busca': 'pizzaria', 'localizacao_busca': 'Niterói', 'tipo_negocio': 'Restaurante, Bar ou Lanchonete',
+             'competidores': COMPETIDORES, 'landscape_fingerprint': api_calls.landscape_fingerprint(COMPETIDORES),
+             'ai_generated_at': datetime.now(timezone.utc).isoformat(), 'sumario_executivo': 'Mercado estável.'}
+    monkeypatch.setattr(db_utils, "get_latest_snapshot", lambda market_id, user_id: {'dados_json': json.dumps(dados)})
+    return dados
+
+def _ctx(**extra):
+    return {'market_id': 1, 'user_id': 'u1', 'tipo_negocio': 'Restaurante, Bar ou Lanchonete', 'competidores': COMPETIDORES, **extra}
+
+def test_reuses_only_the_ai_sections(snapshot_anterior):
+    reaproveitada = api_calls._reusable_ai_analysis(_ctx(), api_calls.landscape_fingerprint(COMPETIDORES))
+    assert reaproveitada == {'ai_analysis': {'sumario_executivo': 'Mercado estável.'}, 'ai_generated_at': snapshot_anterior['ai_generated_at']}
+
+def test_no_reuse_for_other_business_type_or_stale_analysis(snapshot_anterior):
+    fingerprint = api_calls.landscape_fingerprint(COMPETIDORES)
+    assert api_calls._reusable_ai_analysis(_ctx(tipo_negocio='Genérico / Outros'), fingerprint) is None
+    snapshot_anterior['ai_generated_at'] = (datetime.now(timezone.utc) - timedelta(days=api_calls.AI_REUSE_MAX_AGE_DAYS + 1)).isoformat()
+    assert api_calls._reusable_ai_analysis(_ctx(), fingerprint) is None
+
+def test_force_refresh_calls_the_ai(snapshot_anterior, monkeypatch):
+    chamadas = []
+    monkeypatch.setattr(api_calls, "call_chatgpt_with_retry", lambda prompt: chamadas.append(prompt) or {'sumario_executivo': 'Novo.'})
+    monkeypatch.setattr(api_calls, "_merge_dossiers", lambda ctx, ai_analysis: ai_analysis)
+    assert api_calls._stage_llm(_ctx(prompt='p'))['ai_analysis'] == {'sumario_executivo': 'Mercado estável.'}
+    assert api_calls._stage_llm(_ctx(prompt='p', force_refresh=True))['ai_analysis'] == {'sumario_executivo': 'Novo.'}
+    assert chamadas == ['p']
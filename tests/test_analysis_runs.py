@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+
+import pytest
+
+import db_utils
+
+class _Query:
+    """Cadeia do cliente Supabase que ignora os filtros e devolve `rows`."""
+    def __init__(self, rows): self.rows = rows
+    def __getattr__(self, name): return lambda *args, **kwargs: self
+    def execute(self): return SimpleNamespace(data=self.rows)
+
+@pytest.fixture
+def execucao_falha(monkeypatch):
+    run = {'id': 7, 'stage': 'geocode', 'status': 'failed',
+           'checkpoint': {**db_utils.analysis_inputs("pizzaria", "Niterói", "Restaurante, Bar ou Lanchonete"), 'competidores': []}}
+    monkeypatch.setattr(db_utils, "supabase_client", SimpleNamespace(table=lambda name: _Query([run])))
+    return run
+
+def test_resumable_run_requires_same_inputs(execucao_falha):
+    mesma = db_utils.analysis_inputs("pizzaria", "Niterói", "Restaurante, Bar ou Lanchonete")
+    assert db_utils.get_resumable_run("u1", 1, mesma) is execucao_falha
+    outro_tipo = db_utils.analysis_inputs("pizzaria", "Niterói", "Genérico / Outros")
+    assert db_utils.get_resumable_run("u1", 1, outro_tipo) is None
+    assert db_utils.get_resumable_run("u1", 1, db_utils.analysis_inputs("pizzaria", "Icaraí", "Restaurante, Bar ou Lanchonete")) is None
+
+def test_no_failed_run(monkeypatch):
+    monkeypatch.setattr(db_utils, "supabase_client", SimpleNamespace(table=lambda name: _Query([])))
+    assert db_utils.get_resumable_run("u1", 1, db_utils.analysis_inputs("a", "b", None)) is None
@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta, timezone
+
+import db_utils
+
+INICIO = datetime(2026, 10, 19, 14, 0, tzinfo=timezone.utc)
+
+def _chave(now=INICIO, **kwargs):
+    campos = dict(user_id="u1", termo="pizzaria", localizacao="Niterói, RJ", tipo_negocio="Restaurante, Bar ou Lanchonete")
+    campos.update(kwargs)
+    return db_utils.analysis_idempotency_key(now=now, **campos)
+
+def test_same_submission_in_the_same_window_shares_the_key():
+    assert _chave() == _chave(now=INICIO + timedelta(minutes=db_utils.SUBMISSION_WINDOW_MINUTES - 1))
+
+def test_key_ignores_case_and_whitespace():
+    assert _chave() == _chave(termo="  Pizzaria ", localizacao="niterói,   rj")
+
+def test_key_changes_with_user_inputs_or_window():
+    chave = _chave()
+    assert _chave(user_id="u2") != chave
+    assert _chave(tipo_negocio=None) != chave
+    assert _chave(termo="hamburgueria") != chave
+    assert _chave(now=INICIO + timedelta(minutes=db_utils.SUBMISSION_WINDOW_MINUTES)) != chave
@@ -0,0 +1,33 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import auth_utils
+
+SECRET = "test-jwt-secret"  # o mesmo do secrets.toml de tests/conftest.py
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _token(claims: dict, alg: str = "HS256", secret: str = SECRET) -> str:
+    header = _b64(json.dumps({"alg": alg, "typ": "JWT"}).encode())
+    payload = _b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest() if alg == "HS256" else b""
+    return f"{header}.{payload}.{_b64(signature)}"
+
+def test_valid_token_returns_claims():
+    claims = auth_utils.validate_access_token(_token({"sub": "u1", "exp": time.time() + 60}), "u1")
+    assert claims["sub"] == "u1"
+
+def test_rejects_other_user_expired_and_bad_signature():
+    assert auth_utils.validate_access_token(_token({"sub": "u2", "exp": time.time() + 60}), "u1") is None
+    assert auth_utils.validate_access_token(_token({"sub": "u1", "exp": time.time() - 1}), "u1") is None
+    assert auth_utils.validate_access_token(_token({"sub": "u1", "exp": time.time() + 60}, secret="outro"), "u1") is None
+
+def test_rejects_unsigned_token_when_secret_is_configured():
+    assert auth_utils.validate_access_token(_token({"sub": "u1", "exp": time.time() + 60}, alg="none"), "u1") is None
+
+def test_rejects_malformed_token():
+    assert auth_utils.validate_access_token("nao-e-um-jwt", "u1") is None
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta, timezone
+
+import db_utils
+
+AGORA = datetime(2026, 10, 19, 14, 30, tzinfo=timezone.utc)
+
+def test_slot_is_fixed_per_market_and_within_the_day():
+    slot = db_utils.auto_analysis_slot(42, AGORA)
+    assert slot.date() == AGORA.date()
+    assert db_utils.auto_analysis_slot(42, AGORA + timedelta(hours=5)) == slot
+    assert db_utils.auto_analysis_slot(42, AGORA + timedelta(days=3)) - slot == timedelta(days=3)
+    # Mercados diferentes caem em horários diferentes
+    assert len({db_utils.auto_analysis_slot(i, AGORA).time() for i in range(20)}) > 1
+
+def test_first_run_is_the_next_slot_from_now():
+    primeira = db_utils.next_auto_analysis_at(42, 7, after=AGORA, first=True)
+    assert AGORA < primeira <= AGORA + timedelta(days=1)
+    assert primeira.time() == db_utils.auto_analysis_slot(42, AGORA).time()
+
+def test_following_runs_keep_the_cadence_and_the_slot():
+    proxima = db_utils.next_auto_analysis_at(42, 7, after=AGORA)
+    assert proxima == db_utils.auto_analysis_slot(42, AGORA + timedelta(days=7))
+    # Um atraso do worker não desloca o horário do mercado
+    assert db_utils.next_auto_analysis_at(42, 7, after=AGORA + timedelta(minutes=40)).time() == proxima.time()
+
+def test_label_keeps_unknown_cadences():
+    assert db_utils.auto_reanalysis_label(None) == "Desligada"
+    assert db_utils.auto_reanalysis_label(7) == "Semanal"
+    assert db_utils.auto_reanalysis_label(3) == "A cada 3 dias"
@@ -0,0 +1,60 @@
+import pytest
+
+import api_calls
+import db_utils
+
+COMPETIDORES = [
+    {'place_id': 'A', 'name': 'Forno da Vila', 'rating': 4.1},
+    {'place_id': 'B', 'name': 'Pizzaria  Bella', 'rating': 4.5},
+    {'place_id': None, 'name': 'Sem Id', 'rating': 3.9},
+]
+CACHE_A = {'nome': 'Forno da Vila', 'posicionamento_mercado': 'Tradicional', 'pontos_fortes': [], 'pontos_fracos': []}
+
+@pytest.fixture
+def salvos(monkeypatch):
+    salvos = {}
+    monkeypatch.setattr(db_utils, "save_competitor_dossiers", salvos.update)
+    return salvos
+
+def test_merge_keeps_competitor_order_and_caches_only_new_dossiers(salvos):
+    ai_analysis = {'sumario_executivo': 'x', 'dossies_concorrentes': [
+        {'nome': 'sem id', 'posicionamento_mercado': 'Bairro'},
+        {'nome': 'pizzaria bella', 'posicionamento_mercado': 'Premium'},
+    ]}
+    resultado = api_calls._merge_dossiers({'competidores': COMPETIDORES, 'cached_dossiers': {'A': CACHE_A}}, ai_analysis)
+    assert [d['nome'] for d in resultado['dossies_concorrentes']] == ['Forno da Vila', 'Pizzaria  Bella', 'Sem Id']
+    assert resultado['sumario_executivo'] == 'x'
+    # O do cache não é regravado e o concorrente sem place_id não tem como ser guardado
+    assert salvos == {'B': {'nome': 'pizzaria bella', 'posicionamento_mercado': 'Premium'}}
+
+def test_merge_keeps_unmatched_and_skips_duplicates(salvos):
+    ai_analysis = {'dossies_concorrentes': [
+        {'nome': 'Forno da Vila', 'posicionamento_mercado': 'Repetido'},
+        {'nome': 'Outro Lugar', 'posicionamento_mercado': 'Sem par'},
+        'texto solto',
+    ]}
+    resultado = api_calls._merge_dossiers({'competidores': COMPETIDORES, 'cached_dossiers': {'A': CACHE_A}}, ai_analysis)
+    assert [d['posicionamento_mercado'] for d in resultado['dossies_concorrentes']] == ['Tradicional', 'Sem par']
+    assert salvos == {}
+
+def test_prompt_asks_only_for_missing_dossiers():
+    args = ("Genérico / Outros", "pizzaria", "Niterói", "- Forno da Vila (Nota: 4.1)", 4.1)
+    assert "5 principais concorrentes" in api_calls.get_prompt_for_business_type(*args)
+    assert "apenas para os concorrentes Pizzaria Bella, Sem Id" in api_calls.get_prompt_for_business_type(*args, ["Pizzaria Bella", "Sem Id"])
+    assert "dossies_concorrentes" not in api_calls.get_prompt_for_business_type(*args, [])
+
+class _Rpc:
+    def __init__(self): self.chamadas = []
+    def rpc(self, name, params): self.chamadas.append((name, params)); return self
+    def execute(self): return None
+
+def test_dossiers_are_saved_through_the_rpc_with_known_fields_only(monkeypatch):
+    cliente = _Rpc()
+    monkeypatch.setattr(db_utils, "supabase_client", cliente)
+    db_utils.save_competitor_dossiers({
+        'B': {'nome': 'Pizzaria Bella', 'posicionamento_mercado': 'Premium', 'observacao_extra': 'x'},
+        'C': {'nome': None, 'posicionamento_mercado': 'Sem nome'},
+    })
+    assert cliente.chamadas == [('save_competitor_dossiers', {'p_dossies': {'B': {'nome': 'Pizzaria Bella', 'posicionamento_mercado': 'Premium'}}})]
+    db_utils.save_competitor_dossiers({})
+    assert len(cliente.chamadas) == 1
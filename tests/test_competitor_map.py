@@ -0,0 +1,27 @@
+import competitor_map
+import static_maps
+
+COMPETIDORES = [
+    {'name': 'Alfa', 'latitude': -22.90, 'longitude': -43.10},
+    {'name': 'Sem Coordenadas', 'latitude': None, 'longitude': None},
+    {'name': None, 'latitude': -22.91, 'longitude': -43.11},
+]
+
+def test_numbering_follows_full_list_like_static_map():
+    numeros = [numero for numero, _ in competitor_map.numbered_competitors(COMPETIDORES)]
+    labels = [int(m.split("|")[1].split(":")[1]) for m in static_maps.build_map_params(COMPETIDORES)["markers"]]
+    assert numeros == labels == [1, 3]
+
+def test_hash_tolerates_missing_name_and_tracks_numbering():
+    base = competitor_map.competitors_hash(COMPETIDORES)
+    assert base == competitor_map.competitors_hash(list(COMPETIDORES))
+    assert base != competitor_map.competitors_hash([COMPETIDORES[0], COMPETIDORES[2]])
+
+def test_build_map_html_with_none_name():
+    html_mapa = competitor_map.build_map_html.__wrapped__(1, "k", COMPETIDORES)
+    assert "1. Alfa" in html_mapa and "3. " in html_mapa
+
+def test_large_maps_cluster_markers():
+    muitos = [{'name': f'Concorrente {i}', 'latitude': -22.90 - i / 1000, 'longitude': -43.10} for i in range(10)]
+    assert "markerClusterGroup" in competitor_map.build_map_html.__wrapped__(2, "k", muitos)
+    assert "markerClusterGroup" not in competitor_map.build_map_html.__wrapped__(3, "k", muitos[:competitor_map.CLUSTER_THRESHOLD])
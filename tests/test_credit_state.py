@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+import pytest
+
+import credit_state
+import db_utils
+
+class _Perfil:
+    def __call__(self, user_id):
+        return {'daily_analysis_count': 2, 'last_analysis_date': None}
+    def clear(self, *args):
+        pass
+
+class _Configuracao:
+    def __init__(self, valor): self.valor = valor
+    def __call__(self, name): return str(self.valor)
+    def clear(self, *args): pass
+
+class _AdminClient:
+    def table(self, name): return self
+    def update(self, data): return self
+    def eq(self, *args): return self
+    def execute(self): return SimpleNamespace(data=[])
+
+@pytest.fixture
+def limite(monkeypatch):
+    configuracao = _Configuracao(10)
+    monkeypatch.setattr(credit_state, "st", SimpleNamespace(session_state={}))
+    monkeypatch.setattr(db_utils, "get_platform_setting", configuracao)
+    monkeypatch.setattr(db_utils, "get_user_profile", _Perfil())
+    monkeypatch.setattr(db_utils, "daily_analysis_count", lambda profile: 2)
+    monkeypatch.setattr(db_utils, "_create_admin_client", lambda: _AdminClient())
+    db_utils._settings_versions().clear()
+    return configuracao
+
+def test_state_reloads_as_soon_as_admin_changes_the_limit(limite):
+    estado = credit_state.load_credit_state("u1")
+    assert estado['limit'] == 10 and credit_state.remaining(estado) == 8
+
+    limite.valor = 3
+    # Sem alteração pelo admin, o estado da sessão continua valendo até REFRESH_SECONDS
+    assert credit_state.get_credit_state("u1")['limit'] == 10
+
+    assert db_utils.update_platform_setting_admin('daily_analysis_limit', '3')
+    estado = credit_state.get_credit_state("u1")
+    assert estado['limit'] == 3 and credit_state.remaining(estado) == 1
@@ -0,0 +1,18 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+def test_reportlab_backend_does_not_load_xhtml2pdf_or_matplotlib():
+    # Processo novo: os outros testes já podem ter importado os dois módulos
+    script = (
+        "import json, sys\n"
+        "import report_generator\n"
+        f"data = json.loads(open({str(ROOT_DIR / 'benchmarks' / 'fixtures' / 'snapshot_pequeno.json')!r}, encoding='utf-8').read())['dados_json']\n"
+        "pdf = report_generator.render_pdf_bytes(data, '', 'resumido', 'reportlab')\n"
+        "print(json.dumps([pdf[:5].decode(), 'xhtml2pdf' in sys.modules, 'matplotlib' in sys.modules]))\n"
+    )
+    saida = subprocess.run([sys.executable, "-c", script], cwd=ROOT_DIR, capture_output=True, text=True, check=True).stdout
+    assert json.loads(saida.strip().splitlines()[-1]) == ["%PDF-", False, False]
@@ -0,0 +1,42 @@
+import base64
+from io import BytesIO
+
+from PIL import Image
+from reportlab import rl_config
+
+import pdf_optimize
+
+def _png_b64(width: int, height: int, mode: str = "RGBA") -> str:
+    out = BytesIO()
+    Image.new(mode, (width, height), (10, 20, 30, 128) if mode == "RGBA" else (10, 20, 30)).save(out, format="PNG")
+    return base64.b64encode(out.getvalue()).decode("ascii")
+
+def test_binary_streams_is_scoped_and_nested():
+    original = rl_config.useA85
+    with pdf_optimize.binary_streams():
+        assert rl_config.useA85 == 0
+        with pdf_optimize.binary_streams():
+            assert rl_config.useA85 == 0
+        assert rl_config.useA85 == 0
+    assert rl_config.useA85 == original
+
+def test_image_is_downsampled_and_flattened():
+    resultado = pdf_optimize._optimize_image(_png_b64(1200, 600), 300, "PNG")
+    imagem = Image.open(BytesIO(base64.b64decode(resultado)))
+    assert imagem.size == (300, 150)
+    assert imagem.mode == "RGB"
+
+def test_data_uri_map_becomes_jpeg():
+    uri = "data:image/png;base64," + _png_b64(900, 600, "RGB")
+    contexto = pdf_optimize.optimize_report_context({"static_map_url": uri})
+    assert contexto["static_map_url"].startswith("data:image/jpeg;base64,")
+
+def test_cache_is_keyed_by_digest(monkeypatch):
+    pdf_optimize._image_cache.clear()
+    chamadas = []
+    monkeypatch.setattr(pdf_optimize, "_encode_image", lambda b64, w, fmt: chamadas.append(b64) or "x")
+    b64 = _png_b64(10, 10)
+    pdf_optimize._optimize_image(b64, 5, "PNG")
+    pdf_optimize._optimize_image(b64, 5, "PNG")
+    assert len(chamadas) == 1
+    assert all(len(key[0]) == 64 for key in pdf_optimize._image_cache)
@@ -0,0 +1,40 @@
+import os
+
+import pytest
+
+import report_cache
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_cache, "CACHE_DIR", tmp_path)
+    return tmp_path
+
+def test_store_and_read_back(cache_dir):
+    report_cache.store_pdf(1, "v1", b"%PDF-1.4 teste")
+    assert report_cache.get_cached_pdf(1, "v1") == b"%PDF-1.4 teste"
+    assert report_cache.get_cached_pdf(1, "v2") is None
+
+def test_failed_write_leaves_no_tmp_file(cache_dir, monkeypatch):
+    def falha(*args):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(report_cache.os, "replace", falha)
+    report_cache.store_pdf(1, "v1", b"%PDF")
+    assert list(cache_dir.iterdir()) == []
+    assert report_cache.get_cached_pdf(1, "v1") is None
+
+def test_snapshot_pdf_carries_the_snapshot_date(cache_dir, monkeypatch):
+    import report_generator
+    datas = []
+    monkeypatch.setattr(report_generator, "render_pdf_bytes", lambda data, key, variant, generated_at=None: datas.append(generated_at) or b"%PDF")
+    snapshot = {'id': 3, 'data_snapshot': '2026-03-05T23:10:00Z', 'dados_json': {}}
+    assert report_generator.render_snapshot_pdf(snapshot, "") == b"%PDF"
+    assert datas[0].strftime('%d/%m/%Y') == '05/03/2026'
+    assert report_generator.snapshot_date({'id': None}) is None
+
+def test_context_prints_the_given_date(monkeypatch):
+    import report_generator
+    from datetime import datetime
+    monkeypatch.setattr(report_generator.report_charts, "sentiment_chart_base64", lambda sentimentos: "")
+    monkeypatch.setattr(report_generator.static_maps, "get_static_map_data_uri", lambda competidores, key: "")
+    contexto = report_generator.build_report_context({}, "", generated_at=datetime(2026, 3, 5))
+    assert contexto['data_geracao'] == '05/03/2026'
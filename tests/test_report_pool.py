@@ -0,0 +1,58 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import report_pool
+
+class _Executor:
+    """Executor falso: guarda os Futures sem rodar nada; `broken` simula um processo morto pelo OOM killer."""
+    criados = []
+
+    def __init__(self, *args, **kwargs):
+        self.broken = False
+        self.futures = []
+        _Executor.criados.append(self)
+
+    def submit(self, fn, *args):
+        if self.broken:
+            raise BrokenProcessPool("processo filho encerrado")
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+@pytest.fixture
+def pool(monkeypatch):
+    _Executor.criados = []
+    monkeypatch.setattr(report_pool, "ProcessPoolExecutor", _Executor)
+    monkeypatch.setattr(report_pool, "MAX_PENDING", 2)
+    return report_pool._ReportPool()
+
+def test_same_snapshot_shares_the_future(pool):
+    assert pool.submit({'id': 1}, "", "completo") is pool.submit({'id': 1}, "", "completo")
+    assert pool.submit({'id': 1}, "", "resumido") is not None
+    # Fila cheia
+    assert pool.submit({'id': 2}, "", "completo") is None
+
+def test_unsaved_snapshots_are_not_deduplicated(pool):
+    assert pool.submit({'id': None}, "", "completo") is not pool.submit({}, "", "completo")
+
+def test_broken_pool_is_rebuilt_without_leaking_slots(pool):
+    _Executor.criados[0].broken = True
+    future = pool.submit({'id': 1}, "", "completo")
+    assert future is not None and len(_Executor.criados) == 2
+    future.set_result(b"%PDF")
+    # O slot voltou: cabem de novo dois pedidos
+    assert pool.submit({'id': 2}, "", "completo") and pool.submit({'id': 3}, "", "completo")
+
+def test_failed_submit_releases_the_slot(pool):
+    def falha(*args): raise RuntimeError("cannot schedule new futures after shutdown")
+    pool._submit_to_executor = falha
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            pool.submit({'id': 1}, "", "completo")
+    del pool._submit_to_executor
+    assert pool.submit({'id': 1}, "", "completo") and pool.submit({'id': 2}, "", "completo")
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+import pytest
+
+import api_calls
+import db_utils
+
+# A função real, antes de qualquer monkeypatch das fixtures
+SAVE_SHARED_MARKET_DATA = db_utils.save_shared_market_data
+
+def test_normalize_market_text():
+    assert db_utils.normalize_market_text("  Niterói,  RJ ") == db_utils.normalize_market_text("niteroi rj") == "niteroi rj"
+    assert db_utils.normalize_market_text("Café & Cia.") == "cafe cia"
+    assert db_utils.normalize_market_text(None) == ""
+
+class _Rpc:
+    """Cliente falso; `resposta` imita o retorno da RPC save_market_data_shared."""
+    def __init__(self, **resposta): self.chamadas = []; self.resposta = {'id': 17, **resposta}
+    def rpc(self, name, params): self.chamadas.append((name, params)); return self
+    def execute(self): return SimpleNamespace(data=self.resposta)
+
+def test_shared_writes_go_through_the_rpc(monkeypatch):
+    cliente = _Rpc(geocode_stored=True)
+    monkeypatch.setattr(db_utils, "supabase_client", cliente)
+    assert db_utils.save_shared_market_data("Pizzaria", "Niterói, RJ", geocode={'location_state': 'RJ'}) == 17
+    assert cliente.chamadas == [('save_market_data_shared', {'p_termo_norm': 'pizzaria', 'p_localizacao_norm': 'niteroi rj', 'p_competidores': None, 'p_geocode': {'location_state': 'RJ'}})]
+
+class _Gmaps:
+    def places(self, query):
+        return {'results': [{'place_id': 'novo', 'name': 'Pizzaria Nova', 'rating': 4.8, 'user_ratings_total': 12}]}
+
+@pytest.fixture
+def coleta(monkeypatch):
+    monkeypatch.setattr(db_utils, "get_shared_places", lambda termo, localizacao: {'id': 5, 'competidores': [{'place_id': 'antigo'}]})
+    monkeypatch.setattr(db_utils, "save_shared_market_data", lambda *args, **kwargs: 6)
+    monkeypatch.setattr(api_calls, "get_gmaps_client", lambda: _Gmaps())
+    return {'termo_busca': 'pizzaria', 'localizacao_busca': 'Niterói'}
+
+def test_collect_reuses_shared_places(coleta):
+    assert api_calls._stage_collect(coleta) == {'competidores': [{'place_id': 'antigo'}], 'shared_data_id': 5}
+
+def test_force_refresh_bypasses_shared_places(coleta):
+    resultado = api_calls._stage_collect({**coleta, 'force_refresh': True})
+    assert [c['place_id'] for c in resultado['competidores']] == ['novo'] and resultado['shared_data_id'] == 6
+
+def test_snapshot_is_not_linked_to_a_row_that_kept_other_data(coleta, monkeypatch):
+    # "Refazer IA" com a linha compartilhada ainda válida: a RPC mantém a lista antiga
+    monkeypatch.setattr(db_utils, "save_shared_market_data", SAVE_SHARED_MARKET_DATA)
+    monkeypatch.setattr(db_utils, "supabase_client", _Rpc(places_stored=False, geocode_stored=False))
+    resultado = api_calls._stage_collect({**coleta, 'force_refresh': True})
+    assert [c['place_id'] for c in resultado['competidores']] == ['novo'] and resultado['shared_data_id'] is None
+
+    monkeypatch.setattr(db_utils, "supabase_client", _Rpc(places_stored=True))
+    assert api_calls._stage_collect({**coleta, 'force_refresh': True})['shared_data_id'] == 17
+
+class _Consulta:
+    def __init__(self): self.filtros = []
+    def __getattr__(self, name): return lambda *args, **kwargs: self
+    def eq(self, coluna, valor): self.filtros.append((coluna, valor)); return self
+    def execute(self): return SimpleNamespace(data=None)
+
+def test_user_data_queries_filter_by_owner(monkeypatch):
+    consulta = _Consulta()
+    monkeypatch.setattr(db_utils, "supabase_client", SimpleNamespace(table=lambda name: consulta))
+    db_utils.get_latest_snapshot.__wrapped__(1, "u1")
+    db_utils.get_kpi_history.__wrapped__(1, "u1")
+    assert consulta.filtros == [('mercado_id', 1), ('user_id', 'u1'), ('market_id', 1), ('user_id', 'u1')]
@@ -0,0 +1,31 @@
+import pytest
+
+import static_maps
+
+COMPETIDORES = [
+    {'name': 'A', 'latitude': -22.9, 'longitude': -43.1},
+    {'name': 'B', 'latitude': None, 'longitude': None},
+    {'name': 'C', 'latitude': -22.8, 'longitude': -43.2},
+]
+
+def test_markers_keep_list_numbering():
+    params = static_maps.build_map_params(COMPETIDORES)
+    assert params["markers"] == ["color:red|label:1|-22.9,-43.1", "color:red|label:3|-22.8,-43.2"]
+
+def test_cache_key_depends_on_markers_and_size():
+    base = static_maps._cache_key(static_maps.build_map_params(COMPETIDORES))
+    assert base == static_maps._cache_key(static_maps.build_map_params(list(COMPETIDORES)))
+    assert base != static_maps._cache_key(static_maps.build_map_params(COMPETIDORES, size="300x200"))
+    assert base != static_maps._cache_key(static_maps.build_map_params(COMPETIDORES[:1]))
+
+def test_write_atomic_cleans_up_on_failure(tmp_path, monkeypatch):
+    destino = tmp_path / "mapa.png"
+    static_maps._write_atomic(destino, b"png")
+    assert destino.read_bytes() == b"png"
+
+    def falha(*args):
+        raise OSError("sem espaço")
+    monkeypatch.setattr(static_maps.os, "replace", falha)
+    with pytest.raises(OSError):
+        static_maps._write_atomic(tmp_path / "outro.png", b"png")
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["mapa.png"]
@@ -0,0 +1,75 @@
+import sys
+import types
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import trends_scheduler
+
+class _FakeTrendReq:
+    """Substitui pytrends.request.TrendReq: devolve as colunas pedidas a partir de `series`."""
+    series = {}
+    payloads = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def build_payload(self, terms, **kwargs):
+        self.terms = terms
+        _FakeTrendReq.payloads.append(list(terms))
+
+    def interest_over_time(self):
+        index = pd.DatetimeIndex([datetime(2026, 10, 4), datetime(2026, 10, 11)], name="date")
+        return pd.DataFrame({t: self.series[t] for t in self.terms if t in self.series}, index=index)
+
+@pytest.fixture
+def trends(monkeypatch):
+    modulo = types.ModuleType("pytrends.request")
+    modulo.TrendReq = _FakeTrendReq
+    monkeypatch.setitem(sys.modules, "pytrends.request", modulo)
+    _FakeTrendReq.payloads = []
+    return _FakeTrendReq
+
+def test_single_keyword_has_no_anchor_and_keeps_own_scale(trends):
+    trends.series = {"barbearia": [40, 100]}
+    results, low = trends_scheduler._fetch_batch(["barbearia"], "BR-RJ", "today 12-m")
+    assert trends.payloads == [["barbearia"]]
+    assert list(results["barbearia"].values()) == [40.0, 100.0] and low == []
+
+def test_batch_is_scaled_by_anchor_mean(trends):
+    ancora = trends_scheduler.ANCHOR_TERM
+    trends.series = {"a": [10, 30], "b": [50, 50], ancora: [40, 60]}
+    results, low = trends_scheduler._fetch_batch(["a", "b"], "BR", "today 12-m")
+    assert trends.payloads == [["a", "b", ancora]]
+    assert list(results["a"].values()) == [20.0, 60.0] and low == []
+
+def test_keywords_crushed_in_batch_are_flagged(trends):
+    ancora = trends_scheduler.ANCHOR_TERM
+    trends.series = {"nicho": [0, 1], "forte": [80, 100], ancora: [50, 50]}
+    results, low = trends_scheduler._fetch_batch(["nicho", "forte", "sumiu"], "BR", "today 12-m")
+    assert low == ["nicho", "sumiu"] and set(results) == {"forte"}
+
+class _NoThread:
+    def __init__(self, *args, **kwargs): pass
+    def start(self): pass
+
+def test_low_resolution_keywords_are_refetched_alone(monkeypatch):
+    monkeypatch.setattr(trends_scheduler.threading, "Thread", _NoThread)
+    monkeypatch.setattr(trends_scheduler, "GATHER_SECONDS", 0)
+    monkeypatch.setattr(trends_scheduler, "MIN_INTERVAL_SECONDS", 0)
+    chamadas = []
+    def fetch(keywords, geo, timeframe):
+        chamadas.append(list(keywords))
+        if len(keywords) > 1:
+            return {"forte": {"d": 90.0}}, ["nicho"]
+        return {"nicho": {"d": 100.0}}, []
+    monkeypatch.setattr(trends_scheduler, "_fetch_batch", fetch)
+
+    scheduler = trends_scheduler._TrendsScheduler()
+    forte, nicho = scheduler.submit("forte", "BR", "tf"), scheduler.submit("nicho", "BR", "tf")
+    scheduler._run_once()
+    assert forte.result(0) == {"d": 90.0} and not nicho.done()
+    assert scheduler.submit("nicho", "BR", "tf") is nicho  # deduplica com o pedido individual
+    scheduler._run_once()
+    assert chamadas == [["forte", "nicho"], ["nicho"]] and nicho.result(0) == {"d": 100.0}
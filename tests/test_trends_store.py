@@ -0,0 +1,87 @@
+from concurrent.futures import Future
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import trends_store
+
+def test_week_start_is_sunday():
+    assert trends_store.week_start(date(2026, 10, 18)) == date(2026, 10, 18)  # domingo
+    assert trends_store.week_start(date(2026, 10, 24)) == date(2026, 10, 18)  # sábado
+
+def test_weekly_averages_daily_points():
+    pontos = {date(2026, 10, 18): 10.0, date(2026, 10, 19): 20.0, date(2026, 10, 25): 5.0}
+    assert trends_store._weekly(pontos) == {date(2026, 10, 18): 15.0, date(2026, 10, 25): 5.0}
+
+def test_rescale_uses_overlap_without_first_week():
+    semanas = [date(2026, 9, 6) + timedelta(weeks=i) for i in range(4)]
+    salvo = {semanas[0]: 99.0, semanas[1]: 40.0, semanas[2]: 60.0}
+    novo = {semanas[0]: 1.0, semanas[1]: 20.0, semanas[2]: 30.0, semanas[3]: 50.0}
+    reescalado = trends_store._rescale(salvo, novo)
+    assert reescalado[semanas[3]] == pytest.approx(100.0)
+    assert trends_store._rescale(salvo, {semanas[3]: 10.0}) is None
+
+@pytest.fixture
+def loja(monkeypatch):
+    """Série salva em memória e um agendador falso que só responde quando o teste manda."""
+    estado = {'points': {}, 'meta': None, 'saves': 0, 'submits': []}
+    monkeypatch.setattr(trends_store, "_load_points", lambda k, g: dict(estado['points']))
+    monkeypatch.setattr(trends_store, "_load_meta", lambda k, g: estado['meta'])
+    def save(keyword, geo, points, full):
+        estado['saves'] += 1
+    monkeypatch.setattr(trends_store, "_save_points", save)
+    def submit(keyword, geo, timeframe):
+        future = Future(); estado['submits'].append(future); return future
+    monkeypatch.setattr(trends_store.trends_scheduler, "submit", submit)
+    trends_store._inflight.clear()
+    return estado
+
+def _semanas_recentes(n: int) -> dict:
+    hoje = trends_store.week_start(date.today())
+    return {hoje - timedelta(weeks=i): 10.0 + i for i in range(n)}
+
+def test_concurrent_refreshes_share_one_fetch_and_one_save(loja):
+    agora = datetime.now(timezone.utc)
+    primeiro = trends_store._start_refresh("pizza", "BR", {}, None, agora)
+    segundo = trends_store._start_refresh("pizza", "BR", {}, None, agora)
+    assert primeiro is segundo and len(loja['submits']) == 1
+    loja['submits'][0].set_result(_semanas_recentes(8))
+    assert loja['saves'] == 1 and primeiro.result()
+    assert not trends_store._inflight
+
+def test_stale_stored_series_is_returned_without_waiting(loja):
+    loja['points'] = _semanas_recentes(8)
+    loja['meta'] = {'last_fetched_at': datetime.now(timezone.utc) - timedelta(days=2), 'last_full_at': datetime.now(timezone.utc) - timedelta(days=2)}
+    serie = trends_store.get_interest_series("pizza", "BR", wait_seconds=5)
+    assert serie and len(loja['submits']) == 1 and not loja['submits'][0].done()
+
+def test_nothing_stored_raises_pending_after_wait(loja):
+    with pytest.raises(trends_store.TrendsPending):
+        trends_store.get_interest_series("pizza", "BR", wait_seconds=0.01)
+
+def test_all_zero_series_is_not_saved_as_full_series(loja, monkeypatch):
+    saves = []
+    monkeypatch.setattr(trends_store, "_save_points", lambda keyword, geo, points, full: saves.append((points, full)))
+    done = trends_store._start_refresh("nicho", "BR-AC", {}, None, datetime.now(timezone.utc))
+    loja['submits'][0].set_result({date(2026, 10, 4): 0.0, date(2026, 10, 11): 0.0})
+    assert done.result() == {} and saves == [({}, False)]
+
+def test_all_zero_refresh_keeps_existing_series(loja):
+    salvo = _semanas_recentes(4)
+    done = trends_store._start_refresh("pizza", "BR", salvo, None, datetime.now(timezone.utc))
+    loja['submits'][0].set_result({date(2026, 10, 4): 0.0})
+    assert done.result() == salvo and loja['saves'] == 0
+
+def test_recent_no_volume_lookup_is_not_repeated(loja):
+    loja['meta'] = {'last_fetched_at': datetime.now(timezone.utc), 'last_full_at': None}
+    assert trends_store.get_interest_series("nicho", "BR-AC") == {}
+    assert loja['submits'] == []
+
+def test_interest_dataframe_is_empty_for_zero_series(monkeypatch):
+    import api_calls
+    monkeypatch.setattr(trends_store, "get_interest_series", lambda keyword, geo: {date(2026, 10, 4): 0.0})
+    api_calls.get_interest_over_time.clear()
+    assert api_calls.get_interest_over_time("nicho", "BR-AC").empty
+    monkeypatch.setattr(trends_store, "get_interest_series", lambda keyword, geo: {date(2026, 10, 4): 2.0, date(2026, 10, 11): 4.0})
+    api_calls.get_interest_over_time.clear()
+    assert api_calls.get_interest_over_time("nicho", "BR-AC")["nicho"].tolist() == [50, 100]
@@ -0,0 +1,74 @@
+# trends_regions.py
+#
+# Resolve a região do Google Trends (BR-RJ, BR-SP, ...) a partir da
+# localização geocodificada que já fica salva em cada snapshot. Usa uma tabela
+# pré-calculada com o retângulo envolvente e algumas cidades de referência de
+# cada UF: quando o ponto cai em mais de um retângulo (divisas), fica a UF da
+# cidade de referência mais próxima. As coordenadas são arredondadas antes da
+# consulta e as resoluções ficam em cache no processo.
+
+from functools import lru_cache
+
+COUNTRY_GEO = 'BR'
+# Duas casas decimais (~1 km) bastam para decidir a UF e fazem mercados vizinhos compartilharem o cache
+COORD_PRECISION = 2
+
+# sigla: (nome, (lat_min, lat_max, lon_min, lon_max), [(lat, lon) da capital e de cidades de referência])
+# Os retângulos se sobrepõem nas divisas; as cidades de referência desempatam pelo vizinho mais próximo.
+UF_TABLE = {
+    'AC': ("Acre", (-11.15, -7.11, -73.99, -66.62), [(-9.97, -67.81), (-7.63, -72.67), (-9.07, -68.66), (-11.00, -68.74), (-8.16, -70.77)]),
+    'AL': ("Alagoas", (-10.50, -8.81, -38.24, -35.15), [(-9.67, -35.74), (-9.75, -36.66), (-9.41, -36.63), (-10.29, -36.58), (-9.39, -37.99)]),
+    'AP': ("Amapá", (-1.24, 4.44, -54.88, -49.87), [(0.03, -51.07), (3.84, -51.83), (-0.80, -52.45), (-0.06, -51.18)]),
+    'AM': ("Amazonas", (-9.82, 2.25, -73.80, -56.10), [(-3.12, -60.02), (-2.63, -56.74), (-4.25, -69.94), (-3.35, -64.71), (-7.26, -64.80), (-7.51, -63.02), (-0.13, -67.09), (-3.14, -58.44)]),
+    'BA': ("Bahia", (-18.35, -8.53, -46.62, -37.34), [(-12.97, -38.50), (-12.27, -38.97), (-14.86, -40.84), (-14.79, -39.05), (-9.41, -40.50), (-12.15, -45.00), (-17.54, -39.74), (-16.45, -39.06), (-9.40, -38.21), (-14.22, -42.78), (-11.30, -41.86)]),
+    'CE': ("Ceará", (-7.86, -2.78, -41.42, -37.25), [(-3.73, -38.52), (-7.21, -39.32), (-3.69, -40.35), (-7.23, -39.41), (-6.36, -39.30), (-5.18, -40.67), (-4.97, -39.02), (-4.56, -37.77)]),
+    'DF': ("Distrito Federal", (-16.05, -15.50, -48.29, -47.31), [(-15.79, -47.88), (-15.83, -48.06), (-15.82, -48.11), (-16.02, -48.06), (-15.62, -47.65), (-15.65, -47.79)]),
+    'ES': ("Espírito Santo", (-21.30, -17.89, -41.88, -39.68), [(-20.32, -40.34), (-20.85, -41.11), (-19.39, -40.07), (-18.72, -39.86), (-19.54, -40.63)]),
+    'GO': ("Goiás", (-19.50, -12.39, -53.25, -45.91), [(-16.69, -49.26), (-16.33, -48.95), (-17.79, -50.92), (-18.17, -47.94), (-18.42, -49.22), (-16.25, -47.95), (-15.54, -47.33), (-13.44, -49.15), (-17.88, -51.72), (-15.76, -48.28), (-16.07, -47.98)]),
+    'MA': ("Maranhão", (-10.26, -1.04, -48.76, -41.80), [(-2.53, -44.30), (-5.52, -47.49), (-4.86, -43.36), (-5.09, -42.84), (-7.53, -46.04), (-4.22, -44.78), (-4.95, -47.50), (-5.29, -44.49)]),
+    'MT': ("Mato Grosso", (-18.04, -7.35, -61.63, -50.22), [(-15.60, -56.10), (-16.47, -54.64), (-11.86, -55.50), (-15.89, -52.26), (-16.07, -57.68), (-9.88, -56.09), (-12.55, -55.71), (-14.62, -57.49), (-11.38, -58.74), (-10.64, -51.57), (-15.56, -54.30)]),
+    'MS': ("Mato Grosso do Sul", (-24.07, -17.17, -58.17, -50.92), [(-20.45, -54.62), (-22.22, -54.81), (-20.79, -51.70), (-19.01, -57.65), (-22.54, -55.73), (-23.07, -54.19), (-18.51, -54.76), (-19.68, -51.19), (-20.47, -55.79), (-18.79, -52.62)]),
+    'MG': ("Minas Gerais", (-22.92, -14.23, -51.05, -39.86), [(-19.92, -43.94), (-21.76, -43.35), (-18.92, -48.28), (-16.73, -43.86), (-19.75, -47.93), (-18.85, -41.95), (-21.79, -46.56), (-21.55, -45.43), (-17.86, -41.51), (-19.47, -42.54), (-17.22, -46.87), (-21.13, -42.37)]),
+    'PA': ("Pará", (-9.84, 2.59, -58.90, -46.06), [(-1.46, -48.50), (-2.44, -54.71), (-5.37, -49.12), (-3.20, -52.21), (-8.03, -50.03), (-4.28, -55.98), (-2.99, -47.35), (-1.30, -47.93)]),
+    'PB': ("Paraíba", (-8.30, -6.02, -38.77, -34.79), [(-7.12, -34.86), (-7.23, -35.88), (-7.02, -37.28), (-6.76, -38.23), (-6.89, -38.56), (-6.85, -35.49)]),
+    'PR': ("Paraná", (-26.72, -22.52, -54.62, -48.02), [(-25.43, -49.27), (-23.31, -51.16), (-23.42, -51.94), (-24.96, -53.46), (-25.55, -54.59), (-25.09, -50.16), (-25.39, -51.46), (-25.52, -48.51), (-26.23, -52.67), (-23.77, -53.33)]),
+    'PE': ("Pernambuco", (-9.48, -7.28, -41.36, -34.81), [(-8.05, -34.88), (-8.28, -35.97), (-9.39, -40.50), (-8.89, -36.49), (-7.99, -38.30), (-8.42, -37.05), (-7.56, -35.00), (-7.58, -40.50)]),
+    'PI': ("Piauí", (-10.93, -2.74, -45.99, -40.37), [(-5.09, -42.80), (-2.90, -41.78), (-7.08, -41.47), (-6.77, -43.02), (-9.07, -44.36), (-9.01, -42.70), (-4.27, -41.78)]),
+    'RJ': ("Rio de Janeiro", (-23.37, -20.76, -44.89, -40.96), [(-22.91, -43.17), (-22.50, -43.18), (-21.75, -41.32), (-22.52, -44.10), (-23.01, -44.32), (-22.37, -41.79), (-22.28, -42.53), (-22.47, -44.45)]),
+    'RN': ("Rio Grande do Norte", (-6.98, -4.83, -38.58, -34.97), [(-5.79, -35.21), (-5.19, -37.34), (-6.46, -37.10), (-6.11, -38.21), (-6.26, -36.52)]),
+    'RS': ("Rio Grande do Sul", (-33.75, -27.08, -57.65, -49.69), [(-30.03, -51.23), (-29.17, -51.18), (-31.77, -52.34), (-29.68, -53.81), (-28.26, -52.41), (-29.75, -57.09), (-27.63, -52.27), (-29.33, -49.73)]),
+    'RO': ("Rondônia", (-13.69, -7.97, -66.81, -59.77), [(-8.76, -63.90), (-10.88, -61.95), (-9.91, -63.04), (-12.74, -60.15), (-11.44, -61.45), (-10.78, -65.34), (-11.73, -61.78)]),
+    'RR': ("Roraima", (-1.58, 5.27, -64.83, -58.89), [(2.82, -60.67), (0.94, -60.43), (4.48, -61.15), (1.82, -61.13)]),
+    'SC': ("Santa Catarina", (-29.35, -25.95, -53.84, -48.36), [(-27.60, -48.55), (-26.30, -48.85), (-26.92, -49.07), (-27.10, -52.62), (-27.82, -50.33), (-28.68, -49.37), (-26.91, -48.66), (-26.49, -49.07), (-26.25, -49.38), (-27.18, -51.50), (-26.18, -50.39), (-26.73, -53.52)]),
+    'SP': ("São Paulo", (-25.31, -19.78, -53.11, -44.16), [(-23.55, -46.63), (-22.90, -47.06), (-21.18, -47.81), (-20.81, -49.38), (-22.12, -51.39), (-22.31, -49.06), (-23.50, -47.46), (-23.18, -45.88), (-23.96, -46.33), (-20.54, -47.40), (-21.21, -50.43), (-24.49, -47.84), (-23.43, -45.07), (-22.82, -45.19)]),
+    'SE': ("Sergipe", (-11.57, -9.51, -38.25, -36.39), [(-10.91, -37.07), (-10.92, -37.65), (-10.68, -37.43), (-10.21, -36.84)]),
+    'TO': ("Tocantins", (-13.47, -5.17, -50.74, -45.70), [(-10.18, -48.33), (-7.19, -48.20), (-11.73, -49.07), (-10.71, -48.42), (-11.63, -46.82), (-5.47, -47.89)]),
+}
+
+@lru_cache(maxsize=4096)
+def _uf_for_point(lat: float, lon: float) -> str | None:
+    candidatas = [uf for uf, (_, (lat_min, lat_max, lon_min, lon_max), _) in UF_TABLE.items()
+                  if lat_min <= lat <= lat_max and lon_min <= lon <= lon_max]
+    if len(candidatas) <= 1:
+        return candidatas[0] if candidatas else None
+    return min(candidatas, key=lambda uf: min((ref_lat - lat) ** 2 + (ref_lon - lon) ** 2 for ref_lat, ref_lon in UF_TABLE[uf][2]))
+
+def uf_for_coordinates(lat, lon) -> str | None:
+    """Sigla da UF que contém o ponto, ou None fora do Brasil."""
+    try:
+        return _uf_for_point(round(float(lat), COORD_PRECISION), round(float(lon), COORD_PRECISION))
+    except (TypeError, ValueError):
+        return None
+
+def resolve_trends_geo(snapshot_data: dict) -> str:
+    """Código de região do Trends para o snapshot ('BR-RJ'), ou 'BR' se não for possível resolver."""
+    uf = (snapshot_data.get('location_state') or '').upper()
+    if uf not in UF_TABLE:
+        geocode = snapshot_data.get('location_geocode') or {}
+        uf = uf_for_coordinates(geocode.get('lat'), geocode.get('lng'))
+    return f"{COUNTRY_GEO}-{uf}" if uf else COUNTRY_GEO
+
+def region_label(geo: str) -> str:
+    """Nome legível da região ('Rio de Janeiro'; 'Brasil' para o país inteiro)."""
+    uf = geo.split('-', 1)[1] if '-' in geo else None
+    return UF_TABLE[uf][0] if uf in UF_TABLE else "Brasil"
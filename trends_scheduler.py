@@ -0,0 +1,174 @@
+# trends_scheduler.py
+#
+# Agendador único (por processo do servidor) das consultas ao Google Trends.
+# Os pedidos de todas as sessões entram numa fila, são agrupados em payloads
+# de até 5 termos (4 palavras-chave + um termo âncora comum) e enviados um de
+# cada vez, com intervalo mínimo entre eles. Um 429 coloca o agendador inteiro
+# em backoff e os pedidos continuam na fila, em vez de falharem.
+#
+# O Trends escala cada payload pelo seu termo de maior volume, então uma
+# palavra-chave de nicho num lote com a âncora (ou com outro termo forte) vira
+# zeros. Essas voltam para a fila para uma consulta só delas, sem âncora, na
+# própria escala 0–100 — a mesma resolução da consulta de um termo só.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import streamlit as st
+
+# Limite do Google Trends por payload; um dos termos é sempre a âncora
+MAX_TERMS_PER_PAYLOAD = 5
+# Termo de volume estável incluído nos payloads com mais de uma palavra-chave. Cada payload é
+# escalado pelo seu próprio máximo, então dividir pela média da âncora deixa lotes diferentes comparáveis.
+ANCHOR_TERM = os.environ.get("RADAR_TRENDS_ANCHOR", "farmácia")
+ANCHOR_SCALE = 100.0
+# Pico (0–100) abaixo do qual a palavra-chave perdeu resolução no lote e é consultada sozinha
+MIN_BATCH_PEAK = 5
+MIN_INTERVAL_SECONDS = float(os.environ.get("RADAR_TRENDS_INTERVAL", 6))
+# Espera curta para juntar pedidos que chegam quase ao mesmo tempo no mesmo lote
+GATHER_SECONDS = 1.0
+BACKOFF_INITIAL_SECONDS = 60
+BACKOFF_MAX_SECONDS = 15 * 60
+
+def _is_throttled(error: Exception) -> bool:
+    response = getattr(error, "response", None)
+    return type(error).__name__ == "TooManyRequestsError" or getattr(response, "status_code", None) == 429
+
+def _fetch_batch(keywords: list, geo: str, timeframe: str) -> tuple:
+    """Um payload no Trends. Retorna ({palavra: {data: valor}}, [palavras sem resolução no lote]).
+
+    Com uma palavra só não há âncora e os valores ficam na escala 0–100 dela; com várias, ficam na
+    escala da âncora, e as que não chegam a MIN_BATCH_PEAK no lote são devolvidas para consulta individual.
+    """
+    from pytrends.request import TrendReq
+    anchored = len(keywords) > 1
+    terms = keywords + ([ANCHOR_TERM] if anchored and ANCHOR_TERM not in keywords else [])
+    pytrends = TrendReq(hl='pt-BR', tz=360)
+    pytrends.build_payload(terms, cat=0, timeframe=timeframe, geo=geo, gprop='')
+    df = pytrends.interest_over_time()
+    if df.empty:
+        return {keyword: {} for keyword in keywords}, (list(keywords) if anchored else [])
+    factor = 1.0
+    if anchored:
+        anchor_mean = float(df[ANCHOR_TERM].mean()) if ANCHOR_TERM in df.columns else 0.0
+        # Sem volume da âncora na janela, cai para a escala crua do payload
+        factor = ANCHOR_SCALE / anchor_mean if anchor_mean > 0 else 1.0
+    low_resolution = [k for k in keywords if anchored and (k not in df.columns or float(df[k].max()) < MIN_BATCH_PEAK)]
+    results = {
+        keyword: {ts.date(): float(value) * factor for ts, value in df[keyword].items()} if keyword in df.columns else {}
+        for keyword in keywords if keyword not in low_resolution
+    }
+    return results, low_resolution
+
+def _copy_outcome(source: Future, target: Future):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+class _TrendsScheduler:
+    """Fila de pedidos agrupados por (geo, janela, individual), com deduplicação e backoff global."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: OrderedDict[tuple, OrderedDict[str, Future]] = OrderedDict()
+        self._last_request = 0.0
+        self._backoff = BACKOFF_INITIAL_SECONDS
+        self._backoff_until = 0.0
+        self._thread = threading.Thread(target=self._run, name="radar-trends-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, keyword: str, geo: str, timeframe: str) -> Future:
+        """Agenda a palavra-chave; pedidos iguais ainda na fila recebem o mesmo Future."""
+        with self._cond:
+            future = self._pending.get((geo, timeframe, True), {}).get(keyword)
+            if future is not None:
+                return future
+            group = self._pending.setdefault((geo, timeframe, False), OrderedDict())
+            future = group.get(keyword)
+            if future is None:
+                future = group[keyword] = Future()
+                self._cond.notify()
+            return future
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                'queued': sum(len(group) for group in self._pending.values()),
+                'backoff_seconds': max(self._backoff_until - time.monotonic(), 0),
+            }
+
+    def _take_batch(self) -> tuple:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+        time.sleep(GATHER_SECONDS)
+        # Respeita o intervalo mínimo e o backoff antes de tirar o lote da fila
+        wait = max(self._backoff_until, self._last_request + MIN_INTERVAL_SECONDS) - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        with self._cond:
+            group_key, group = next(iter(self._pending.items()))
+            size = 1 if group_key[2] else MAX_TERMS_PER_PAYLOAD - 1
+            batch = [group.popitem(last=False) for _ in range(min(size, len(group)))]
+            if not group:
+                del self._pending[group_key]
+            return group_key, batch
+
+    def _requeue(self, group_key: tuple, batch: list):
+        with self._cond:
+            group = self._pending.setdefault(group_key, OrderedDict())
+            for keyword, future in reversed(batch):
+                newer = group.get(keyword)
+                if newer is not None:
+                    # Pedido igual chegou enquanto o lote estava fora da fila: o novo Future segue o antigo
+                    future.add_done_callback(lambda f, target=newer: _copy_outcome(f, target))
+                group[keyword] = future
+                group.move_to_end(keyword, last=False)
+            self._pending.move_to_end(group_key, last=False)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            try:
+                self._run_once()
+            except Exception as e:
+                print(f"Erro inesperado no agendador do Google Trends: {e}")
+
+    def _run_once(self):
+        group_key, batch = self._take_batch()
+        geo, timeframe, _ = group_key
+        self._last_request = time.monotonic()
+        try:
+            results, low_resolution = _fetch_batch([keyword for keyword, _ in batch], geo, timeframe)
+        except Exception as e:
+            if _is_throttled(e):
+                self._backoff_until = time.monotonic() + self._backoff
+                print(f"Google Trends limitou as requisições (429); pausando por {self._backoff}s.")
+                self._backoff = min(self._backoff * 2, BACKOFF_MAX_SECONDS)
+                self._requeue(group_key, batch)
+            else:
+                for _, future in batch: future.set_exception(e)
+            return
+        self._backoff = BACKOFF_INITIAL_SECONDS
+        if low_resolution:
+            # Sem resolução no lote: voltam para a fila, cada uma numa consulta só dela
+            self._requeue((geo, timeframe, True), [(k, f) for k, f in batch if k in low_resolution])
+        for keyword, future in batch:
+            if keyword not in low_resolution: future.set_result(results.get(keyword, {}))
+
+@st.cache_resource
+def get_trends_scheduler() -> _TrendsScheduler:
+    """Agendador único por processo do servidor, compartilhado entre as sessões."""
+    return _TrendsScheduler()
+
+def submit(keyword: str, geo: str, timeframe: str) -> Future:
+    """Agenda a busca e retorna um Future com {data: valor} (escala da âncora)."""
+    return get_trends_scheduler().submit(keyword, geo, timeframe)
+
+def status() -> dict:
+    """Itens na fila e segundos restantes de backoff, para mensagens na interface."""
+    return get_trends_scheduler().status()
@@ -0,0 +1,191 @@
+# trends_store.py
+#
+# Séries do Google Trends persistidas no Supabase (tabelas trends_series e
+# trends_series_meta, migração 0006). A primeira consulta de uma palavra-chave
+# baixa os últimos 12 meses; depois disso só a janela recente que falta é
+# pedida ao trends_scheduler, reescalada pelas semanas em comum e anexada.
+# Assim a aba de tendências não refaz um ano inteiro de consultas ao pytrends
+# a cada abertura, e o histórico sobrevive a reinícios e é compartilhado
+# entre réplicas.
+
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from datetime import date, datetime, timedelta, timezone
+
+import trends_scheduler
+from supabase_client import supabase_client
+
+# Com dados mais novos que isso, a série salva é usada sem consultar o Trends
+REFRESH_AFTER = timedelta(hours=24)
+# Rebusca completa periódica, para que o erro das reescalas encadeadas não se acumule
+FULL_REFRESH_AFTER = timedelta(days=30)
+HISTORY_WEEKS = 52
+FULL_TIMEFRAME = 'today 12-m'
+# (semanas em falta, janela): as janelas curtas vêm em pontos diários e são agregadas por semana
+INCREMENTAL_WINDOWS = [(3, 'today 1-m'), (11, 'today 3-m')]
+# Quanto a aba de tendências espera pelo agendador quando ainda não há série salva
+WAIT_SECONDS = 20
+
+# Atualizações em andamento por (palavra-chave, geo): sessões simultâneas compartilham o mesmo
+# Future, e a série é gravada uma única vez.
+_inflight: dict[tuple, Future] = {}
+_inflight_lock = threading.Lock()
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join((keyword or "").lower().split())
+
+def week_start(day: date) -> date:
+    """Domingo que inicia a semana de `day`, a mesma convenção das séries semanais do Trends."""
+    return day - timedelta(days=(day.weekday() + 1) % 7)
+
+# --- Persistência ---
+
+def _load_points(keyword: str, geo: str) -> dict:
+    since = week_start(date.today()) - timedelta(weeks=HISTORY_WEEKS)
+    response = supabase_client.table('trends_series').select('week, value').eq('keyword', keyword).eq('geo', geo).gte('week', since.isoformat()).execute()
+    return {date.fromisoformat(row['week']): float(row['value']) for row in response.data or []}
+
+def _load_meta(keyword: str, geo: str) -> dict | None:
+    response = supabase_client.table('trends_series_meta').select('last_fetched_at, last_full_at').eq('keyword', keyword).eq('geo', geo).limit(1).execute()
+    if not response.data:
+        return None
+    return {name: datetime.fromisoformat(value.replace('Z', '+00:00')) if value else None for name, value in response.data[0].items()}
+
+def _save_points(keyword: str, geo: str, points: dict, full: bool):
+    """Grava os pontos; numa busca completa substitui a série inteira (a escala muda)."""
+    now = datetime.now(timezone.utc).isoformat()
+    if full:
+        supabase_client.table('trends_series').delete().eq('keyword', keyword).eq('geo', geo).execute()
+    if points:
+        rows = [{'keyword': keyword, 'geo': geo, 'week': week.isoformat(), 'value': round(value, 3)} for week, value in points.items()]
+        supabase_client.table('trends_series').upsert(rows).execute()
+    meta = {'keyword': keyword, 'geo': geo, 'last_fetched_at': now}
+    if full:
+        meta['last_full_at'] = now
+    supabase_client.table('trends_series_meta').upsert(meta).execute()
+
+# --- Busca no Google Trends (via trends_scheduler) ---
+
+class TrendsPending(Exception):
+    """Ainda não há série salva e a busca está na fila do agendador (ou em backoff por 429)."""
+
+def _weekly(points: dict) -> dict:
+    """Agrega {data: valor} (diário ou semanal) em {domingo da semana: média}."""
+    semanas = {}
+    for day, value in points.items():
+        semanas.setdefault(week_start(day), []).append(value)
+    return {week: sum(values) / len(values) for week, values in semanas.items()}
+
+def _rescale(stored: dict, fresh: dict) -> dict | None:
+    """Coloca a janela nova na escala da série salva usando as semanas em comum; None se não houver base."""
+    # A primeira semana de uma janela diária quase sempre está incompleta, então fica fora da base
+    overlap = sorted(set(stored) & set(fresh))[1:]
+    base = sum(stored[week] for week in overlap)
+    novo = sum(fresh[week] for week in overlap)
+    if not overlap or base <= 0 or novo <= 0:
+        return None
+    fator = base / novo
+    return {week: value * fator for week, value in fresh.items()}
+
+def has_volume(points: dict | None) -> bool:
+    """Série com algum interesse; uma série só de zeros equivale a "sem dados" (termo sem volume na região)."""
+    return bool(points) and any(value > 0 for value in points.values())
+
+def _fetched_points(future: Future, timeframe: str) -> dict | None:
+    """Pontos semanais da busca; None se ela falhou (diferente de {} = o Trends não tem dados)."""
+    try:
+        return _weekly(future.result())
+    except Exception as e:
+        print(f"Erro ao buscar dados do Google Trends ({timeframe}): {e}"); return None
+
+def _submit_full(keyword: str, geo: str, stored: dict, done: Future):
+    def apply(future: Future):
+        fresh = _fetched_points(future, FULL_TIMEFRAME)
+        if fresh is None or (stored and not has_volume(fresh)):
+            # Falha, ou zeros por cima de uma série válida: devolve o que já estava salvo, mesmo defasado
+            done.set_result(stored); return
+        if not has_volume(fresh):
+            # Sem volume: registra só a consulta (não é uma série completa válida) para não
+            # repetir a busca a cada abertura da aba antes de REFRESH_AFTER
+            try:
+                _save_points(keyword, geo, {}, full=False)
+            except Exception as e:
+                print(f"Erro ao salvar a série de tendências: {e}")
+            done.set_result({}); return
+        try:
+            _save_points(keyword, geo, fresh, full=True)
+        except Exception as e:
+            print(f"Erro ao salvar a série de tendências: {e}")
+        done.set_result(fresh)
+    trends_scheduler.submit(keyword, geo, FULL_TIMEFRAME).add_done_callback(apply)
+
+def _submit_incremental(keyword: str, geo: str, stored: dict, timeframe: str, done: Future):
+    last_week = max(stored)
+    def apply(future: Future):
+        scaled = _rescale(stored, _fetched_points(future, timeframe) or {})
+        if scaled is None:
+            _submit_full(keyword, geo, stored, done); return
+        # A última semana salva pode ter sido parcial, então também é regravada
+        updates = {week: value for week, value in scaled.items() if week >= last_week}
+        try:
+            _save_points(keyword, geo, updates, full=False)
+        except Exception as e:
+            print(f"Erro ao salvar a série de tendências: {e}")
+        done.set_result({**stored, **updates})
+    trends_scheduler.submit(keyword, geo, timeframe).add_done_callback(apply)
+
+def _start_refresh(keyword: str, geo: str, stored: dict, meta: dict | None, now: datetime) -> Future:
+    """Agenda a atualização (ou reaproveita a que já está em andamento) e retorna um Future com a
+    série final. A gravação acontece no callback, então a série é salva mesmo sem ninguém esperando."""
+    with _inflight_lock:
+        running = _inflight.get((keyword, geo))
+        if running is not None:
+            return running
+        done = _inflight[(keyword, geo)] = Future()
+    done.add_done_callback(lambda _: _forget_refresh(keyword, geo, done))
+    try:
+        _schedule_refresh(keyword, geo, stored, meta, now, done)
+    except Exception as e:
+        done.set_exception(e)
+    return done
+
+def _forget_refresh(keyword: str, geo: str, done: Future):
+    with _inflight_lock:
+        if _inflight.get((keyword, geo)) is done:
+            del _inflight[(keyword, geo)]
+
+def _schedule_refresh(keyword: str, geo: str, stored: dict, meta: dict | None, now: datetime, done: Future):
+    full_due = not stored or not meta or not meta.get('last_full_at') or now - meta['last_full_at'] > FULL_REFRESH_AFTER
+    if not full_due:
+        missing_weeks = (week_start(now.date()) - max(stored)).days // 7
+        timeframe = next((tf for limit, tf in INCREMENTAL_WINDOWS if missing_weeks <= limit), None)
+        if timeframe:
+            _submit_incremental(keyword, geo, stored, timeframe, done)
+            return
+    _submit_full(keyword, geo, stored, done)
+
+def get_interest_series(keyword: str, geo: str = 'BR', wait_seconds: float = WAIT_SECONDS) -> dict:
+    """Série semanal {semana: interesse} das últimas HISTORY_WEEKS semanas, atualizada de forma incremental.
+
+    Com série salva, ela é devolvida na hora e a atualização termina em segundo plano. Sem nada
+    salvo, espera até `wait_seconds` e levanta TrendsPending se a busca não terminar.
+    """
+    key = normalize_keyword(keyword)
+    if not key:
+        return {}
+    try:
+        stored = _load_points(key, geo)
+        meta = _load_meta(key, geo)
+    except Exception as e:
+        print(f"Erro ao ler a série de tendências salva: {e}"); stored, meta = {}, None
+    now = datetime.now(timezone.utc)
+    # Meta recente sem pontos = termo sem volume nesta região, consultado há pouco
+    if not (meta and now - meta['last_fetched_at'] < REFRESH_AFTER):
+        refresh = _start_refresh(key, geo, stored, meta, now)
+        if not stored:
+            try:
+                stored = refresh.result(timeout=wait_seconds)
+            except FutureTimeoutError:
+                raise TrendsPending(key)
+    cutoff = week_start(now.date()) - timedelta(weeks=HISTORY_WEEKS)
+    return {week: value for week, value in sorted(stored.items()) if week > cutoff}